@@ -6,14 +6,120 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import json, re, os, requests, threading
+import plotly.io as pio
+import json, re, os, sys, requests, threading
+import io
+import zlib
 import flask
 import gc
+import sqlite3
+import tempfile
+import pathlib
+import bisect
+import unicodedata
+import functools
+import time
+import hashlib
+import mimetypes
+import gzip
+import random
+import urllib.parse
+import hmac
+import collections
+import copy
+import weakref
+import tracemalloc
+import concurrent.futures
+from html import escape as html_escape
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from werkzeug.security import safe_join
 
-# Habilitar logs detallados para Flask
+# ------------------------------------------------------
+# REGISTRO (logging no bloqueante)
+# ------------------------------------------------------
+# Nivel por OCDS_LOG_LEVEL (INFO por defecto). Los hilos de request solo encolan cada registro;
+# un QueueListener en un hilo aparte lo formatea y lo escribe en stderr. Con
+# OCDS_LOG_FORMAT=json cada registro es una línea JSON (con los campos del access log:
+# ruta, código, duración, callback...). El access log se muestrea: ver _registrar_acceso.
 import logging
-# Configurar logs para que se muestren en la terminal
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[logging.StreamHandler()])
+import logging.handlers
+import queue
+import atexit
+
+NIVEL_LOG = logging.getLevelName(os.getenv("OCDS_LOG_LEVEL", "INFO").strip().upper())
+if not isinstance(NIVEL_LOG, int):
+    NIVEL_LOG = logging.INFO
+FORMATO_LOG_JSON = os.getenv("OCDS_LOG_FORMAT", "texto").strip().lower() == "json"
+_FORMATO_LOG_TEXTO = '%(asctime)s - %(levelname)s - %(message)s'
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos extra del access log si están."""
+
+    CAMPOS = ("metodo", "ruta", "codigo", "duracion_ms", "bytes", "callback", "generacion")
+
+    def format(self, registro):
+        datos = {
+            "ts": self.formatTime(registro, "%Y-%m-%dT%H:%M:%S") + f".{int(registro.msecs):03d}",
+            "nivel": registro.levelname,
+            "logger": registro.name,
+            "mensaje": registro.getMessage(),
+            "pid": registro.process,
+            "hilo": registro.threadName,
+        }
+        for campo in self.CAMPOS:
+            valor = getattr(registro, campo, None)
+            if valor is not None:
+                datos[campo] = valor
+        if registro.exc_info:
+            datos["excepcion"] = self.formatException(registro.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class _ColaLog(logging.handlers.QueueHandler):
+    """QueueHandler que deja el formateo (y el traceback) al hilo del QueueListener.
+
+    El ``prepare`` de la clase base formatea en el hilo que loguea y borra ``exc_info``:
+    el traceback quedaba pegado a ``mensaje`` y el JSON nunca tenía ``excepcion``. La cola
+    es del mismo proceso (no se serializa), así que el registro puede viajar tal cual;
+    solo se resuelve ``msg % args`` porque los argumentos podrían cambiar antes de escribirse.
+    """
+
+    def prepare(self, registro):
+        registro = copy.copy(registro)
+        registro.msg, registro.args = registro.getMessage(), None
+        return registro
+
+def _manejador_directo():
+    manejador = logging.StreamHandler()
+    manejador.setFormatter(FormatoJSON() if FORMATO_LOG_JSON else logging.Formatter(_FORMATO_LOG_TEXTO))
+    return manejador
+
+def configurar_logging():
+    """Instala la cola de logging en el logger raíz y arranca el hilo que escribe."""
+    cola = queue.SimpleQueue()
+    oyente = logging.handlers.QueueListener(cola, _manejador_directo(), respect_handler_level=True)
+    raiz = logging.getLogger()
+    raiz.handlers = [_ColaLog(cola)]
+    raiz.setLevel(NIVEL_LOG)
+    oyente.start()
+    atexit.register(oyente.stop)
+    return oyente
+
+def _logging_en_hijo():
+    # Los procesos de trabajos en segundo plano (fork) no heredan el hilo escritor: escriben directo
+    logging.getLogger().handlers = [_manejador_directo()]
+
+_OYENTE_LOG = configurar_logging()
+os.register_at_fork(after_in_child=_logging_en_hijo)
+
+# Access log: fracción OCDS_ACCESS_LOG_SAMPLE de los requests (0 = ninguno), más todos los
+# 5xx y los más lentos que OCDS_ACCESS_LOG_SLOW_MS; siempre a nivel INFO en "ocds.acceso"
+log_acceso = logging.getLogger("ocds.acceso")
+try:
+    MUESTRA_ACCESO = min(1.0, max(0.0, float(os.getenv("OCDS_ACCESS_LOG_SAMPLE", "0"))))
+    ACCESO_LENTO_MS = float(os.getenv("OCDS_ACCESS_LOG_SLOW_MS", "2000"))
+except Exception:
+    MUESTRA_ACCESO, ACCESO_LENTO_MS = 0.0, 2000.0
 
 # Activar Copy-on-Write para reducir copias en memoria (pandas >= 2.1)
 try:
@@ -21,13 +127,499 @@ try:
 except Exception:
     pass
 
+# ------------------------------------------------------
+# TRABAJOS PESADOS EN SEGUNDO PLANO
+# ------------------------------------------------------
+# Los callbacks costosos (p. ej. Insumos por licitante) corren como "background callbacks"
+# de Dash en procesos aparte, con resultados en un caché de disco compartido por todos los
+# workers de gunicorn. Así los hilos de request quedan libres para tráfico liviano y /health.
+# Requiere ``dash[diskcache]``; sin esas dependencias (o con OCDS_BACKGROUND=0) los
+# callbacks se ejecutan como siempre, dentro del request.
+OCDS_BACKGROUND = os.getenv("OCDS_BACKGROUND", "1") not in ("0", "false", "False")
+TRABAJOS_DIR = os.getenv("OCDS_JOBS_DIR", os.path.join(tempfile.gettempdir(), "ocds-trabajos"))
+try:
+    MAX_TRABAJOS = max(1, int(os.getenv("OCDS_MAX_JOBS", "2")))  # trabajos pesados simultáneos
+except Exception:
+    MAX_TRABAJOS = 2
+
+def _cupo_libre(cache, clave):
+    """Indica si el cupo está vacío o su dueño ya no es un proceso vivo (cancelado o caído)."""
+    import psutil  # type: ignore  # dependencia de dash[diskcache]
+    dueño = cache.get(clave)
+    if dueño is None:
+        return True
+    try:
+        return psutil.Process(dueño).status() == psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return True
+
+def _tomar_cupo(cache, cupos, espera=0.05):
+    """Bloquea hasta ocupar uno de los ``cupos`` del caché compartido y devuelve su clave."""
+    pid = os.getpid()
+    while True:
+        with cache.transact(retry=True):
+            for i in range(cupos):
+                clave = f"ocds-cupo-{i}"
+                if _cupo_libre(cache, clave):
+                    cache.set(clave, pid)
+                    return clave
+        time.sleep(espera)
+
+def trabajo_pesado(fn):
+    """Decorador para el cuerpo de un background callback: corre en el proceso hijo.
+
+    Espera uno de los ``MAX_TRABAJOS`` cupos compartidos, perfila el cálculo y guarda el
+    perfil antes de devolver el resultado (Dash termina el proceso apenas lo lee). Sin
+    gestor de trabajos el callback corre dentro del request y la envoltura no se aplica.
+    """
+    if gestor_trabajos is None:
+        return fn
+
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        # Las conexiones SQLite heredadas del proceso padre no deben usarse tras el fork
+        _SQLITE_LOCAL.__dict__.clear()
+        clave = _tomar_cupo(cache_trabajos, MAX_TRABAJOS)
+        # El hijo corre un solo trabajo: no compite por el perfilador (su lock pudo heredarse tomado)
+        perfil = iniciar_perfil(exclusivo=False)
+        inicio = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            terminar_perfil(perfil, time.perf_counter() - inicio, fn.__name__, list(args))
+            with cache_trabajos.transact(retry=True):
+                if cache_trabajos.get(clave) == os.getpid():
+                    cache_trabajos.delete(clave)
+    return envoltura
+
+def _id_salida(salida):
+    """Id de una salida tal como lo escribe Dash en la respuesta (los ids dict, serializados)."""
+    from dash._utils import stringify_id
+    return stringify_id(salida["id"])
+
+def responder_desde_cache(fn):
+    """Decorador (por encima de ``@app.callback``) que conecta un background callback con
+    ``cache_resultados``.
+
+    - Si el resultado ya está en el caché por generación, la primera petición lo devuelve
+      directamente, sin lanzar un proceso ni sondear.
+    - Si no, se despacha el trabajo como siempre y, cuando un sondeo trae el resultado, se
+      guarda en el caché (solo si el dataset no cambió mientras el hijo calculaba).
+
+    Depende de detalles internos de Dash 4.x (ver el rango fijado en ``requirements.txt``):
+    el callback registrado en ``app.callback_map[...]["callback"]`` (envuelve a ``fn`` con
+    ``functools.wraps``), el parámetro ``cacheKey`` que el navegador agrega a los sondeos, el
+    formato de respuesta ``{"multi": true, "response": {id: {prop: valor}}}`` y que el
+    renderer acepte ese formato como primera respuesta de un background callback.
+    """
+    if gestor_trabajos is None:
+        return fn
+    en_cache = getattr(fn, "resultado_en_cache", None)
+    guardar = getattr(fn, "guardar_resultado", None)
+    if en_cache is None or guardar is None:
+        raise TypeError(f"{fn.__name__}: responder_desde_cache requiere @cache_por_generacion")
+    registros = [r for r in app.callback_map.values() if getattr(r["callback"], "__wrapped__", None) is fn]
+    if len(registros) != 1:
+        raise RuntimeError(f"{fn.__name__}: no se encontró su registro en app.callback_map")
+    registro = registros[0]
+    original = registro["callback"]
+
+    @functools.wraps(original)
+    def envoltura(*args, **kwargs):
+        salidas = kwargs.get("outputs_list")
+        multiple = isinstance(salidas, list)
+        salidas = salidas if multiple else [salidas]
+        clave_trabajo = flask.request.args.get("cacheKey")
+        if not clave_trabajo:
+            resultado = en_cache(args)
+            if resultado is not _SIN_RESULTADO:
+                valores = list(resultado) if multiple else [resultado]
+                respuesta = {}
+                for s, valor in zip(salidas, valores):
+                    if not isinstance(valor, type(dash.no_update)):
+                        respuesta.setdefault(_id_salida(s), {})[s["property"]] = valor
+                return pio.json.to_json_plotly({"multi": True, "response": respuesta})
+            huella = _HUELLA_DATOS
+            salida = original(*args, **kwargs)
+            try:
+                clave_trabajo = json.loads(salida).get("cacheKey")
+            except Exception:
+                clave_trabajo = None
+            if clave_trabajo and huella:
+                cache_trabajos.set(("ocds-huella", clave_trabajo), huella, expire=600)
+            return salida
+
+        salida = original(*args, **kwargs)
+        try:
+            respuesta = json.loads(salida).get("response")
+        except Exception:
+            respuesta = None
+        if respuesta is not None:
+            huella = cache_trabajos.pop(("ocds-huella", clave_trabajo), default=None)
+            # Otra huella (o ninguna): el dataset cambió durante el cálculo, el resultado es viejo
+            if huella and huella == _HUELLA_DATOS:
+                try:
+                    valores = [respuesta[_id_salida(s)][s["property"]] for s in salidas]
+                except (KeyError, TypeError):
+                    valores = None  # alguna salida sin actualizar: no hay resultado completo
+                if valores is not None:
+                    guardar(args, tuple(valores) if multiple else valores[0])
+        return salida
+
+    registro["callback"] = envoltura
+    return fn
+
+def _crear_gestor_trabajos():
+    """Crea el gestor de background callbacks y su caché de disco (``(None, None)`` si no está
+    habilitado/disponible)."""
+    if not OCDS_BACKGROUND or os.getenv("SPHINX_BUILD") == "1":
+        return None, None
+    try:
+        import diskcache  # type: ignore  # import opcional
+        from dash import DiskcacheManager
+    except Exception as e:
+        logging.warning("Background callbacks deshabilitados: falta dash[diskcache] (%s)", e)
+        return None, None
+    try:
+        # Directorio fijo: el worker que atiende el sondeo puede no ser el que lanzó el trabajo
+        cache = diskcache.Cache(TRABAJOS_DIR)
+        return DiskcacheManager(cache, expire=600), cache
+    except Exception as e:
+        logging.warning("Background callbacks deshabilitados: no se pudo crear el caché en %s (%s)", TRABAJOS_DIR, e)
+        return None, None
+
+# El caché de disco se comparte con el gestor: cupos de trabajos y huella del dataset por trabajo
+gestor_trabajos, cache_trabajos = _crear_gestor_trabajos()
+
+def opciones_trabajo_pesado(contenedor_progreso=None):
+    """Argumentos extra de ``@app.callback`` para un callback pesado.
+
+    Parámetros
+    ----------
+    contenedor_progreso : str | None
+        Id de un contenedor que se muestra mientras el callback corre.
+
+    Retorna
+    -------
+    dict
+        ``background=True`` si hay gestor de trabajos, más ``running`` para el indicador.
+    """
+    opciones = {}
+    if gestor_trabajos is not None:
+        opciones["background"] = True
+        opciones["interval"] = 500  # sondeo del resultado (ms); con caché el primero ya lo trae
+    if contenedor_progreso:
+        opciones["running"] = [
+            (Output(contenedor_progreso, "style"), {"display": "block"}, {"display": "none"}),
+        ]
+    return opciones
+
+def avisar_progreso(id_barra, porcentaje, etiqueta):
+    """Actualiza una barra ``dbc.Progress`` desde un callback (en vivo si corre en segundo plano)."""
+    try:
+        dash.set_props(id_barra, {"value": porcentaje, "label": etiqueta})
+    except Exception:
+        pass
+
+# ------------------------------------------------------
+# COALESCENCIA DE CÁLCULOS IDÉNTICOS (single-flight)
+# ------------------------------------------------------
+# Si varios hilos piden a la vez el mismo callback con las mismas entradas (p. ej. una
+# ráfaga de visitas a Home con el año por defecto), solo el primero calcula y el resto
+# espera y comparte su resultado. La clave incluye la generación del dataset, de modo
+# que una recarga nunca mezcla resultados de datos distintos.
+_VUELOS = {}
+_VUELOS_LOCK = threading.Lock()
+# Por función: llamadas calculadas y llamadas que reutilizaron un cálculo en curso
+ESTADISTICAS_COALESCENCIA = {}
+
+class _Vuelo:
+    """Cálculo en curso: los hilos que llegan después esperan ``listo``."""
+    __slots__ = ("listo", "resultado", "error")
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.error = None
+
+def _clave_llamada(args, kwargs):
+    """Clave estable para argumentos de callbacks (valores JSON: números, textos, listas, dicts)."""
+    try:
+        disparadores = tuple(sorted(t.get("prop_id", "") for t in dash.callback_context.triggered))
+    except Exception:
+        disparadores = ()
+    # El disparador cuenta: p. ej. en Procesos cambiar de página no equivale a cambiar un filtro
+    return json.dumps([args, kwargs, disparadores], sort_keys=True, default=str)
+
+def unico_en_vuelo(fn):
+    """Decorador *single-flight*: llamadas simultáneas idénticas comparten un único cálculo.
+
+    Parámetros
+    ----------
+    fn : callable
+        Función (típicamente un callback de Dash) cuyo resultado depende solo de sus
+        argumentos y del dataset vigente.
+
+    Retorna
+    -------
+    callable
+        Envoltura con la misma firma; las llamadas coalescidas devuelven el mismo objeto
+        (o relanzan la misma excepción) que la llamada que calculó.
+    """
+    nombre = fn.__name__
+    contadores = ESTADISTICAS_COALESCENCIA.setdefault(nombre, {"calculadas": 0, "coalescidas": 0})
+
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        clave = (nombre, generacion_vigente(), _clave_llamada(args, kwargs))
+        with _VUELOS_LOCK:
+            vuelo = _VUELOS.get(clave)
+            lider = vuelo is None
+            if lider:
+                vuelo = _VUELOS[clave] = _Vuelo()
+                contadores["calculadas"] += 1
+            else:
+                contadores["coalescidas"] += 1
+        if not lider:
+            vuelo.listo.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+        try:
+            vuelo.resultado = fn(*args, **kwargs)
+            return vuelo.resultado
+        except BaseException as e:
+            vuelo.error = e
+            raise
+        finally:
+            # Retirar antes de avisar: quien llegue después calcula con datos frescos
+            with _VUELOS_LOCK:
+                _VUELOS.pop(clave, None)
+            vuelo.listo.set()
+
+    return envoltura
+
+# ------------------------------------------------------
+# CACHÉ DE RESULTADOS POR GENERACIÓN Y PRECALENTAMIENTO
+# ------------------------------------------------------
+# Las salidas de los callbacks caros se guardan por (callback, generación, argumentos).
+# Tras cada carga completa se precalculan (en un pool acotado) antes de publicar la nueva
+# generación, de modo que el primer usuario después de una recarga no paga el cálculo.
+# Durante el precalentamiento las consultas del hilo que precalienta ven el dataset por
+# publicar (``_PREPARACION``); el resto de los hilos sigue viendo el publicado.
+try:
+    CACHE_RESULTADOS_MAX = max(0, int(os.getenv("OCDS_RESULT_CACHE", "256")))  # entradas (0 = sin caché)
+    PRECALENTAR_MAX = max(0, int(os.getenv("OCDS_WARMUP_MAX", "0")))  # combinaciones (0 = todas)
+    PRECALENTAR_HILOS = max(1, int(os.getenv("OCDS_WARMUP_WORKERS", "2")))
+    PRECALENTAR_TIMEOUT = max(0.0, float(os.getenv("OCDS_WARMUP_TIMEOUT", "120")))  # segundos
+except Exception:
+    CACHE_RESULTADOS_MAX, PRECALENTAR_MAX, PRECALENTAR_HILOS, PRECALENTAR_TIMEOUT = 256, 0, 2, 120.0
+PRECALENTAR = os.getenv("OCDS_WARMUP", "1") not in ("0", "false", "False") and CACHE_RESULTADOS_MAX > 0
+_PREPARACION = threading.local()
+_SIN_RESULTADO = object()
+
+def _preparado():
+    """Dataset por publicar visible para este hilo (dict) o ``None`` fuera del precalentamiento."""
+    return getattr(_PREPARACION, "datos", None)
+
+def generacion_vigente():
+    """Generación del dataset que ven las consultas del hilo actual."""
+    preparado = _preparado()
+    return preparado["generacion"] if preparado else _GENERACION_DATOS
+
+class CacheResultados:
+    """LRU acotado de salidas de callbacks, con la generación del dataset en la clave.
+
+    También cuenta cuántas veces se pidió cada combinación de argumentos (entre
+    generaciones) para precalentar primero las más pedidas.
+    """
+
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self._lock = threading.Lock()
+        self._entradas = collections.OrderedDict()
+        self.demanda = collections.Counter()
+        self.aciertos = self.fallos = 0
+
+    def obtener(self, clave, contar=True):
+        with self._lock:
+            valor = self._entradas.get(clave, _SIN_RESULTADO)
+            if valor is not _SIN_RESULTADO:
+                self._entradas.move_to_end(clave)
+            if contar:
+                self.demanda[(clave[0], clave[2])] += 1
+                if valor is _SIN_RESULTADO:
+                    self.fallos += 1
+                else:
+                    self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._entradas[clave] = valor
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+
+    def descartar_anteriores(self, generacion):
+        """Elimina las entradas de generaciones previas a ``generacion``."""
+        with self._lock:
+            for clave in [c for c in self._entradas if c[1] < generacion]:
+                del self._entradas[clave]
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {"entradas": len(self._entradas), "aciertos": self.aciertos, "fallos": self.fallos,
+                    "tasa_aciertos": round(self.aciertos / total, 3) if total else None}
+
+cache_resultados = CacheResultados(CACHE_RESULTADOS_MAX)
+# Callbacks cacheados: nombre -> (función decorada, planificador de combinaciones a precalentar)
+_PRECALENTABLES = {}
+
+def cache_por_generacion(planificar):
+    """Decorador: cachea el resultado por generación y registra el callback para precalentar.
+
+    Sin dataset publicado (generación 0) no cachea: el aviso de carga o de error cambia en
+    cuanto termina o falla la carga.
+
+    Parámetros
+    ----------
+    planificar : callable
+        Sin argumentos; retorna la lista de tuplas de argumentos a precalcular tras cada
+        carga (se invoca con el dataset por publicar visible), en orden de prioridad.
+    """
+    def decorador(fn):
+        nombre = fn.__name__
+
+        def _clave(args):
+            return (nombre, generacion_vigente(), json.dumps(list(args), sort_keys=True, default=str))
+
+        def _cacheable():
+            # Generación 0: nada publicado todavía. El resultado es un aviso de carga (o de error,
+            # con el botón de recarga) que debe recalcularse en cada pedido hasta que haya datos
+            return CACHE_RESULTADOS_MAX and generacion_vigente() > 0
+
+        @functools.wraps(fn)
+        def envoltura(*args):
+            if not _cacheable():
+                return fn(*args)
+            clave = _clave(args)
+            valor = cache_resultados.obtener(clave, contar=_preparado() is None)
+            if valor is _SIN_RESULTADO:
+                valor = fn(*args)
+                cache_resultados.guardar(clave, valor)
+            return valor
+
+        # Para responder_desde_cache: contestar sin lanzar un proceso si ya está calculado y
+        # guardar lo que devuelve un trabajo en segundo plano (calculado en otro proceso)
+        envoltura.resultado_en_cache = lambda args: (
+            cache_resultados.obtener(_clave(args)) if _cacheable() else _SIN_RESULTADO)
+        envoltura.guardar_resultado = lambda args, valor: (
+            cache_resultados.guardar(_clave(args), valor) if _cacheable() else None)
+        _PRECALENTABLES[nombre] = (envoltura, planificar)
+        return envoltura
+
+    return decorador
+
+def _precalentar_uno(preparado, fn, args):
+    _PREPARACION.datos = preparado
+    try:
+        fn(*args)
+    finally:
+        _PREPARACION.datos = None
+
+def precalentar_cache(preparado):
+    """Precalcula los callbacks registrados con ``preparado`` (dataset aún sin publicar).
+
+    Corre en un pool de ``OCDS_WARMUP_WORKERS`` hilos, primero las combinaciones más pedidas
+    y hasta ``OCDS_WARMUP_MAX``; pasado ``OCDS_WARMUP_TIMEOUT`` se publica igual y las
+    combinaciones pendientes se calcularán a demanda.
+
+    Retorna
+    -------
+    int
+        Combinaciones precalculadas.
+    """
+    _PREPARACION.datos = preparado
+    try:
+        tareas = [(nombre, fn, tuple(args)) for nombre, (fn, planificar) in _PRECALENTABLES.items()
+                  for args in planificar()]
+    finally:
+        _PREPARACION.datos = None
+    demanda = cache_resultados.demanda
+    orden = {t: i for i, t in enumerate(tareas)}
+    tareas.sort(key=lambda t: (-demanda[(t[0], json.dumps(list(t[2]), sort_keys=True, default=str))], orden[t]))
+    if PRECALENTAR_MAX:
+        tareas = tareas[:PRECALENTAR_MAX]
+    if not tareas:
+        return 0
+    inicio = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=PRECALENTAR_HILOS, thread_name_prefix="ocds-precalentar")
+    futuros = [pool.submit(_precalentar_uno, preparado, fn, args) for _nombre, fn, args in tareas]
+    hechos, pendientes = concurrent.futures.wait(futuros, timeout=PRECALENTAR_TIMEOUT or None)
+    pool.shutdown(wait=False, cancel_futures=True)
+    errores = [f.exception() for f in hechos if f.exception() is not None]
+    if errores:
+        logging.warning("Precalentamiento: %d combinación(es) fallaron (p. ej. %s)", len(errores), errores[0])
+    listos = len(hechos) - len(errores)
+    logging.info("Precalentamiento: %d/%d combinaciones en %.1fs%s", listos, len(tareas),
+                 time.perf_counter() - inicio, " (tiempo agotado)" if pendientes else "")
+    return listos
+
+# ------------------------------------------------------
+# ASSETS ESTÁTICOS (huella de contenido, caché inmutable y variantes precomprimidas)
+# ------------------------------------------------------
+# Las URLs de assets llevan el hash del contenido (app.3f2a9c1b0d4e.css): el navegador las
+# guarda un año sin revalidar y un cambio del archivo cambia la URL. Las variantes .br/.gz
+# y las copias locales de los logos las genera scripts/preparar_assets.py en el build; si
+# no están, se sirve el original (y los logos desde sus URLs externas).
+ASSETS_DIR = os.getenv("OCDS_ASSETS_DIR") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+_HUELLAS_ASSETS = {}  # ruta relativa -> (mtime_ns, tamaño, huella)
+_RE_HUELLA = re.compile(r"^(?P<base>.+)\.(?P<huella>[0-9a-f]{12})(?P<ext>\.[A-Za-z0-9]+)$")
+_CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+
+def huella_asset(ruta):
+    """Huella (12 hex del SHA-256) de ``assets/<ruta>``; ``None`` si no existe. Se recalcula si el archivo cambia."""
+    completo = safe_join(ASSETS_DIR, ruta)
+    try:
+        st = os.stat(completo)
+    except (OSError, TypeError):
+        return None
+    previo = _HUELLAS_ASSETS.get(ruta)
+    if previo and previo[:2] == (st.st_mtime_ns, st.st_size):
+        return previo[2]
+    h = hashlib.sha256()
+    with open(completo, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 16), b""):
+            h.update(bloque)
+    _HUELLAS_ASSETS[ruta] = (st.st_mtime_ns, st.st_size, h.hexdigest()[:12])
+    return _HUELLAS_ASSETS[ruta][2]
+
+def url_asset(ruta, respaldo=None):
+    """URL con huella de ``assets/<ruta>``; ``respaldo`` (o la URL sin huella) si el archivo no existe."""
+    huella = huella_asset(ruta)
+    if huella is None:
+        return respaldo if respaldo is not None else f"/assets/{ruta}"
+    base, ext = os.path.splitext(ruta)
+    return f"/assets/{base}.{huella}{ext}"
+
 # ------------------------------------------------------
 # CONFIGURACIÓN BASE
 # ------------------------------------------------------
 app = dash.Dash(
     __name__,
-    external_stylesheets=[dbc.themes.COSMO],  # Tema Bootstrap mejorado
-    suppress_callback_exceptions=True
+    external_stylesheets=[dbc.themes.COSMO]  # Tema Bootstrap mejorado
+    + ([url_asset("app.css")] if huella_asset("app.css") else []),
+    # Callbacks del lado del navegador (medida/vista en Insumos, enlaces de exportación en Procesos)
+    external_scripts=[url_asset(js) for js in ("insumos.js", "procesos.js") if huella_asset(js)],
+    suppress_callback_exceptions=True,
+    background_callback_manager=gestor_trabajos,
+    # /assets lo atiende serve_static_assets (huella, caché, ETag): el blueprint de Dash va aparte
+    assets_folder=ASSETS_DIR,
+    assets_url_path="_dash-assets",
+    include_assets_files=False,
 )
 app.title = "Dashboard de Contrataciones Públicas de Mendoza (OCDS)"
 server = app.server
@@ -63,16 +655,40 @@ try:
 except Exception:
     pass
 
-# Configuración manual para servir archivos estáticos desde la carpeta 'assets'
-# Agregar mensajes de depuración en la función para servir archivos estáticos
+# Archivos de 'assets': con huella en la URL se cachean como inmutables; sin huella (o con
+# una vieja, tras un deploy) se revalidan con ETag. Si el navegador acepta br/gzip y existe
+# la variante precomprimida (no más vieja que el original), se envía esa.
 @app.server.route('/assets/<path:path>')
 def serve_static_assets(path):
-    logging.debug(f"Intentando servir archivo estático: {path}")
-    try:
-        return flask.send_from_directory('assets', path)
-    except Exception as e:
-        logging.error(f"Error al servir archivo estático: {e}")
-        raise
+    coincidencia = _RE_HUELLA.match(path)
+    ruta, pedida = path, None
+    if coincidencia and huella_asset(coincidencia["base"] + coincidencia["ext"]) is not None:
+        ruta, pedida = coincidencia["base"] + coincidencia["ext"], coincidencia["huella"]
+    huella = huella_asset(ruta)
+    completo = safe_join(ASSETS_DIR, ruta)
+    if huella is None or not os.path.isfile(completo):
+        flask.abort(404)
+    archivo, codificacion = completo, None
+    aceptadas = flask.request.accept_encodings
+    for cod, sufijo in (("br", ".br"), ("gzip", ".gz")):
+        variante = completo + sufijo
+        if aceptadas[cod] > 0 and os.path.isfile(variante) \
+                and os.stat(variante).st_mtime_ns >= _HUELLAS_ASSETS[ruta][0]:
+            archivo, codificacion = variante, cod
+            break
+    etag = huella + (f"-{codificacion}" if codificacion else "")
+    if flask.request.if_none_match.contains(etag):
+        resp = flask.Response(status=304)
+    else:
+        resp = flask.send_file(archivo, mimetype=mimetypes.guess_type(ruta)[0] or "application/octet-stream",
+                               conditional=False, etag=False)
+        resp.headers.pop("Content-Disposition", None)
+        if codificacion:
+            resp.headers["Content-Encoding"] = codificacion
+    resp.set_etag(etag)
+    resp.vary.add("Accept-Encoding")
+    resp.headers["Cache-Control"] = _CACHE_INMUTABLE if pedida == huella else "no-cache"
+    return resp
 
 # Ruta de prueba para servir un archivo específico
 # Actualizar la función para usar la ruta absoluta de la carpeta 'assets'
@@ -80,7 +696,7 @@ def serve_static_assets(path):
 def serve_test_file():
     try:
         ruta_absoluta = os.path.abspath('assets')
-        logging.debug(f"Ruta absoluta de la carpeta 'assets': {ruta_absoluta}")
+        logging.debug("Ruta absoluta de la carpeta 'assets': %s", ruta_absoluta)
         return flask.send_from_directory(ruta_absoluta, 'texto.txt')
     except Exception as e:
         logging.error(f"Error al servir archivo de prueba: {e}")
@@ -91,7 +707,7 @@ def serve_test_file():
 def serve_test_image():
     try:
         ruta_absoluta = os.path.abspath('assets')
-        logging.debug(f"Intentando servir 'marca_gov.png' desde: {ruta_absoluta}")
+        logging.debug("Intentando servir 'marca_gov.png' desde: %s", ruta_absoluta)
         return flask.send_from_directory(ruta_absoluta, 'marca_gov.png')
     except Exception as e:
         logging.error(f"Error al servir 'marca_gov.png': {e}")
@@ -106,13 +722,819 @@ def health():
     - status: "ok" si el servicio responde.
     - rows: cantidad de filas cargadas en el DataFrame principal (0 durante build de docs o si no hay datos).
     - sphinx_build: flag indicando si se está ejecutando en modo build de documentación.
+    - coalescencia: por callback, cálculos ejecutados y llamadas que compartieron uno en curso.
+    - cache: entradas y aciertos/fallos del caché de resultados por generación.
     """
     try:
-        return flask.jsonify(status="ok", rows=int(len(df)), sphinx_build=SPHINX_BUILD), 200
+        return flask.jsonify(
+            status="ok", rows=filas_cargadas(), sphinx_build=SPHINX_BUILD,
+            coalescencia=ESTADISTICAS_COALESCENCIA, cache=cache_resultados.estadisticas(),
+        ), 200
     except Exception as e:
         logging.exception("Fallo en /health")
         return flask.jsonify(status="error", error=str(e)), 500
 
+# Readiness (distinto de liveness /health): 200 solo cuando hay un dataset publicado
+@app.server.route('/ready')
+def ready():
+    """Indica si la app ya puede atender con datos (útil como readiness probe).
+
+    Retorna 200 con ``ready=true`` cuando hay un dataset cargado; 503 con ``ready=false``
+    y ``estado`` (``"cargando"``, ``"parcial"``, ``"error"`` o ``"sin_cargar"``) mientras
+    tanto. A diferencia de ``/health``, que solo confirma que el proceso responde.
+    ``tiempos`` informa la primera vista (primera publicación, parcial o no) y la carga
+    completa, en segundos desde el inicio de la carga.
+    """
+    if _DATA_LOADED:
+        return flask.jsonify(ready=True, rows=filas_cargadas(), generacion=_GENERACION_DATOS,
+                             tiempos=TIEMPOS_CARGA), 200
+    if carga_en_curso():
+        estado = "parcial" if _DATOS_PARCIALES else "cargando"
+    elif _DATA_ERROR:
+        estado = "error"
+    else:
+        estado = "sin_cargar"
+    return flask.jsonify(ready=False, estado=estado, error=_DATA_ERROR, rows=filas_cargadas(),
+                         tiempos=TIEMPOS_CARGA), 503
+
+# Progreso de la carga en curso (o de la última): JSON puntual y flujo SSE
+@app.server.route('/progreso-carga')
+def progreso_carga_route():
+    """Devuelve fase, bytes descargados/parseados, releases, filas y segundos por fase."""
+    return flask.jsonify(progreso_carga.instantanea()), 200
+
+# Cada cliente SSE ocupa un hilo de gunicorn mientras dura la carga: se limitan y se cortan
+try:
+    _CUPOS_SSE = threading.BoundedSemaphore(max(1, int(os.getenv("OCDS_PROGRESS_STREAMS", "2"))))
+except Exception:
+    _CUPOS_SSE = threading.BoundedSemaphore(2)
+_DURACION_MAX_SSE = 15 * 60  # segundos
+
+@app.server.route('/progreso-carga/stream')
+def progreso_carga_stream():
+    """Server-sent events con el progreso de carga (evento ``progreso`` por segundo o por cambio de fase).
+
+    El flujo termina cuando no hay carga en curso (tras enviar el estado final), a los 15
+    minutos o si el cliente se desconecta. Responde 503 si ya hay ``OCDS_PROGRESS_STREAMS``
+    flujos abiertos; en ese caso conviene sondear ``/progreso-carga``.
+    """
+    if not _CUPOS_SSE.acquire(blocking=False):
+        return flask.jsonify(status="error", error="Demasiados flujos de progreso abiertos; usar /progreso-carga"), \
+            503, {"Retry-After": "10"}
+
+    def eventos():
+        limite = time.monotonic() + _DURACION_MAX_SSE
+        yield "retry: 10000\n\n"
+        while True:
+            estado = progreso_carga.instantanea()
+            yield f"id: {estado['version']}\nevent: progreso\ndata: {json.dumps(estado)}\n\n"
+            if estado["estado"] != "en_curso" or time.monotonic() > limite:
+                return
+            progreso_carga.esperar(estado["version"], timeout=1.0)
+
+    resp = flask.Response(
+        eventos(), mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # El servidor cierra la respuesta al terminar o al desconectarse el cliente
+    resp.call_on_close(_CUPOS_SSE.release)
+    return resp
+
+# ------------------------------------------------------
+# COMPRESIÓN Y RESPUESTAS LIVIANAS
+# ------------------------------------------------------
+# Las respuestas JSON/HTML/texto (callbacks, layout, dependencias, métricas) que superan
+# OCDS_COMPRESS_MIN_BYTES se comprimen con brotli (si el paquete está instalado y el
+# navegador lo acepta) o con gzip. Los JS/CSS de Dash y de assets/ no pasan por acá.
+# Además los gráficos usan una plantilla recortada y los números se redondean antes de
+# serializarse (ver aligerar_figura y aligerar_registros).
+COMPRESION = os.getenv("OCDS_COMPRESS", "1") not in ("0", "false", "False")
+try:
+    COMPRESION_MIN_BYTES = max(0, int(os.getenv("OCDS_COMPRESS_MIN_BYTES", "1024")))
+    COMPRESION_NIVEL_GZIP = min(9, max(1, int(os.getenv("OCDS_GZIP_LEVEL", "6"))))
+    COMPRESION_CALIDAD_BR = min(11, max(0, int(os.getenv("OCDS_BROTLI_QUALITY", "5"))))
+except Exception:
+    COMPRESION_MIN_BYTES, COMPRESION_NIVEL_GZIP, COMPRESION_CALIDAD_BR = 1024, 6, 5
+try:
+    DECIMALES_RESPUESTA = int(os.getenv("OCDS_RESPONSE_DECIMALS", "3"))
+except Exception:
+    DECIMALES_RESPUESTA = 3
+_TIPOS_COMPRIMIBLES = {"application/json", "text/html", "text/plain", "text/csv"}
+
+try:
+    import brotli  # type: ignore  # import opcional
+except ImportError:
+    brotli = None
+
+def comprimir_cuerpo(cuerpo, aceptadas=("br", "gzip")):
+    """Comprime ``cuerpo`` con la mejor codificación disponible entre ``aceptadas``.
+
+    Retorna
+    -------
+    tuple[bytes, str | None]
+        Cuerpo (comprimido o no) y codificación usada (``None`` si no se comprimió por
+        tamaño o porque ninguna codificación es aceptada).
+    """
+    if len(cuerpo) < COMPRESION_MIN_BYTES:
+        return cuerpo, None
+    if brotli is not None and "br" in aceptadas:
+        return brotli.compress(cuerpo, quality=COMPRESION_CALIDAD_BR), "br"
+    if "gzip" in aceptadas:
+        return gzip.compress(cuerpo, compresslevel=COMPRESION_NIVEL_GZIP, mtime=0), "gzip"
+    return cuerpo, None
+
+@app.server.after_request
+def _comprimir_respuesta(resp):
+    # Se registra antes que las métricas: Flask ejecuta estos hooks en orden inverso, así que
+    # las métricas (y la lectura del cacheKey de los trabajos) ven el cuerpo sin comprimir
+    if (not COMPRESION or resp.status_code < 200 or resp.status_code in (204, 206, 304)
+            or resp.direct_passthrough or resp.is_streamed or "Content-Encoding" in resp.headers
+            or resp.mimetype not in _TIPOS_COMPRIMIBLES):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    aceptadas = flask.request.accept_encodings
+    cuerpo, codificacion = comprimir_cuerpo(resp.get_data(), [c for c in ("br", "gzip") if aceptadas[c] > 0])
+    if codificacion is None:
+        return resp
+    resp.set_data(cuerpo)
+    resp.headers["Content-Encoding"] = codificacion
+    # Otra representación del mismo recurso: el ETag fuerte pasa a débil
+    etag, debil = resp.get_etag()
+    if etag and not debil:
+        resp.set_etag(etag, weak=True)
+    return resp
+
+def _plantilla_liviana():
+    """Plantilla "plotly" sin los estilos de trazas y ejes que el tablero no usa (~1 KB en vez de ~7 KB)."""
+    base = pio.templates["plotly"]
+    layout = base.layout.to_plotly_json()
+    for clave in ("polar", "ternary", "scene", "geo", "mapbox", "map", "coloraxis", "colorscale"):
+        layout.pop(clave, None)
+    return go.layout.Template(
+        layout=layout,
+        data={tipo: getattr(base.data, tipo) for tipo in ("bar", "pie", "scatter")},
+    )
+
+if os.getenv("OCDS_SLIM_FIGURES", "1") not in ("0", "false", "False"):
+    pio.templates["ocds"] = _plantilla_liviana()
+    pio.templates.default = "ocds"
+
+def aligerar_figura(fig, decimales=None):
+    """Redondea los arreglos numéricos de las trazas antes de enviarlas al navegador.
+
+    Los valores se muestran con ``%{x:.0f}``: con ``DECIMALES_RESPUESTA`` decimales no cambia
+    lo que se ve. Si el rango lo permite se pasan a float32, que viaja en la mitad de bytes.
+    """
+    decimales = DECIMALES_RESPUESTA if decimales is None else decimales
+    if decimales < 0:
+        return fig
+    for traza in fig.data:
+        for atributo in ("x", "y", "values", "customdata"):
+            if atributo not in traza or traza[atributo] is None:
+                continue
+            try:
+                valores = np.asarray(traza[atributo])
+            except Exception:
+                continue
+            if valores.dtype.kind != "f" or not valores.size:
+                continue
+            valores = np.round(valores, decimales)
+            if np.nanmax(np.abs(valores)) < 10 ** (6 - decimales):
+                valores = valores.astype(np.float32)
+            traza[atributo] = valores
+    return fig
+
+def aligerar_registros(df, decimales=None):
+    """Redondea las columnas numéricas de ``df`` antes de ``to_dict("records")``."""
+    decimales = DECIMALES_RESPUESTA if decimales is None else decimales
+    return df.round(decimales) if decimales >= 0 else df
+
+# ------------------------------------------------------
+# MÉTRICAS (formato de texto de Prometheus en /metrics)
+# ------------------------------------------------------
+# Contadores e histogramas en memoria del proceso, sin dependencias. Con varios workers de
+# gunicorn cada uno lleva los suyos: para p95/p99 confiables conviene un solo worker
+# (como en render.yaml) o raspar cada worker por separado.
+_CUBETAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_CUBETAS_BYTES = (1024, 10240, 102400, 524288, 1048576, 5242880, 20971520)
+
+class RegistroMetricas:
+    """Contadores e histogramas con etiquetas, exportables en formato de texto de Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._definiciones = {}  # nombre -> (tipo, ayuda, cubetas)
+        self._series = {}  # nombre -> {etiquetas: valor (contador) | [conteos por cubeta..., suma]}
+
+    def definir(self, nombre, tipo, ayuda, cubetas=None):
+        self._definiciones[nombre] = (tipo, ayuda, cubetas)
+        self._series[nombre] = {}
+
+    def incrementar(self, nombre, valor=1, **etiquetas):
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            series = self._series[nombre]
+            series[clave] = series.get(clave, 0) + valor
+
+    def observar(self, nombre, valor, **etiquetas):
+        cubetas = self._definiciones[nombre][2]
+        clave = tuple(sorted(etiquetas.items()))
+        with self._lock:
+            serie = self._series[nombre].get(clave)
+            if serie is None:
+                serie = self._series[nombre][clave] = [0] * (len(cubetas) + 1) + [0.0]
+            serie[bisect.bisect_left(cubetas, valor)] += 1  # "le" es inclusivo
+            serie[-1] += valor
+
+    def exponer(self, adicionales=()):
+        """Texto para ``/metrics``; ``adicionales`` son ``(nombre, tipo, ayuda, [(etiquetas, valor)])``."""
+        lineas = []
+        with self._lock:
+            copia = {n: {k: list(v) if isinstance(v, list) else v for k, v in s.items()}
+                     for n, s in self._series.items()}
+        for nombre, (tipo, ayuda, cubetas) in self._definiciones.items():
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+            for clave, valor in sorted(copia[nombre].items()):
+                etiquetas = dict(clave)
+                if tipo != "histogram":
+                    lineas.append(f"{nombre}{_etiquetas_prom(etiquetas)} {_numero_prom(valor)}")
+                    continue
+                acumulado = 0
+                for limite, conteo in zip(list(cubetas) + ["+Inf"], valor[:-1]):
+                    acumulado += conteo
+                    lineas.append(f"{nombre}_bucket{_etiquetas_prom(dict(etiquetas, le=str(limite)))} {acumulado}")
+                lineas.append(f"{nombre}_sum{_etiquetas_prom(etiquetas)} {_numero_prom(valor[-1])}")
+                lineas.append(f"{nombre}_count{_etiquetas_prom(etiquetas)} {acumulado}")
+        for nombre, tipo, ayuda, muestras in adicionales:
+            lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+            lineas += [f"{nombre}{_etiquetas_prom(e)} {_numero_prom(v)}" for e, v in muestras if v is not None]
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas_prom(etiquetas):
+    if not etiquetas:
+        return ""
+    escapar = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in etiquetas.items()) + "}"
+
+def _numero_prom(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(int(valor))
+
+metricas = RegistroMetricas()
+metricas.definir("ocds_http_request_duration_seconds", "histogram", "Duración de los requests por ruta.", _CUBETAS_SEGUNDOS)
+metricas.definir("ocds_http_response_bytes", "histogram", "Tamaño del cuerpo de las respuestas por ruta.", _CUBETAS_BYTES)
+metricas.definir("ocds_http_requests_total", "counter", "Requests por ruta, método y código de estado.")
+metricas.definir("ocds_callback_duration_seconds", "histogram",
+                 "Latencia de los callbacks de Dash (en segundo plano: desde el pedido hasta el resultado).",
+                 _CUBETAS_SEGUNDOS)
+metricas.definir("ocds_callback_response_bytes", "histogram", "Tamaño de la respuesta de cada callback.", _CUBETAS_BYTES)
+metricas.definir("ocds_callback_errors_total", "counter", "Callbacks que respondieron con error (5xx).")
+metricas.definir("ocds_loads_total", "counter", "Cargas del dataset terminadas, por resultado.")
+
+# Callbacks en segundo plano: cacheKey firmado -> inicio del pedido (el resultado llega en otro request)
+_INICIOS_TRABAJOS = {}
+_NOMBRES_CALLBACKS = {}
+
+def _nombre_callback(salida):
+    """Nombre de la función del callback a partir del id de salida que envía el navegador."""
+    if salida not in _NOMBRES_CALLBACKS:
+        entrada = app.callback_map.get(salida) or {}
+        _NOMBRES_CALLBACKS[salida] = getattr(entrada.get("callback"), "__name__", None) or "desconocido"
+    return _NOMBRES_CALLBACKS[salida]
+
+def _medir_callback(resp, inicio, ahora, tamano):
+    cuerpo = flask.request.get_json(silent=True) or {}
+    salida = cuerpo.get("output")
+    nombre = _nombre_callback(salida)
+    if resp.status_code >= 500:
+        metricas.incrementar("ocds_callback_errors_total", callback=nombre)
+        _INICIOS_TRABAJOS.pop(flask.request.args.get("cacheKey"), None)
+    if (app.callback_map.get(salida) or {}).get("background") and resp.status_code < 400:
+        clave = flask.request.args.get("cacheKey")
+        if clave is None:
+            # Alta del trabajo: la respuesta trae el cacheKey con el que se sondeará el resultado
+            try:
+                clave = json.loads(resp.get_data()).get("cacheKey")
+            except Exception:
+                clave = None
+            if clave:
+                if len(_INICIOS_TRABAJOS) > 1000:
+                    for vieja in [k for k, t in list(_INICIOS_TRABAJOS.items()) if ahora - t > 900]:
+                        _INICIOS_TRABAJOS.pop(vieja, None)
+                _INICIOS_TRABAJOS[clave] = inicio
+                return
+            # Sin cacheKey: responder_desde_cache contestó con el resultado, no hubo trabajo
+        elif resp.status_code == 200 and b'"response"' not in resp.get_data():
+            return  # sondeo sin resultado todavía
+        else:
+            inicio = _INICIOS_TRABAJOS.pop(clave, None)
+            if inicio is None:
+                return
+    metricas.observar("ocds_callback_duration_seconds", ahora - inicio, callback=nombre)
+    if tamano is not None:
+        metricas.observar("ocds_callback_response_bytes", tamano, callback=nombre)
+
+@app.server.before_request
+def _iniciar_medicion():
+    flask.g.inicio_medicion = time.perf_counter()
+
+@app.server.after_request
+def _registrar_medicion(resp):
+    inicio = flask.g.pop("inicio_medicion", None)
+    if inicio is None:
+        return resp
+    try:
+        ahora = time.perf_counter()
+        # Ruta como patrón (p. ej. /assets/<path:path>) para acotar la cardinalidad
+        ruta = flask.request.url_rule.rule if flask.request.url_rule is not None else "sin_ruta"
+        tamano = None if resp.is_streamed else resp.calculate_content_length()
+        metricas.observar("ocds_http_request_duration_seconds", ahora - inicio, route=ruta, method=flask.request.method)
+        metricas.incrementar("ocds_http_requests_total", route=ruta, method=flask.request.method, code=resp.status_code)
+        if tamano is not None:
+            metricas.observar("ocds_http_response_bytes", tamano, route=ruta)
+        if ruta.endswith("_dash-update-component"):
+            _medir_callback(resp, inicio, ahora, tamano)
+        _registrar_acceso(ruta, ahora - inicio, resp.status_code, tamano)
+    except Exception:
+        logging.debug("No se pudo registrar la métrica del request", exc_info=True)
+    return resp
+
+def _registrar_acceso(ruta, duracion_s, codigo, tamano):
+    """Línea del access log si el request cae en la muestra, es lento o falló."""
+    duracion_ms = duracion_s * 1000
+    if not (codigo >= 500 or duracion_ms >= ACCESO_LENTO_MS or (MUESTRA_ACCESO and random.random() < MUESTRA_ACCESO)):
+        return
+    if not log_acceso.isEnabledFor(logging.INFO):
+        return
+    callback = None
+    if ruta.endswith("_dash-update-component"):
+        callback = _nombre_callback((flask.request.get_json(silent=True) or {}).get("output"))
+    log_acceso.info(
+        "%s %s %s %.1fms%s", flask.request.method, flask.request.path, codigo, duracion_ms,
+        f" callback={callback}" if callback else "",
+        extra={"metodo": flask.request.method, "ruta": flask.request.path, "codigo": codigo,
+               "duracion_ms": round(duracion_ms, 1), "bytes": tamano, "callback": callback,
+               "generacion": _GENERACION_DATOS},
+    )
+
+_CONTEO_ITEMS = [None, 0]  # (generación, filas de items): en SQLite el COUNT se cachea por generación
+
+def _filas_items():
+    if not usar_sqlite():
+        return int(len(df_items))
+    if not _sqlite_disponible():
+        return 0
+    if _CONTEO_ITEMS[0] != _GENERACION_DATOS:
+        _CONTEO_ITEMS[:] = [_GENERACION_DATOS, int(_conexion_sqlite().execute("SELECT COUNT(*) FROM items").fetchone()[0])]
+    return _CONTEO_ITEMS[1]
+
+def _metricas_instantaneas():
+    """Valores que se leen al momento de raspar: carga, dataset, cachés y proceso."""
+    progreso = progreso_carga.instantanea()
+    cache = cache_resultados.estadisticas()
+    muestras = [
+        ("ocds_load_phase_seconds", "gauge", "Duración de cada fase de la última carga (o de la actual).",
+         [({"phase": f}, s) for f, s in progreso["fases"].items()]),
+        ("ocds_load_in_progress", "gauge", "1 si hay una carga en curso.",
+         [({}, 1 if progreso["estado"] == "en_curso" else 0)]),
+        ("ocds_load_time_seconds", "gauge", "Segundos de la última carga hasta la primera vista y hasta completarse.",
+         [({"stage": k.replace("_s", "")}, v) for k, v in TIEMPOS_CARGA.items()]),
+        ("ocds_dataset_rows", "gauge", "Filas del dataset publicado por tabla.",
+         [({"table": "contratos"}, filas_cargadas()), ({"table": "items"}, _filas_items())]),
+        ("ocds_dataset_generation", "gauge", "Generación del dataset publicado.", [({}, _GENERACION_DATOS)]),
+        ("ocds_dataset_partial", "gauge", "1 si el dataset publicado es una vista parcial.", [({}, int(_DATOS_PARCIALES))]),
+        ("ocds_result_cache_hits_total", "counter", "Aciertos del caché de resultados.", [({}, cache["aciertos"])]),
+        ("ocds_result_cache_misses_total", "counter", "Fallos del caché de resultados.", [({}, cache["fallos"])]),
+        ("ocds_result_cache_hit_ratio", "gauge", "Aciertos / consultas del caché de resultados.",
+         [({}, cache["tasa_aciertos"])]),
+        ("ocds_result_cache_entries", "gauge", "Entradas en el caché de resultados.", [({}, cache["entradas"])]),
+        ("ocds_coalesced_calls_total", "counter", "Llamadas a callbacks calculadas o coalescidas (single-flight).",
+         [({"callback": n, "kind": k}, v) for n, c in ESTADISTICAS_COALESCENCIA.items() for k, v in c.items()]),
+    ]
+    try:
+        import psutil  # type: ignore  # dependencia de dash[diskcache]
+        proceso = psutil.Process()
+        cpu = proceso.cpu_times()
+        muestras += [
+            ("process_resident_memory_bytes", "gauge", "Memoria residente del proceso.", [({}, proceso.memory_info().rss)]),
+            ("process_cpu_seconds_total", "counter", "Tiempo de CPU del proceso.", [({}, float(cpu.user + cpu.system))]),
+        ]
+    except Exception:
+        pass
+    return muestras
+
+@app.server.route('/metrics')
+def metrics():
+    """Métricas en formato de texto de Prometheus (latencias, tamaños, errores, carga, memoria y cachés)."""
+    return flask.Response(metricas.exponer(_metricas_instantaneas()),
+                          content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ------------------------------------------------------
+# PERFILADO DE REQUESTS (opcional, para diagnosticar callbacks lentos)
+# ------------------------------------------------------
+# Con OCDS_PROFILE_DIR definido se guardan los requests muestreados (fracción OCDS_PROFILE_SAMPLE,
+# sin importar cuánto tarden) y los que superan OCDS_PROFILE_SLOW_MS. Con umbral se perfila todo
+# request que encuentre el perfilador libre y se descartan los rápidos no muestreados. Hay un
+# solo perfil por proceso a la vez: los requests concurrentes con otro perfilado no se perfilan.
+PERFIL_DIR = (os.getenv("OCDS_PROFILE_DIR") or "").strip()
+try:
+    PERFIL_MUESTRA = min(1.0, max(0.0, float(os.getenv("OCDS_PROFILE_SAMPLE", "0"))))
+    PERFIL_LENTO_MS = max(0.0, float(os.getenv("OCDS_PROFILE_SLOW_MS", "0")))
+    PERFIL_CONSERVAR = max(1, int(os.getenv("OCDS_PROFILE_KEEP", "200")))  # perfiles en disco (los más lentos)
+except ValueError:
+    PERFIL_MUESTRA, PERFIL_LENTO_MS, PERFIL_CONSERVAR = 0.0, 0.0, 200
+PERFILADOR = os.getenv("OCDS_PROFILER", "auto").strip().lower()  # auto | cprofile | pyinstrument
+ADMIN_TOKEN = (os.getenv("OCDS_ADMIN_TOKEN") or "").strip() or None
+_PERFILADO_ACTIVO = bool(PERFIL_DIR) and (PERFIL_MUESTRA > 0 or PERFIL_LENTO_MS > 0)
+_PERFIL_LIBRE = threading.Lock()  # un request perfilado por proceso: acota el costo y evita perfiles cruzados
+_PERFIL_INDICE_LOCK = threading.Lock()
+# Rutas que no se perfilan: flujos largos, la propia administración y las métricas
+_PERFIL_EXCLUIDAS = ("/progreso-carga/stream", "/metrics", "/admin/")
+
+class _Perfil:
+    """Perfilador del hilo actual: pyinstrument (muestreo) si está instalado, si no cProfile."""
+
+    def __init__(self, exclusivo, muestreado):
+        self.exclusivo = exclusivo
+        self.muestreado = muestreado  # se guarda aunque sea rápido
+        self.tipo = "cprofile"
+        self._p = None
+        if PERFILADOR in ("auto", "pyinstrument"):
+            try:
+                import pyinstrument  # type: ignore  # import opcional
+                self._p = pyinstrument.Profiler(async_mode="disabled")
+                self.tipo = "pyinstrument"
+            except Exception:
+                self._p = None
+        if self._p is None:
+            import cProfile
+            self._p = cProfile.Profile()
+        (self._p.start if self.tipo == "pyinstrument" else self._p.enable)()
+
+    def detener(self):
+        (self._p.stop if self.tipo == "pyinstrument" else self._p.disable)()
+        if self.exclusivo:
+            _PERFIL_LIBRE.release()
+
+    def guardar(self, base):
+        """Escribe el perfil junto a ``base`` y devuelve (archivo, funciones más costosas)."""
+        if self.tipo == "pyinstrument":
+            archivo = base + ".html"
+            with open(archivo, "w", encoding="utf-8") as f:
+                f.write(self._p.output_html())
+            return archivo, []
+        import pstats
+        archivo = base + ".prof"
+        self._p.dump_stats(archivo)
+        estadisticas = pstats.Stats(self._p).stats
+        costosas = sorted(estadisticas.items(), key=lambda kv: kv[1][2], reverse=True)[:8]
+        return archivo, [
+            {"funcion": f"{os.path.basename(arch)}:{linea}({func})", "llamadas": nc,
+             "propio_ms": round(tt * 1000, 2), "acumulado_ms": round(ct * 1000, 2)}
+            for (arch, linea, func), (_cc, nc, tt, ct, _callers) in costosas
+        ]
+
+def iniciar_perfil(exclusivo=True):
+    """Empieza a perfilar el hilo actual si toca por muestreo o hay umbral; devuelve el perfil o ``None``.
+
+    Parámetros
+    ----------
+    exclusivo : bool
+        Si es ``True`` solo se perfila cuando no hay otro request perfilándose en el proceso.
+    """
+    if not _PERFILADO_ACTIVO:
+        return None
+    muestreado = PERFIL_MUESTRA > 0 and random.random() < PERFIL_MUESTRA
+    if not muestreado and PERFIL_LENTO_MS <= 0:
+        return None
+    if exclusivo and not _PERFIL_LIBRE.acquire(blocking=False):
+        return None
+    try:
+        return _Perfil(exclusivo, muestreado)
+    except Exception as e:
+        if exclusivo:
+            _PERFIL_LIBRE.release()
+        logging.debug("No se pudo iniciar el perfilador: %s", e)
+        return None
+
+def terminar_perfil(perfil, duracion_s, callback, entradas=None, ruta=None):
+    """Detiene ``perfil`` y, si el request fue muestreado o lento, guarda el archivo y su entrada en el índice."""
+    if perfil is None:
+        return
+    perfil.detener()
+    if not perfil.muestreado and duracion_s * 1000 < PERFIL_LENTO_MS:
+        return
+    try:
+        os.makedirs(PERFIL_DIR, exist_ok=True)
+        ahora = time.time()
+        nombre = re.sub(r"[^\w.-]+", "_", f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(ahora))}-{callback}-{os.getpid()}-{random.randrange(16**6):06x}")
+        archivo, costosas = perfil.guardar(os.path.join(PERFIL_DIR, nombre))
+        try:
+            entradas_txt = json.dumps(entradas, ensure_ascii=False, default=str)
+        except Exception:
+            entradas_txt = str(entradas)
+        entrada = {
+            "archivo": os.path.basename(archivo), "callback": callback, "ruta": ruta,
+            "entradas": entradas_txt[:500], "duracion_ms": round(duracion_s * 1000, 1),
+            "fecha": _iso_epoch(ahora), "pid": os.getpid(), "generacion": _GENERACION_DATOS,
+            "perfilador": perfil.tipo, "funciones": costosas,
+        }
+        with _PERFIL_INDICE_LOCK:
+            with open(os.path.join(PERFIL_DIR, "indice.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            _podar_perfiles()
+    except Exception as e:
+        logging.warning("No se pudo guardar el perfil de %s: %s", callback, e)
+
+def leer_indice_perfiles():
+    """Entradas del índice de perfiles cuyo archivo todavía existe."""
+    ruta = os.path.join(PERFIL_DIR, "indice.jsonl")
+    if not PERFIL_DIR or not os.path.exists(ruta):
+        return []
+    entradas = []
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            try:
+                entradas.append(json.loads(linea))
+            except ValueError:
+                continue  # línea a medio escribir por otro proceso
+    return [e for e in entradas if os.path.exists(os.path.join(PERFIL_DIR, e.get("archivo", "")))]
+
+def _podar_perfiles():
+    """Con el doble de ``PERFIL_CONSERVAR`` perfiles, deja solo los más lentos (índice y archivos)."""
+    ruta = os.path.join(PERFIL_DIR, "indice.jsonl")
+    with open(ruta, encoding="utf-8") as f:
+        if sum(1 for _ in f) <= 2 * PERFIL_CONSERVAR:
+            return
+    entradas = sorted(leer_indice_perfiles(), key=lambda e: e.get("duracion_ms", 0), reverse=True)
+    for vieja in entradas[PERFIL_CONSERVAR:]:
+        try:
+            os.remove(os.path.join(PERFIL_DIR, vieja["archivo"]))
+        except OSError:
+            pass
+    temporal = ruta + f".{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in entradas[:PERFIL_CONSERVAR])
+    os.replace(temporal, ruta)
+
+def _entradas_callback(cuerpo):
+    """Entradas de un request de Dash como ``{"id.propiedad": valor}``."""
+    entradas = {}
+    for grupo in ("inputs", "state"):
+        for e in cuerpo.get(grupo) or []:
+            for item in (e if isinstance(e, list) else [e]):
+                if isinstance(item, dict):
+                    entradas[f"{item.get('id')}.{item.get('property')}"] = item.get("value")
+    return entradas
+
+@app.server.before_request
+def _iniciar_perfil_request():
+    if not _PERFILADO_ACTIVO or flask.request.path.startswith(_PERFIL_EXCLUIDAS):
+        return
+    callback, entradas = None, dict(flask.request.args)
+    if flask.request.path.endswith("_dash-update-component"):
+        cuerpo = flask.request.get_json(silent=True) or {}
+        salida = cuerpo.get("output")
+        if (app.callback_map.get(salida) or {}).get("background"):
+            return  # se perfila el trabajo en el proceso hijo, no el alta ni los sondeos
+        callback, entradas = _nombre_callback(salida), _entradas_callback(cuerpo)
+    perfil = iniciar_perfil()
+    if perfil is not None:
+        flask.g.perfil = (perfil, time.perf_counter(), callback, entradas)
+
+@app.server.teardown_request
+def _terminar_perfil_request(_exc=None):
+    datos = flask.g.pop("perfil", None)
+    if datos is not None:
+        perfil, inicio, callback, entradas = datos
+        ruta = flask.request.url_rule.rule if flask.request.url_rule is not None else flask.request.path
+        terminar_perfil(perfil, time.perf_counter() - inicio, callback or f"{flask.request.method} {ruta}", entradas, ruta)
+
+def _exigir_admin():
+    """Corta el request a ``/admin/...`` salvo que traiga el ``OCDS_ADMIN_TOKEN`` correcto.
+
+    Sin token configurado los endpoints no existen (404): exponen entradas de callbacks,
+    rutas y memoria del proceso. El token solo se acepta en la cabecera ``X-Admin-Token``;
+    en la query string quedaría en los logs de acceso y del proxy.
+    """
+    if not ADMIN_TOKEN:
+        flask.abort(404)
+    enviado = flask.request.headers.get("X-Admin-Token") or ""
+    if not hmac.compare_digest(enviado.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        flask.abort(flask.make_response(flask.jsonify(error="token inválido"), 403))
+
+@app.server.route('/admin/perfiles')
+def admin_perfiles():
+    """Perfiles guardados, del más lento al más rápido (``?n=`` y ``?callback=`` para filtrar)."""
+    _exigir_admin()
+    try:
+        n = max(1, min(500, int(flask.request.args.get("n", "20"))))
+    except ValueError:
+        n = 20
+    entradas = leer_indice_perfiles()
+    callback = flask.request.args.get("callback")
+    if callback:
+        entradas = [e for e in entradas if e.get("callback") == callback]
+    entradas.sort(key=lambda e: e.get("duracion_ms", 0), reverse=True)
+    return flask.jsonify(
+        activo=_PERFILADO_ACTIVO, directorio=PERFIL_DIR or None, muestra=PERFIL_MUESTRA,
+        umbral_ms=PERFIL_LENTO_MS, total=len(entradas), perfiles=entradas[:n],
+    )
+
+@app.server.route('/admin/perfiles/<path:archivo>')
+def admin_perfil_archivo(archivo):
+    """Descarga un perfil (``.prof`` para snakeviz/pstats o ``.html`` de pyinstrument)."""
+    _exigir_admin()
+    if not PERFIL_DIR:
+        flask.abort(404)
+    return flask.send_from_directory(os.path.abspath(PERFIL_DIR), archivo, as_attachment=True)
+
+# ------------------------------------------------------
+# MEMORIA (introspección y comparación antes/después de cada recarga)
+# ------------------------------------------------------
+# OCDS_TRACEMALLOC=N activa tracemalloc con N cuadros de pila desde el arranque (cuesta
+# memoria y CPU: solo para diagnosticar). Sin él, el resto del informe sigue disponible.
+try:
+    TRACEMALLOC_CUADROS = max(0, int(os.getenv("OCDS_TRACEMALLOC", "0")))
+except ValueError:
+    TRACEMALLOC_CUADROS = 0
+if TRACEMALLOC_CUADROS and not tracemalloc.is_tracing():
+    tracemalloc.start(TRACEMALLOC_CUADROS)
+
+# Comparaciones de las últimas recargas (ver ensure_data_loaded)
+RECARGAS_MEMORIA = collections.deque(maxlen=5)
+_MEMORIA_TABLAS = {"generacion": None, "tablas": None}
+_MEMORIA_MUESTRA_RELEASES = 200
+
+def _memoria_frame(frame):
+    """Bytes por columna (medición profunda: incluye el texto de las columnas de objetos)."""
+    uso = frame.memory_usage(deep=True, index=True)
+    columnas = {str(c): int(v) for c, v in uso.items() if c != "Index"}
+    return {"filas": int(len(frame)), "bytes": int(uso.sum()), "indice_bytes": int(uso.get("Index", 0)),
+            "columnas": columnas}
+
+def _memoria_indice(indice):
+    if indice is None:
+        return {"bytes": 0}
+    terminos = sys.getsizeof(indice.terminos) + sum(sys.getsizeof(t) for t in indice.terminos)
+    arreglos = int(indice._offsets.nbytes + indice._postings.nbytes)
+    return {"terminos": len(indice.terminos), "bytes": terminos + arreglos,
+            "columnas": {"terminos": terminos, "offsets": int(indice._offsets.nbytes),
+                         "postings": int(indice._postings.nbytes)}}
+
+def _tamano_profundo(objeto):
+    """Bytes de un objeto JSON (dicts, listas y escalares) recorrido completo."""
+    total, pendientes = 0, [objeto]
+    while pendientes:
+        o = pendientes.pop()
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            pendientes.extend(o.keys())
+            pendientes.extend(o.values())
+        elif isinstance(o, (list, tuple)):
+            pendientes.extend(o)
+    return total
+
+def _memoria_json_crudo(crudo):
+    """Estimación del JSON crudo en memoria a partir de una muestra de releases."""
+    releases = crudo.get("releases") or [] if isinstance(crudo, dict) else []
+    if not releases:
+        return {"releases": 0, "bytes": 0, "estimado": False}
+    paso = max(1, len(releases) // _MEMORIA_MUESTRA_RELEASES)
+    muestra = releases[::paso]
+    promedio = sum(_tamano_profundo(r) for r in muestra) / len(muestra)
+    return {"releases": len(releases), "bytes": int(promedio * len(releases) + sys.getsizeof(releases)),
+            "estimado": len(muestra) < len(releases)}
+
+def memoria_tablas(refrescar=False):
+    """Memoria profunda de las estructuras del dataset vigente (cacheada por generación)."""
+    if refrescar or _MEMORIA_TABLAS["generacion"] != _GENERACION_DATOS:
+        df_actual, items_actual, catalogo, indice = df, df_items, catalogo_items, indice_busqueda
+        tablas = {
+            "df": _memoria_frame(df_actual),
+            "df_items": _memoria_frame(items_actual),
+            "catalogo_items": dict(_memoria_frame(catalogo.etiquetas),
+                                   orden_bytes=int(catalogo.orden.nbytes)),
+            "indice_busqueda": _memoria_indice(indice),
+            "data": _memoria_json_crudo(data),
+        }
+        tablas["catalogo_items"]["bytes"] += tablas["catalogo_items"]["orden_bytes"]
+        _MEMORIA_TABLAS.update(generacion=_GENERACION_DATOS, tablas=tablas)
+    return _MEMORIA_TABLAS["tablas"]
+
+def memoria_proceso():
+    """RSS actual y pico del proceso y, si se puede leer, el límite de memoria del contenedor."""
+    info = {"rss_bytes": None, "rss_pico_bytes": None, "limite_bytes": None}
+    try:
+        import psutil  # type: ignore  # dependencia de dash[diskcache]
+        info["rss_bytes"] = int(psutil.Process().memory_info().rss)
+    except Exception:
+        pass
+    try:
+        import resource  # no existe en Windows
+        info["rss_pico_bytes"] = int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss) * 1024  # KiB en Linux
+    except Exception:
+        pass
+    for ruta in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(ruta) as f:
+                valor = f.read().strip()
+            if valor.isdigit() and int(valor) < 1 << 60:
+                info["limite_bytes"] = int(valor)
+            break
+        except OSError:
+            continue
+    return info
+
+def _dataframes_vivos():
+    """Cantidad de DataFrames alcanzables (recorre todos los objetos del GC: solo bajo demanda)."""
+    return sum(1 for o in gc.get_objects() if isinstance(o, pd.DataFrame))
+
+def _top_tracemalloc(instantanea, anterior=None, n=15):
+    if anterior is not None:
+        estadisticas = instantanea.compare_to(anterior, "lineno")
+    else:
+        estadisticas = instantanea.statistics("lineno")
+    return [
+        {"sitio": f"{e.traceback[0].filename if e.traceback else '?'}:{e.traceback[0].lineno if e.traceback else 0}",
+         "bytes": int(e.size), "bloques": int(e.count),
+         **({"diferencia_bytes": int(e.size_diff), "diferencia_bloques": int(e.count_diff)} if anterior is not None else {})}
+        for e in estadisticas[:n]
+    ]
+
+def medir_antes_de_recarga():
+    """Estado de memoria previo a una recarga (con el dataset anterior todavía publicado)."""
+    gc.collect()
+    medicion = {
+        "generacion": _GENERACION_DATOS, "fecha": _iso_epoch(time.time()),
+        "rss_bytes": memoria_proceso()["rss_bytes"],
+        "tablas_bytes": {k: v["bytes"] for k, v in memoria_tablas().items()},
+        "dataframes_vivos": _dataframes_vivos(),
+        # Referencias débiles: tras la recarga el dataset anterior debería liberarse
+        "_anteriores": [weakref.ref(df), weakref.ref(df_items)] if _GENERACION_DATOS else [],
+        "_tracemalloc": tracemalloc.take_snapshot() if TRACEMALLOC_CUADROS and tracemalloc.is_tracing() else None,
+    }
+    return medicion
+
+def registrar_despues_de_recarga(antes, n=15):
+    """Compara con :func:`medir_antes_de_recarga` y guarda el resultado en ``RECARGAS_MEMORIA``."""
+    gc.collect()
+    despues = {
+        "generacion": _GENERACION_DATOS, "fecha": _iso_epoch(time.time()),
+        "rss_bytes": memoria_proceso()["rss_bytes"],
+        "tablas_bytes": {k: v["bytes"] for k, v in memoria_tablas().items()},
+        "dataframes_vivos": _dataframes_vivos(),
+    }
+    anteriores = antes.pop("_anteriores")
+    foto_antes = antes.pop("_tracemalloc")
+    registro = {
+        "antes": antes, "despues": despues,
+        "diferencia_rss_bytes": (despues["rss_bytes"] - antes["rss_bytes"])
+        if None not in (despues["rss_bytes"], antes["rss_bytes"]) else None,
+        # None: no había dataset anterior que liberar
+        "generacion_anterior_liberada": all(r() is None for r in anteriores) if anteriores else None,
+        "tracemalloc_diferencias": _top_tracemalloc(tracemalloc.take_snapshot(), foto_antes, n)
+        if foto_antes is not None else None,
+    }
+    RECARGAS_MEMORIA.append(registro)
+    logging.info(
+        "Memoria tras la recarga: RSS %s -> %s MB, generación anterior liberada: %s",
+        round((antes["rss_bytes"] or 0) / 2**20, 1), round((despues["rss_bytes"] or 0) / 2**20, 1),
+        registro["generacion_anterior_liberada"],
+    )
+    return registro
+
+@app.server.route('/admin/memoria')
+def admin_memoria():
+    """Memoria del proceso y del dataset (``?top=N`` sitios de tracemalloc, ``?refrescar=1``, ``?objetos=1``)."""
+    _exigir_admin()
+    try:
+        n = max(1, min(100, int(flask.request.args.get("top", "15"))))
+    except ValueError:
+        n = 15
+    tablas = memoria_tablas(refrescar=flask.request.args.get("refrescar") == "1")
+    respuesta = {
+        "generacion": _GENERACION_DATOS,
+        "backend": OCDS_BACKEND,
+        "proceso": memoria_proceso(),
+        "tablas": tablas,
+        "tablas_total_bytes": sum(t["bytes"] for t in tablas.values()),
+        "cache_resultados": cache_resultados.estadisticas()["entradas"],
+        "gc": {"conteos": list(gc.get_count()), "umbrales": list(gc.get_threshold()),
+               "generaciones": gc.get_stats(), "basura": len(gc.garbage)},
+        "recargas": list(RECARGAS_MEMORIA),
+    }
+    if usar_sqlite() and os.path.exists(SQLITE_PATH):
+        respuesta["sqlite_bytes"] = os.path.getsize(SQLITE_PATH)
+    if flask.request.args.get("objetos") == "1":
+        respuesta["dataframes_vivos"] = _dataframes_vivos()
+    if TRACEMALLOC_CUADROS and tracemalloc.is_tracing():
+        actual, pico = tracemalloc.get_traced_memory()
+        respuesta["tracemalloc"] = {"actual_bytes": actual, "pico_bytes": pico,
+                                    "top": _top_tracemalloc(tracemalloc.take_snapshot(), n=n)}
+    else:
+        respuesta["tracemalloc"] = None
+    return flask.jsonify(respuesta)
+
 # ------------------------------------------------------
 # FUNCIONES AUXILIARES
 # ------------------------------------------------------
@@ -143,11 +1565,282 @@ def cargar_ocds(ruta):
         resp.raise_for_status()
         return resp.json()
     elif os.path.exists(ruta):
-        with open(ruta, "r", encoding="utf-8") as f:
+        with abrir_archivo_local(ruta) as f:
             return json.load(f)
     else:
         raise ValueError(f"No se reconoce la ruta: {ruta}")
 
+def es_gzip(ruta):
+    """Indica si el archivo local está comprimido con gzip (por su firma, no por la extensión)."""
+    with open(ruta, "rb") as f:
+        return f.read(2) == b"\x1f\x8b"
+
+def abrir_archivo_local(ruta):
+    """Abre un archivo local en modo binario, descomprimiéndolo al vuelo si es gzip."""
+    return gzip.open(ruta, "rb") if es_gzip(ruta) else open(ruta, "rb")
+
+# ------------------------------------------------------
+# DESCARGA REANUDABLE DEL ARCHIVO DE RELEASES
+# ------------------------------------------------------
+# Para URLs http(s) el archivo se descarga primero a disco (por tramos con HTTP Range,
+# opcionalmente en paralelo) y luego se parsea la copia local. Un corte de red retoma
+# desde el último byte escrito en lugar de volver a empezar, y si el servidor informa un
+# validador (ETag/Last-Modified) que no cambió, la copia previa se reutiliza sin descargar.
+_TAMANO_MIN_TRAMO = 8 * 1024 * 1024  # no partir en tramos menores a 8 MB
+_CABECERAS_DESCARGA = {
+    "User-Agent": "OCDS-Mendoza-Dashboard/1.0",
+    # Sin compresión de transporte: los rangos y Content-Length se refieren a los bytes del archivo
+    "Accept-Encoding": "identity",
+}
+
+class _RecursoCambiado(Exception):
+    """El servidor devolvió el archivo completo a un pedido de rango (el recurso cambió)."""
+
+def espera_reintento(intento, base=1.0, maximo=30.0):
+    """Segundos a esperar antes del reintento ``intento`` (1, 2, ...).
+
+    Backoff exponencial con *jitter* completo: un valor uniforme en
+    ``[0, min(maximo, base * 2**(intento - 1))]``, para que varios clientes que fallan
+    a la vez no reintenten sincronizados.
+    """
+    return random.uniform(0, min(maximo, base * 2 ** (intento - 1)))
+
+def _reintentable(error):
+    """Errores de red, 5xx, 408 y 429 se reintentan; el resto de 4xx no."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        codigo = error.response.status_code
+        return codigo >= 500 or codigo in (408, 429)
+    return isinstance(error, (requests.RequestException, OSError))
+
+def _sondear_descarga(url):
+    """Consulta tamaño, soporte de rangos y validador (ETag/Last-Modified) del recurso.
+
+    Retorna
+    -------
+    dict
+        ``tamano`` (int | None), ``rangos`` (bool) y ``validador`` (str | None).
+    """
+    info = {"tamano": None, "rangos": False, "validador": None}
+    try:
+        resp = requests.head(url, headers=_CABECERAS_DESCARGA, timeout=30, allow_redirects=True)
+        if resp.ok:
+            largo = resp.headers.get("Content-Length")
+            info["tamano"] = int(largo) if largo and largo.isdigit() else None
+            info["rangos"] = resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+            info["validador"] = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+    except requests.RequestException:
+        pass
+    if info["tamano"] is None or not info["rangos"]:
+        # Algunos servidores no responden HEAD o no anuncian Accept-Ranges: probar un rango mínimo
+        try:
+            h = dict(_CABECERAS_DESCARGA, Range="bytes=0-0")
+            with requests.get(url, headers=h, stream=True, timeout=30) as resp:
+                rango = resp.headers.get("Content-Range", "")
+                if resp.status_code == 206 and "/" in rango and rango.rsplit("/", 1)[1].isdigit():
+                    info["tamano"] = int(rango.rsplit("/", 1)[1])
+                    info["rangos"] = True
+                    info["validador"] = resp.headers.get("ETag") or resp.headers.get("Last-Modified") or info["validador"]
+        except requests.RequestException:
+            pass
+    return info
+
+def _descargar_tramo(url, ruta_parte, inicio, fin, validador=None, intentos=5):
+    """Descarga los bytes ``[inicio, fin]`` en ``ruta_parte``, retomando desde lo ya escrito.
+
+    Con ``fin=None`` (servidor sin rangos o tamaño desconocido) se descarga el archivo
+    completo y cada reintento empieza de cero.
+    """
+    esperado = None if fin is None else fin - inicio + 1
+    for intento in range(1, intentos + 1):
+        hecho = os.path.getsize(ruta_parte) if os.path.exists(ruta_parte) else 0
+        if esperado is not None and hecho == esperado:
+            progreso_carga.avance_descarga(ruta_parte, hecho)  # tramo completo de un intento previo
+            return
+        if esperado is None or hecho > esperado:
+            hecho = 0
+        cabeceras = dict(_CABECERAS_DESCARGA)
+        if esperado is not None:
+            cabeceras["Range"] = f"bytes={inicio + hecho}-{fin}"
+            if validador:
+                cabeceras["If-Range"] = validador
+        try:
+            with requests.get(url, headers=cabeceras, stream=True, timeout=(15, 60)) as resp:
+                resp.raise_for_status()
+                if esperado is not None and resp.status_code != 206:
+                    # Solo un tramo que cubre todo el archivo puede aprovechar una respuesta completa
+                    if inicio + hecho > 0 or resp.headers.get("Content-Length") != str(esperado):
+                        raise _RecursoCambiado(url)
+                    hecho = 0  # el servidor ignoró el rango desde 0: sirve igual como descarga completa
+                progreso_carga.avance_descarga(ruta_parte, hecho)
+                with open(ruta_parte, "ab" if hecho else "wb") as f:
+                    for bloque in resp.iter_content(chunk_size=64 * 1024):
+                        f.write(bloque)
+                        hecho += len(bloque)
+                        progreso_carga.avance_descarga(ruta_parte, hecho)
+            escrito = os.path.getsize(ruta_parte)
+            if esperado is None or escrito == esperado:
+                return
+            raise IOError(f"Tramo incompleto: {escrito} de {esperado} bytes")
+        except _RecursoCambiado:
+            raise
+        except Exception as e:
+            if intento == intentos or not _reintentable(e):
+                raise
+            espera = espera_reintento(intento)
+            logging.warning("Descarga %s: intento %d/%d falló (%s). Reintentando en %.1fs",
+                            os.path.basename(ruta_parte), intento, intentos, e, espera)
+            time.sleep(espera)
+
+def _bloquear_archivo(ruta):
+    """Lock exclusivo entre procesos (workers de gunicorn) sobre ``ruta``; no-op sin fcntl."""
+    import contextlib
+
+    @contextlib.contextmanager
+    def _lock():
+        try:
+            import fcntl  # type: ignore  # no disponible en Windows
+        except ImportError:
+            yield
+            return
+        with open(ruta, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    return _lock()
+
+def _sha256_archivos(rutas, destino=None):
+    """SHA-256 de la concatenación de ``rutas``; si se indica ``destino``, también la escribe."""
+    digest = hashlib.sha256()
+    salida = open(destino, "wb") if destino else None
+    try:
+        for ruta in rutas:
+            with open(ruta, "rb") as f:
+                for bloque in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(bloque)
+                    if salida:
+                        salida.write(bloque)
+    finally:
+        if salida:
+            salida.close()
+    return digest.hexdigest()
+
+def descargar_archivo(url, directorio, partes=4, intentos=5, sha256=None):
+    """Descarga ``url`` a ``directorio`` de forma reanudable y verificada.
+
+    Parámetros
+    ----------
+    url : str
+        URL http(s) del archivo.
+    directorio : str
+        Carpeta de descargas; se conservan la copia final y sus metadatos para
+        reanudar o reutilizar en la próxima carga.
+    partes : int
+        Tramos a descargar en paralelo si el servidor acepta rangos (1 = secuencial).
+    intentos : int
+        Reintentos por tramo, con backoff exponencial y jitter.
+    sha256 : str | None
+        Hash esperado del archivo; si no coincide la copia se descarta.
+
+    Retorna
+    -------
+    str
+        Ruta local del archivo completo.
+
+    Lanza
+    -----
+    ValueError
+        Si el tamaño o el SHA-256 no coinciden con lo esperado.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    nombre = os.path.basename(urllib.parse.urlparse(url).path) or "release.json"
+    base = os.path.join(directorio, hashlib.sha1(url.encode("utf-8")).hexdigest()[:12] + "-" + nombre)
+    # Un solo proceso descarga; los demás workers esperan y reutilizan la copia
+    with _bloquear_archivo(base + ".lock"):
+        try:
+            return _descargar_version(url, base, partes, intentos, sha256)
+        except _RecursoCambiado:
+            # El archivo cambió a mitad de camino: se descartaron los tramos, empezar de cero una vez
+            logging.warning("El recurso cambió durante la descarga; reiniciando %s", url)
+            try:
+                return _descargar_version(url, base, partes, intentos, sha256)
+            except _RecursoCambiado:
+                raise ValueError(f"El servidor no respeta los rangos de {url}") from None
+
+def _descargar_version(url, base, partes, intentos, sha256):
+    """Cuerpo de :func:`descargar_archivo` (bajo lock) para la versión actual del recurso."""
+    info = _sondear_descarga(url)
+    tamano = info["tamano"]
+    progreso_carga.actualizar(bytes_totales=tamano)
+    if info["rangos"] and tamano:
+        n = max(1, min(int(partes), tamano // _TAMANO_MIN_TRAMO))
+    else:
+        n = 1
+    meta = {"url": url, "tamano": tamano, "validador": info["validador"], "partes": n}
+    ruta_meta = base + ".meta.json"
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            meta_previa = json.load(f)
+    except Exception:
+        meta_previa = None
+    # Copia completa vigente: mismo recurso según el validador del servidor
+    misma_version = meta_previa is not None and all(meta_previa.get(k) == v for k, v in meta.items())
+    if (misma_version and meta_previa.get("completo") and info["validador"] and tamano
+            and os.path.exists(base) and os.path.getsize(base) == tamano
+            and (not sha256 or meta_previa.get("sha256") == sha256.lower())):
+        logging.info("Descarga omitida: %s no cambió (%s)", url, info["validador"])
+        progreso_carga.avance_descarga(base, tamano)
+        return base
+    rutas = [f"{base}.part{i}" for i in range(n)]
+    if not misma_version or meta_previa.get("completo"):
+        # Tramos de otra versión del archivo (u otro reparto): no se pueden reanudar
+        for viejo in [base] + [f"{base}.part{i}" for i in range(int((meta_previa or {}).get("partes") or n))]:
+            if os.path.exists(viejo):
+                os.remove(viejo)
+        with open(ruta_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+    if info["rangos"] and tamano:
+        corte = [tamano * i // n for i in range(n + 1)]
+        tramos = [(rutas[i], corte[i], corte[i + 1] - 1) for i in range(n)]
+    else:
+        tramos = [(rutas[0], 0, None)]
+    inicio_t = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=n, thread_name_prefix="ocds-descarga") as pool:
+            for futuro in [pool.submit(_descargar_tramo, url, r, a, b, info["validador"], intentos) for r, a, b in tramos]:
+                futuro.result()
+    except _RecursoCambiado:
+        for r in rutas:
+            if os.path.exists(r):
+                os.remove(r)
+        os.remove(ruta_meta)
+        raise
+    # Unir tramos (o solo hashear si hay uno) y verificar largo y checksum
+    if n == 1:
+        digest = _sha256_archivos(rutas)
+        os.replace(rutas[0], base)
+    else:
+        digest = _sha256_archivos(rutas, destino=base + ".tmp")
+        os.replace(base + ".tmp", base)
+        for r in rutas:
+            os.remove(r)
+    recibido = os.path.getsize(base)
+    error = None
+    if tamano is not None and recibido != tamano:
+        error = f"tamaño {recibido} distinto de Content-Length {tamano}"
+    elif sha256 and digest != sha256.lower():
+        error = f"SHA-256 {digest} distinto del esperado {sha256.lower()}"
+    if error:
+        os.remove(base)
+        os.remove(ruta_meta)
+        raise ValueError(f"Descarga inválida de {url}: {error}")
+    with open(ruta_meta, "w", encoding="utf-8") as f:
+        json.dump(dict(meta, completo=True, sha256=digest), f)
+    logging.info("Descarga completa: %s (%d bytes, %d tramo(s), %.1fs, sha256=%s)",
+                 url, recibido, n, time.perf_counter() - inicio_t, digest)
+    return base
+
 def extraer_contratos(data):
     """Transforma el JSON OCDS en un DataFrame tabular de contratos/adjudicaciones.
 
@@ -166,7 +1859,7 @@ def extraer_contratos(data):
         Tabla con registros por proveedor/adjudicación.
     """
     registros = []
-    for rel in data.get("releases", []):
+    for n_rel, rel in enumerate(data.get("releases", [])):
         fecha = (
             rel.get("tender", {}).get("period", {}).get("startDate")
             or (rel.get("awards", [{}])[0].get("date") if rel.get("awards") else None)
@@ -224,7 +1917,8 @@ def extraer_contratos(data):
                         "moneda": moneda,
                         "contrato_desc": contrato_desc,
                         "submission_details": submission_details,
-                        "orden_compra": _obtener_orden_compra(awards, contracts, proveedor_nombre)
+                        "orden_compra": _obtener_orden_compra(awards, contracts, proveedor_nombre),
+                        "release": n_rel
                     })
             else:
                 registros.append({
@@ -237,14 +1931,151 @@ def extraer_contratos(data):
                     "moneda": moneda,
                     "contrato_desc": contrato_desc,
                     "submission_details": submission_details,
-                    "orden_compra": None
+                    "orden_compra": None,
+                    "release": n_rel
                 })
 
     df = pd.DataFrame(registros)
-    df["fecha"] = pd.to_datetime(df["fecha"], errors="coerce")
+    df["fecha"] = parsear_fechas(df["fecha"])
     df["año"] = df["fecha"].dt.year
     return df
 
+def extraer_items(data):
+    """Construye la tabla de ítems licitados (página Insumos) a partir del JSON OCDS.
+
+    La fecha se guarda como texto crudo y se parsea luego en bloque con
+    :func:`parsear_fechas`, evitando un parseo escalar por release.
+
+    Parámetros
+    ----------
+    data : dict
+        Estructura JSON con el/los releases en formato OCDS.
+
+    Retorna
+    -------
+    pandas.DataFrame
+        Un registro por ítem con fecha, código, descripción, licitante, monto y cantidad.
+    """
+    items_reg = []
+    for n_rel, rel in enumerate(data.get("releases", []) or []):
+        try:
+            tender = rel.get("tender", {}) or {}
+            buyer = (rel.get("buyer", {}) or {}).get("name")
+            # Fecha similar a extraer_contratos
+            fecha = (
+                tender.get("period", {}).get("startDate")
+                or (rel.get("awards", [{}])[0].get("date") if rel.get("awards") else None)
+                or (rel.get("contracts", [{}])[0].get("dateSigned") if rel.get("contracts") else None)
+                or rel.get("date")
+            )
+            items_list = tender.get("items", []) or []
+            if not items_list:
+                continue
+            # monto_millones: tomar por award (por compatibilidad con implementación previa)
+            monto_millones_rel = 0.0
+            awards = rel.get("awards", []) or []
+            for aw in awards:
+                amt = aw.get("value", {}).get("amount")
+                try:
+                    if amt is not None:
+                        monto_millones_rel += float(amt) / 1_000_000.0
+                except Exception:
+                    pass
+            for it in items_list:
+                codigo = (it.get("classification", {}) or {}).get("id") or it.get("id")
+                descripcion = it.get("description")
+                qty_raw = it.get("quantity")
+                try:
+                    cantidad = float(qty_raw) if qty_raw is not None and str(qty_raw).strip() != "" else 0.0
+                except Exception:
+                    cantidad = 0.0
+                if codigo and descripcion:
+                    items_reg.append({
+                        "fecha": fecha,
+                        "Código": str(codigo),
+                        "Descripción corta": str(descripcion)[:80],
+                        "Licitante": buyer,
+                        "Monto (Millones)": float(monto_millones_rel or 0.0),
+                        "Cantidad": cantidad,
+                        "release": n_rel
+                    })
+        except Exception:
+            # Continuar si un release tiene formato inesperado
+            continue
+    return pd.DataFrame(items_reg)
+
+# Formato canónico de fechas OCDS (ISO-8601 sin zona): "2025-08-10T09:30:00"
+_FORMATO_FECHA_ISO = "%Y-%m-%dT%H:%M:%S"
+
+# Desfasaje horario al final de una fecha con hora ("Z", "-03:00", "+0300"); se descarta
+_RE_ZONA_FECHA = r"^(.*\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$"
+# Lo que puede seguir a "AAAA-MM-DDTHH:MM:SS" en el camino rápido: fracción y/o desfasaje
+_RE_COLA_FECHA_ISO = r"(?:\.\d+)?\s*(?:Z|[+-]\d{2}(?::?\d{2})?)?"
+
+def parsear_fechas(serie):
+    """Convierte una columna de fechas OCDS (texto) a ``datetime64`` en una sola pasada.
+
+    Primero aplica de forma vectorizada el formato ISO-8601 explícito sobre los
+    primeros 19 caracteres (se conserva la hora local publicada y se descarta el
+    desfasaje horario, p. ej. ``-03:00``) cuando lo que sigue es solo una fracción de
+    segundo y/o ese desfasaje. Solo las filas que no respetan ese
+    formato (fechas sin hora, separador con espacio, etc.) pasan por un parseo
+    de respaldo más flexible, con la misma política: también descarta el
+    desfasaje en lugar de convertir a UTC.
+
+    Parámetros
+    ----------
+    serie : pandas.Series
+        Fechas como texto (o ``None``). Si ya es ``datetime64`` se devuelve tal cual.
+
+    Retorna
+    -------
+    pandas.Series
+        Serie ``datetime64`` sin zona horaria; ``NaT`` si la fecha no es válida.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = pd.Series(serie, dtype="object").astype("string")
+    fechas = pd.to_datetime(texto.str.slice(0, 19), format=_FORMATO_FECHA_ISO, errors="coerce")
+    # Con otra cola (p. ej. "...Zbasura") la fecha no es ISO válida: la decide el respaldo.
+    # Las colas distintas son pocas ("", "Z", "-03:00"...): se valida cada una una sola vez
+    colas = texto.str.slice(19)
+    validas = [c for c in colas.dropna().unique() if re.fullmatch(_RE_COLA_FECHA_ISO, c)]
+    cola_invalida = fechas.notna() & ~colas.isin(validas)
+    if cola_invalida.any():
+        fechas[cola_invalida] = pd.NaT
+    resto = fechas.isna() & texto.notna()
+    if resto.any():
+        # Misma política que el camino rápido: hora local publicada, sin convertir a UTC
+        # (si se convirtiera, cerca de medianoche cambiaría el día, o el año el 31/12)
+        local = texto[resto].str.strip().str.replace(_RE_ZONA_FECHA, r"\1", regex=True)
+        # Respaldo 1: ISO-8601 en cualquiera de sus variantes (solo fecha, espacio, fracción)
+        fechas.loc[resto] = pd.to_datetime(local, format="ISO8601", errors="coerce")
+        resto = fechas.isna() & texto.notna()
+        local = local[resto]
+    if resto.any():
+        # Respaldo 2: inferencia por elemento (p. ej. "10/08/2025") solo para lo que queda
+        fechas.loc[resto] = pd.to_datetime(local, format="mixed", dayfirst=True, errors="coerce")
+    return fechas
+
+def agregar_columnas_fecha(df_fechas):
+    """Normaliza ``fecha`` y precalcula ``año`` y ``mes`` sobre el DataFrame dado.
+
+    Parámetros
+    ----------
+    df_fechas : pandas.DataFrame
+        Tabla con una columna ``fecha`` (texto o datetime). Se modifica en el lugar.
+
+    Retorna
+    -------
+    pandas.DataFrame
+        El mismo DataFrame con ``fecha`` (datetime64), ``año`` (Int16) y ``mes`` (Int8).
+    """
+    df_fechas["fecha"] = parsear_fechas(df_fechas["fecha"])
+    df_fechas["año"] = df_fechas["fecha"].dt.year.astype("Int16")
+    df_fechas["mes"] = df_fechas["fecha"].dt.month.astype("Int8")
+    return df_fechas
+
 def detectar_tipo(tender_id, titulo=None, contrato_desc=None, submission_details=None):
     """Intenta clasificar el tipo de contratación.
 
@@ -292,51 +2123,451 @@ def format_mill_int(x):
     - Devuelve un texto con separador de miles ``.`` y sufijo ``M``
       (``"54.137M"`` en el ejemplo).
 
-    Parámetros
-    ----------
-    x : float | int | None
-        Valor numérico en millones.
+    Parámetros
+    ----------
+    x : float | int | None
+        Valor numérico en millones.
+
+    Retorna
+    -------
+    str
+        Cadena formateada o ``"-"`` si el valor no es válido.
+    """
+    try:
+        if pd.isna(x):
+            return "-"
+        val = int(round(float(x)))
+        s = f"{val:,}".replace(",", ".")
+        return f"{s}M"
+    except Exception:
+        return "-"
+
+def format_mill_hover(x, decimals=3):
+    """Formatea valores en millones para tooltips (hover) en gráficos.
+
+    Muestra el valor con ``decimals`` decimales y sufijo ``M``.
+
+    Parámetros
+    ----------
+    x : float | int | None
+        Valor en millones.
+    decimals : int
+        Cantidad de decimales a mostrar (por defecto 3).
+
+    Retorna
+    -------
+    str
+        Cadena formateada o ``"-"`` si el valor no es válido.
+    """
+    if pd.isna(x):
+        return "-"
+    val = float(x)
+    # mostramos con 3 decimales (ej: 54137.600) y añadimos 'M'
+    return f"{val:,.3f}".replace(",", ".") + "M"
+
+# Función para capitalizar títulos
+def capitalize_title(title):
+    return " ".join(word.capitalize() for word in title.split())
+
+# ------------------------------------------------------
+# ÍNDICE DE BÚSQUEDA DE TEXTO
+# ------------------------------------------------------
+_RE_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a al ante con de del e el en la las lo los o para por que se sin su sus un una y".split()
+)
+
+def normalizar_texto(texto):
+    """Pasa el texto a minúsculas ASCII sin tildes (``"Adquisición"`` → ``"adquisicion"``)."""
+    plano = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return plano.lower()
+
+def tokenizar(texto):
+    """Divide un texto en tokens normalizados, descartando palabras vacías y de una letra.
+
+    Parámetros
+    ----------
+    texto : str | None
+        Texto libre (título, descripción o consulta).
+
+    Retorna
+    -------
+    list[str]
+        Tokens sin tildes en minúsculas, en el orden en que aparecen.
+    """
+    if texto is None or (not isinstance(texto, str) and pd.isna(texto)):
+        return []
+    return [t for t in _RE_TOKEN.findall(normalizar_texto(texto)) if len(t) > 1 and t not in _STOPWORDS]
+
+def _expandir_rangos(inicios, conteos):
+    """Concatena ``arange(inicio, inicio + conteo)`` para cada par, de forma vectorizada."""
+    total = int(conteos.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    desplazamiento = np.repeat(inicios - np.cumsum(conteos) + conteos, conteos)
+    return desplazamiento + np.arange(total, dtype=np.int64)
+
+class IndiceBusqueda:
+    """Índice invertido de títulos, descripciones de contrato y descripciones de ítems.
+
+    Cada token apunta a la lista ordenada de filas de contratos (posición en ``df`` o
+    ``rowid - 1`` en SQLite) cuyo release lo contiene. Las listas se guardan
+    concatenadas en un único arreglo ``int32`` con desplazamientos por término
+    (formato CSR) y el vocabulario ordenado permite resolver prefijos con bisección.
+
+    Se construye con :meth:`agregar` (una o varias veces, en el mismo orden en que se
+    publican las filas) y se cierra con :meth:`finalizar`.
+    """
+
+    def __init__(self):
+        self.filas = 0
+        self._vocab = {}
+        self._pares = []
+        self.terminos = []
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.int32)
+
+    def _ids_tokens(self, textos):
+        """Tokeniza textos únicos y devuelve (ids de token concatenados, cantidad por texto)."""
+        codigos, unicos = pd.factorize(pd.Series(textos, dtype="object"), use_na_sentinel=False)
+        ids, largos = [], np.zeros(len(unicos), dtype=np.int64)
+        vocab = self._vocab
+        for i, texto in enumerate(unicos):
+            toks = {vocab.setdefault(t, len(vocab)) for t in tokenizar(texto)}
+            ids.extend(toks)
+            largos[i] = len(toks)
+        planos = np.asarray(ids, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(largos)))
+        # Expandir del texto único a cada aparición
+        conteos = largos[codigos]
+        return planos[_expandir_rangos(offsets[codigos], conteos)], conteos
+
+    def agregar(self, df_contratos, df_items=None):
+        """Indexa un bloque de filas de contratos (y los ítems de sus releases).
+
+        Parámetros
+        ----------
+        df_contratos : pandas.DataFrame
+            Filas en el orden en que se publican; requiere ``release``, ``titulo`` y
+            ``contrato_desc``.
+        df_items : pandas.DataFrame | None
+            Ítems con ``release`` y ``Descripción corta``.
+        """
+        n = len(df_contratos)
+        base = self.filas
+        self.filas += n
+        if n == 0 or "release" not in df_contratos.columns:
+            return
+        rel = df_contratos["release"].to_numpy(dtype=np.int64)
+        # Las filas de un mismo release son contiguas (se emiten al recorrerlo)
+        rel_unicos, inicio = np.unique(rel, return_index=True)
+        orden = np.argsort(inicio, kind="stable")
+        rel_unicos, inicio = rel_unicos[orden], inicio[orden]
+        conteo = np.diff(np.concatenate((inicio, [n])))
+        # Título y descripción del contrato son iguales en todas las filas del release
+        texto = df_contratos["titulo"].astype(object).where(df_contratos["titulo"].notna(), "")
+        if "contrato_desc" in df_contratos.columns:
+            desc = df_contratos["contrato_desc"].astype(object).where(df_contratos["contrato_desc"].notna(), "")
+            texto = texto + " " + desc
+        toks, conteos = self._ids_tokens(texto.to_numpy()[inicio])
+        pos_rel = np.repeat(np.arange(len(rel_unicos)), conteos)
+        if df_items is not None and not df_items.empty and "release" in df_items.columns:
+            rel_items = df_items["release"].to_numpy(dtype=np.int64)
+            # Solo ítems de releases que generaron filas de contratos
+            orden_u = np.argsort(rel_unicos)
+            pos = np.searchsorted(rel_unicos, rel_items, sorter=orden_u)
+            pos = np.clip(pos, 0, len(rel_unicos) - 1)
+            validos = rel_unicos[orden_u[pos]] == rel_items
+            toks_i, conteos_i = self._ids_tokens(df_items["Descripción corta"].to_numpy()[validos])
+            toks = np.concatenate((toks, toks_i))
+            pos_rel = np.concatenate((pos_rel, np.repeat(orden_u[pos[validos]], conteos_i)))
+        # Pares únicos (token, release) y expansión a (token, fila)
+        clave = np.unique(toks * (len(rel_unicos) + 1) + pos_rel)
+        toks, pos_rel = clave // (len(rel_unicos) + 1), clave % (len(rel_unicos) + 1)
+        filas = base + _expandir_rangos(inicio[pos_rel], conteo[pos_rel])
+        self._pares.append((np.repeat(toks, conteo[pos_rel]), filas))
+
+    def finalizar(self):
+        """Ordena el vocabulario y arma las listas de filas por término. Retorna ``self``."""
+        self.terminos = sorted(self._vocab)
+        if self._pares:
+            remapeo = np.empty(len(self._vocab), dtype=np.int64)
+            remapeo[[self._vocab[t] for t in self.terminos]] = np.arange(len(self.terminos))
+            toks = remapeo[np.concatenate([t for t, _ in self._pares])]
+            filas = np.concatenate([f for _, f in self._pares])
+            clave = np.unique((toks << 32) | filas)
+            self._postings = (clave & 0xFFFFFFFF).astype(np.int32)
+            self._offsets = np.searchsorted(clave >> 32, np.arange(len(self.terminos) + 1))
+        else:
+            self._offsets = np.zeros(len(self.terminos) + 1, dtype=np.int64)
+        self._vocab, self._pares = {}, []
+        return self
+
+    def _filas_termino(self, termino, prefijo):
+        lo = bisect.bisect_left(self.terminos, termino)
+        if prefijo:
+            hi = bisect.bisect_left(self.terminos, termino + "\uffff")
+        else:
+            hi = lo + 1 if lo < len(self.terminos) and self.terminos[lo] == termino else lo
+        if hi <= lo:
+            return np.empty(0, dtype=np.int32)
+        tramo = self._postings[self._offsets[lo]:self._offsets[hi]]
+        if hi - lo == 1:
+            return tramo  # un solo término: la lista ya está ordenada y sin repetidos
+        # Unión de varios términos (prefijo) con un mapa de bits: lineal, sin ordenar
+        marca = np.zeros(self.filas, dtype=bool)
+        marca[tramo] = True
+        return np.flatnonzero(marca).astype(np.int32)
+
+    def buscar(self, consulta, prefijo=False):
+        """Filas que contienen todos los términos de la consulta.
+
+        Parámetros
+        ----------
+        consulta : str
+            Texto libre; se normaliza igual que el contenido indexado.
+        prefijo : bool
+            Si es ``True`` cada término coincide también con palabras que empiezan así
+            (``"medic"`` → ``"medicamentos"``).
+
+        Retorna
+        -------
+        numpy.ndarray | None
+            Posiciones de fila ordenadas (``int32``); ``None`` si la consulta está vacía
+            (sin filtro). Una consulta con texto pero sin términos buscables (solo
+            palabras vacías o de una letra, p. ej. ``"de la"``) no coincide con nada.
+        """
+        terminos = list(dict.fromkeys(tokenizar(consulta)))
+        if not terminos:
+            return None if not str(consulta or "").strip() else np.empty(0, dtype=np.int32)
+        listas = sorted((self._filas_termino(t, prefijo) for t in terminos), key=len)
+        resultado = listas[0]
+        for otra in listas[1:]:
+            if resultado.size == 0:
+                break
+            # Intersección con mapa de bits: conserva el orden de 'otra' (ya ordenada)
+            marca = np.zeros(self.filas, dtype=bool)
+            marca[resultado] = True
+            resultado = otra[marca[otra]]
+        return resultado
+
+# ------------------------------------------------------
+# CATÁLOGO DE INSUMOS (claves enteras para Insumos)
+# ------------------------------------------------------
+_CLAVES_ITEM = ["Código", "Descripción corta"]
+
+class CatalogoItems:
+    """Catálogo de insumos: cada par (``Código``, ``Descripción corta``) recibe un id entero denso.
+
+    Las tablas de ítems guardan solo ``item_id`` (``int32``) y las etiquetas se
+    almacenan una única vez aquí, de modo que las agregaciones de Insumos agrupan por
+    enteros y el texto se adjunta solo a las filas que se muestran.
+
+    Se alimenta con :meth:`codificar` (una o varias veces) y se cierra con
+    :meth:`finalizar`, que además calcula ``orden``: la posición de cada id en el orden
+    alfabético de (código, descripción), usada para desempatar rankings.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._codigos = []
+        self._descripciones = []
+        self.etiquetas = pd.DataFrame({col: pd.Series([], dtype="string") for col in _CLAVES_ITEM})
+        self.orden = np.empty(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.etiquetas)
+
+    def codificar(self, df_items_lote):
+        """Reemplaza ``Código`` y ``Descripción corta`` del lote por ``item_id``.
+
+        Parámetros
+        ----------
+        df_items_lote : pandas.DataFrame
+            Ítems normalizados (ver :func:`_normalizar_items`).
+
+        Retorna
+        -------
+        pandas.DataFrame
+            El lote sin las columnas de texto y con ``item_id`` en su lugar.
+        """
+        if df_items_lote is None or df_items_lote.empty or "Código" not in df_items_lote.columns:
+            return df_items_lote
+        pares = pd.MultiIndex.from_arrays([df_items_lote[c].astype(object) for c in _CLAVES_ITEM])
+        inversa, unicos = pares.factorize()
+        # Solo se recorren los pares distintos del lote, no cada fila
+        mapa = np.empty(len(unicos), dtype=np.int32)
+        for j, par in enumerate(unicos):
+            item_id = self._ids.get(par)
+            if item_id is None:
+                item_id = self._ids[par] = len(self._codigos)
+                self._codigos.append(par[0])
+                self._descripciones.append(par[1])
+            mapa[j] = item_id
+        out = df_items_lote.drop(columns=_CLAVES_ITEM)
+        out.insert(1, "item_id", mapa[inversa])
+        return out
+
+    def finalizar(self):
+        """Congela las etiquetas, calcula ``orden`` y libera el diccionario de construcción."""
+        if self._ids is None:
+            return self  # ya finalizado
+        self.etiquetas = pd.DataFrame({
+            "Código": pd.array(self._codigos, dtype="string"),
+            "Descripción corta": pd.array(self._descripciones, dtype="string"),
+        })
+        orden = np.empty(len(self.etiquetas), dtype=np.int32)
+        orden[self.etiquetas.sort_values(_CLAVES_ITEM, kind="stable").index.to_numpy()] = np.arange(len(orden))
+        self.orden = orden
+        self._ids, self._codigos, self._descripciones = None, [], []
+        return self
+
+    def etiquetar(self, ids, columnas):
+        """Antepone ``Código`` y ``Descripción corta`` a las columnas dadas para los ids indicados."""
+        out = self.etiquetas.take(np.asarray(ids, dtype=np.int64)).reset_index(drop=True)
+        for nombre, valores in columnas.items():
+            out[nombre] = valores
+        return out
+
+def _top_n(valores, desempate, n=20):
+    """Posiciones de los ``n`` mayores valores (desc), desempatando por ``desempate`` (asc)."""
+    if len(valores) > n:
+        # Preselección lineal: solo se ordenan los que alcanzan el n-ésimo valor
+        umbral = np.partition(valores, len(valores) - n)[len(valores) - n]
+        candidatos = np.flatnonzero(valores >= umbral)
+    else:
+        candidatos = np.arange(len(valores))
+    return candidatos[np.lexsort((desempate[candidatos], -valores[candidatos]))][:n]
+
+# ------------------------------------------------------
+# PROGRESO DE LA CARGA
+# ------------------------------------------------------
+# Fases en el orden en que ocurren; "descarga" solo existe para URLs http(s) descargadas a disco
+FASES_CARGA = ("descarga", "parseo", "normalizacion", "indexacion", "precalentamiento")
+
+class ProgresoCarga:
+    """Estado observable de la carga en curso (o de la última), seguro entre hilos.
+
+    Lo actualizan el descargador y el loader; lo leen ``/progreso-carga``, su versión
+    SSE y la barra de Home. ``version`` cambia con cada inicio, cambio de fase y fin,
+    para que los lectores puedan esperar novedades sin sondear.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.version = 0
+        self.iniciada_en = self.finalizada_en = None  # epoch de inicio y fin de la última carga
+        self.completada_en = None  # epoch del fin de la última carga exitosa (para enfriamientos)
+        self._reiniciar("inactiva")
+
+    def _reiniciar(self, estado):
+        self.estado = estado
+        self.fase = None
+        self.error = None
+        self._inicio = self._inicio_fase = time.perf_counter()
+        self._fin = None
+        self._fases = {}
+        self._tramos = {}  # bytes escritos por tramo de descarga (los reintentos reescriben, no suman)
+        self.bytes_totales = None
+        self.bytes_parseados = 0
+        self.bytes_fuente = None
+        self.releases = 0
+        self.filas = 0
+
+    def _avisar(self):
+        self.version += 1
+        self._cond.notify_all()
+
+    def _cerrar_fase(self, ahora):
+        if self.fase is not None:
+            self._fases[self.fase] = self._fases.get(self.fase, 0.0) + ahora - self._inicio_fase
+
+    def iniciar(self):
+        with self._cond:
+            self._reiniciar("en_curso")
+            self.iniciada_en, self.finalizada_en = time.time(), None
+            self._avisar()
+
+    def cambiar_fase(self, fase):
+        with self._cond:
+            ahora = time.perf_counter()
+            self._cerrar_fase(ahora)
+            self.fase, self._inicio_fase = fase, ahora
+            self._avisar()
+
+    def terminar(self, error=None):
+        with self._cond:
+            self._fin = time.perf_counter()
+            self.finalizada_en = time.time()
+            self._cerrar_fase(self._fin)
+            self.fase = None
+            self.estado, self.error = ("error", error) if error else ("completa", None)
+            if not error:
+                self.completada_en = self.finalizada_en
+            self._avisar()
+
+    def actualizar(self, **valores):
+        """Fija contadores (``releases``, ``filas``, ``bytes_totales``, ``bytes_fuente``)."""
+        with self._cond:
+            for nombre, valor in valores.items():
+                setattr(self, nombre, valor)
 
-    Retorna
-    -------
-    str
-        Cadena formateada o ``"-"`` si el valor no es válido.
-    """
-    try:
-        if pd.isna(x):
-            return "-"
-        val = int(round(float(x)))
-        s = f"{val:,}".replace(",", ".")
-        return f"{s}M"
-    except Exception:
-        return "-"
+    def avance_descarga(self, tramo, escritos):
+        with self._cond:
+            self._tramos[tramo] = escritos
 
-def format_mill_hover(x, decimals=3):
-    """Formatea valores en millones para tooltips (hover) en gráficos.
+    def sumar_parseados(self, n):
+        with self._cond:
+            self.bytes_parseados += n
 
-    Muestra el valor con ``decimals`` decimales y sufijo ``M``.
+    def esperar(self, version, timeout):
+        """Bloquea hasta que ``version`` cambie o pase ``timeout``; retorna la versión vigente."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self.version
 
-    Parámetros
-    ----------
-    x : float | int | None
-        Valor en millones.
-    decimals : int
-        Cantidad de decimales a mostrar (por defecto 3).
+    def instantanea(self):
+        """Diccionario serializable con el estado, contadores y segundos por fase."""
+        with self._cond:
+            ahora = self._fin or time.perf_counter()
+            fases = {f: round(s, 3) for f, s in self._fases.items()}
+            if self.fase is not None:
+                fases[self.fase] = round(fases.get(self.fase, 0.0) + ahora - self._inicio_fase, 3)
+            descargados = sum(self._tramos.values())
+            porcentaje = None
+            if self.fase == "descarga" and self.bytes_totales:
+                porcentaje = min(100.0, 100.0 * descargados / self.bytes_totales)
+            elif self.fase == "parseo" and self.bytes_fuente:
+                porcentaje = min(100.0, 100.0 * self.bytes_parseados / self.bytes_fuente)
+            return {
+                "estado": self.estado,
+                "fase": self.fase,
+                "porcentaje_fase": None if porcentaje is None else round(porcentaje, 1),
+                "bytes_descargados": descargados,
+                "bytes_totales": self.bytes_totales,
+                "bytes_parseados": self.bytes_parseados,
+                "bytes_fuente": self.bytes_fuente,
+                "releases": self.releases,
+                "filas": self.filas,
+                "transcurrido_s": round(ahora - self._inicio, 3) if self.estado != "inactiva" else None,
+                "fases": fases,
+                "error": self.error,
+                "version": self.version,
+            }
 
-    Retorna
-    -------
-    str
-        Cadena formateada o ``"-"`` si el valor no es válido.
-    """
-    if pd.isna(x):
-        return "-"
-    val = float(x)
-    # mostramos con 3 decimales (ej: 54137.600) y añadimos 'M'
-    return f"{val:,.3f}".replace(",", ".") + "M"
+class _LectorContado:
+    """Flujo binario que informa a ``progreso`` los bytes que entrega (parseo en streaming)."""
 
-# Función para capitalizar títulos
-def capitalize_title(title):
-    return " ".join(word.capitalize() for word in title.split())
+    def __init__(self, flujo, progreso):
+        self._flujo = flujo
+        self._progreso = progreso
+
+    def read(self, n=-1):
+        bloque = self._flujo.read(n)
+        self._progreso.sumar_parseados(len(bloque))
+        return bloque
+
+progreso_carga = ProgresoCarga()
 
 # ------------------------------------------------------
 # CARGA DE DATOS y normalizaciones
@@ -344,6 +2575,31 @@ def capitalize_title(title):
 # Si se está construyendo la documentación (SPHINX_BUILD=1), evitamos cargar datos reales
 SPHINX_BUILD = os.getenv("SPHINX_BUILD") == "1"
 LAZY_LOAD = os.getenv("LAZY_LOAD") == "1"  # Si está activo difiere la carga real hasta que se invoque manualmente
+# Si está activo la carga arranca en un hilo al importar y el servidor atiende mientras tanto
+BACKGROUND_LOAD = os.getenv("BACKGROUND_LOAD") == "1"
+# Backend de almacenamiento: "pandas" (en memoria, por defecto) o "sqlite" (en disco, fuera de RAM)
+OCDS_BACKEND = (os.getenv("OCDS_BACKEND") or "pandas").strip().lower()
+SQLITE_PATH = os.getenv("OCDS_SQLITE_PATH") or os.path.join(tempfile.gettempdir(), "ocds_mendoza.sqlite3")
+try:
+    SQLITE_LOTE = max(1, int(os.getenv("OCDS_SQLITE_BATCH", "20000")))  # filas por lote al volcar en streaming
+except Exception:
+    SQLITE_LOTE = 20000
+# Publicación parcial durante la primera carga con STREAM_PARSE=1 (backend pandas): cada N
+# releases y al completar cada año si el archivo viene ordenado por fecha (0 = desactivado)
+try:
+    PUBLICAR_CADA = max(0, int(os.getenv("OCDS_PUBLISH_EVERY", "20000")))
+except Exception:
+    PUBLICAR_CADA = 20000
+_RE_AÑO_FECHA = re.compile(r"(?<!\d)(\d{4})(?!\d)")  # año en "2025-08-10T..." o "10/08/2025"
+# Descarga de URLs http(s) a disco antes de parsear (reanudable; OCDS_DOWNLOAD=0 lee directo de la red)
+DESCARGA_LOCAL = os.getenv("OCDS_DOWNLOAD", "1") not in ("0", "false", "False")
+DESCARGAS_DIR = os.getenv("OCDS_DOWNLOAD_DIR", os.path.join(tempfile.gettempdir(), "ocds-descargas"))
+OCDS_JSON_SHA256 = (os.getenv("OCDS_JSON_SHA256") or "").strip() or None  # checksum esperado (opcional)
+try:
+    DESCARGA_PARTES = max(1, int(os.getenv("OCDS_DOWNLOAD_PARTS", "4")))  # tramos en paralelo
+    DESCARGA_INTENTOS = max(1, int(os.getenv("OCDS_DOWNLOAD_RETRIES", "5")))  # reintentos por tramo
+except Exception:
+    DESCARGA_PARTES, DESCARGA_INTENTOS = 4, 5
 
 # Variables globales de dataset
 _DEFAULT_OCDS_URL = "https://datosabiertos-compras.mendoza.gov.ar/descargar-json/02/20250810_release.json"
@@ -356,6 +2612,7 @@ data = {"releases": []}
 df = pd.DataFrame({
     "fecha": pd.to_datetime(pd.Series([], dtype="datetime64[ns]")),
     "año": pd.Series([], dtype="Int64"),
+    "mes": pd.Series([], dtype="Int8"),
     "monto": pd.Series([], dtype="float"),
     "monto_millones": pd.Series([], dtype="float"),
     "tipo_contratacion": pd.Series([], dtype="string"),
@@ -363,57 +2620,125 @@ df = pd.DataFrame({
     "tender_id": pd.Series([], dtype="string"),
     "titulo": pd.Series([], dtype="string"),
     "proveedor": pd.Series([], dtype="string"),
+    "orden_compra": pd.Series([], dtype="string"),
 })
 df_items = pd.DataFrame({
     "año": pd.Series([], dtype="Int64"),
-    "Código": pd.Series([], dtype="string"),
-    "Descripción corta": pd.Series([], dtype="string"),
+    "item_id": pd.Series([], dtype="int32"),
     "Licitante": pd.Series([], dtype="string"),
     "Monto (Millones)": pd.Series([], dtype="float"),
+    "Cantidad": pd.Series([], dtype="float"),
 })
+_DF_VACIO = df
+_DF_ITEMS_VACIO = df_items
+indice_busqueda = None  # IndiceBusqueda del dataset vigente (se construye en la carga)
+catalogo_items = CatalogoItems().finalizar()  # etiquetas de df_items["item_id"]
 _DATA_LOADED = False
 _DATA_LOCK = threading.Lock()
 _DATA_ERROR = None
+# Se incrementa con cada carga exitosa; identifica la versión vigente del dataset
+_GENERACION_DATOS = 0
+# Huella (SHA-256) del contenido publicado: a diferencia de la generación, que es un contador
+# de cada proceso, coincide entre workers que publicaron el mismo dataset ("" = sin datos)
+_HUELLA_DATOS = ""
+# Instantánea parcial publicada (carga en streaming aún en curso)
+_DATOS_PARCIALES = False
+# Tiempos de la última carga (segundos desde su inicio)
+TIEMPOS_CARGA = {"primera_vista_s": None, "carga_completa_s": None}
+
+def _huella_tablas(huella, *tablas):
+    """Agrega a ``huella`` (``hashlib``) columnas y contenido fila a fila de ``tablas`` (sin índice)."""
+    for tabla in tablas:
+        if tabla is not None and not tabla.empty:
+            huella.update("\x1f".join(map(str, tabla.columns)).encode("utf-8"))
+            huella.update(pd.util.hash_pandas_object(tabla, index=False).to_numpy().tobytes())
+    return huella
 
 def _cargar_datos_internamente(max_retries: int = 3, base_delay: float = 2.0):
-    global data, df, df_items, _DATA_LOADED, _DATA_ERROR
+    global data, df, df_items, indice_busqueda, catalogo_items, _DATA_LOADED, _DATA_ERROR, _GENERACION_DATOS
+    global _DATOS_PARCIALES, _HUELLA_DATOS
     logging.info("Iniciando carga de datos OCDS desde %s", URL_JSON)
+    inicio_carga = time.perf_counter()
+    TIEMPOS_CARGA.update(primera_vista_s=None, carga_completa_s=None)
+    progreso_carga.iniciar()
     last_err = None
+    origen = URL_JSON
     for intento in range(1, max_retries + 1):
         try:
-            # Si STREAM_PARSE=1 y es URL http(s), usar parseo incremental para reducir memoria
-            use_stream = os.getenv("STREAM_PARSE") == "1" and URL_JSON.startswith("http")
+            # URL http(s): descargar (reanudable, verificada) y parsear la copia local
+            if DESCARGA_LOCAL and URL_JSON.strip().strip('"').strip("'").startswith("http"):
+                progreso_carga.cambiar_fase("descarga")
+                origen = descargar_archivo(
+                    URL_JSON.strip().strip('"').strip("'"), DESCARGAS_DIR,
+                    partes=DESCARGA_PARTES, intentos=DESCARGA_INTENTOS, sha256=OCDS_JSON_SHA256,
+                )
+            # Si STREAM_PARSE=1 (URL http(s) o archivo local), usar parseo incremental para reducir memoria
+            use_stream = os.getenv("STREAM_PARSE") == "1"
             raw = None
+            progreso_carga.cambiar_fase("parseo")
             if use_stream:
                 logging.info("Usando parseo streaming (ijson)")
             else:
-                raw = cargar_ocds(URL_JSON)
+                raw = cargar_ocds(origen)
             break
         except Exception as e:
             last_err = e
-            wait = base_delay * intento
+            wait = espera_reintento(intento, base=base_delay)
             logging.warning("Intento %d/%d fallo al descargar dataset (%s). Reintentando en %.1fs", intento, max_retries, e, wait)
             if intento == max_retries:
                 logging.error("Fallo definitivo tras %d intentos: %s", max_retries, e)
                 raise
-            import time as _t; _t.sleep(wait)
+            time.sleep(wait)
+    try:
+        last_n = int(os.getenv("OCDS_LIMIT_LAST_YEARS", "0"))
+    except Exception:
+        last_n = 0
+    # Con OCDS_BACKEND=sqlite las tablas se vuelcan a disco (por lotes si hay streaming)
+    conn_sqlite = _abrir_sqlite_temporal() if usar_sqlite() else None
+    df_items_local = pd.DataFrame()
+    # Índice de búsqueda de texto: se alimenta con las mismas filas (y lotes) que se publican
+    indice = IndiceBusqueda()
+    lotes_contratos, lotes_items, registros, items_reg = [], [], None, None  # publicación parcial
+    # Catálogo de insumos: los ítems se guardan con item_id entero en lugar de texto
+    catalogo = CatalogoItems()
+    # Huella del contenido: se alimenta con las tablas publicadas (o con cada lote volcado a SQLite)
+    huella, huella_parcial = hashlib.sha256(), hashlib.sha256()
     # Construcción de dataframes: streaming si se solicitó
-    if os.getenv("STREAM_PARSE") == "1" and URL_JSON.startswith("http"):
+    if os.getenv("STREAM_PARSE") == "1":
         try:
             import ijson  # type: ignore  # import local opcional
         except Exception as e:
             logging.warning("STREAM_PARSE=1 pero no se pudo importar ijson (%s). Volviendo a método estándar.", e)
-            raw = cargar_ocds(URL_JSON)
+            raw = cargar_ocds(origen)
             df_local = extraer_contratos(raw)
         else:
             # Parseo incremental de releases
             registros = []
             items_reg = []
-            headers = {"User-Agent": "OCDS-Mendoza-Dashboard/1.0"}
-            with requests.get(URL_JSON, headers=headers, stream=True, timeout=60) as resp:
-                resp.raise_for_status()
-                resp.raw.decode_content = True
-                for rel in ijson.items(resp.raw, 'releases.item'):
+            # Solo en la primera carga (sin dataset completo que reemplazar) y en memoria
+            publicar = conn_sqlite is None and PUBLICAR_CADA > 0 and not _DATA_LOADED
+            publicado_en = 0
+            año_previo, años_cerrados, ordenado = None, set(), True
+            filas_previas, n_rel = 0, -1  # filas ya pasadas a lotes (SQLite o publicación parcial)
+            if os.path.exists(origen) and not es_gzip(origen):
+                # Con gzip se cuentan bytes descomprimidos: el tamaño en disco no sirve de referencia
+                progreso_carga.actualizar(bytes_fuente=os.path.getsize(origen))
+            with _abrir_fuente_stream(origen) as fuente:
+                for n_rel, rel in enumerate(ijson.items(_LectorContado(fuente, progreso_carga), 'releases.item')):
+                    if n_rel % 1000 == 0:
+                        progreso_carga.actualizar(releases=n_rel, filas=filas_previas + len(registros))
+                    fecha = None
+                    marca_contratos, marca_items = len(registros), len(items_reg)
+                    # SQLite: volcar por lotes para no acumular el archivo completo en memoria
+                    if conn_sqlite is not None and len(registros) >= SQLITE_LOTE:
+                        lote_contratos = _normalizar_contratos(pd.DataFrame(registros))
+                        lote_items = _normalizar_items(pd.DataFrame(items_reg))
+                        indice.agregar(lote_contratos, lote_items)
+                        lote_items = catalogo.codificar(lote_items)
+                        _huella_tablas(huella, lote_contratos, lote_items)
+                        _volcar_lote_sqlite(conn_sqlite, lote_contratos, lote_items)
+                        filas_previas += len(registros)
+                        registros, items_reg = [], []
                     try:
                         tender = rel.get("tender", {}) or {}
                         buyer = (rel.get("buyer", {}) or {}).get("name")
@@ -451,39 +2776,26 @@ def _cargar_datos_internamente(max_retries: int = 3, base_delay: float = 2.0):
                             except Exception:
                                 return None
 
-                        # Registros por proveedor en awards
-                        if awards:
-                            for aw in awards:
-                                monto = aw.get("value", {}).get("amount")
-                                moneda = aw.get("value", {}).get("currency")
-                                sups = aw.get("suppliers", []) or []
-                                for sup in sups or [{}]:
-                                    proveedor_nombre = sup.get("name") if sup else None
-                                    registros.append({
-                                        "fecha": fecha,
-                                        "tender_id": tender_id,
-                                        "titulo": tender.get("title"),
-                                        "licitante": buyer,
-                                        "proveedor": proveedor_nombre,
-                                        "monto": monto,
-                                        "moneda": moneda,
-                                        "contrato_desc": contrato_desc,
-                                        "submission_details": submission_details,
-                                        "orden_compra": _obtener_orden_compra_stream(awards, contracts, proveedor_nombre)
-                                    })
-                        else:
-                            registros.append({
-                                "fecha": fecha,
-                                "tender_id": tender_id,
-                                "titulo": tender.get("title"),
-                                "licitante": buyer,
-                                "proveedor": None,
-                                "monto": (awards[0].get("value", {}).get("amount") if awards else None),
-                                "moneda": (awards[0].get("value", {}).get("currency") if awards else None),
-                                "contrato_desc": contrato_desc,
-                                "submission_details": submission_details,
-                                "orden_compra": None
-                            })
+                        # Registros por proveedor en awards (sin awards no hay filas, como en extraer_contratos)
+                        for aw in awards:
+                            monto = aw.get("value", {}).get("amount")
+                            moneda = aw.get("value", {}).get("currency")
+                            sups = aw.get("suppliers", []) or []
+                            for sup in sups or [{}]:
+                                proveedor_nombre = sup.get("name") if sup else None
+                                registros.append({
+                                    "fecha": fecha,
+                                    "tender_id": tender_id,
+                                    "titulo": tender.get("title"),
+                                    "licitante": buyer,
+                                    "proveedor": proveedor_nombre,
+                                    "monto": monto,
+                                    "moneda": moneda,
+                                    "contrato_desc": contrato_desc,
+                                    "submission_details": submission_details,
+                                    "orden_compra": _obtener_orden_compra_stream(awards, contracts, proveedor_nombre),
+                                    "release": n_rel
+                                })
 
                         # Items por release (monto total del release en millones)
                         try:
@@ -494,8 +2806,6 @@ def _cargar_datos_internamente(max_retries: int = 3, base_delay: float = 2.0):
                                     monto_millones_rel += float(amt) / 1_000_000.0
                         except Exception:
                             monto_millones_rel = 0.0
-                        fecha_dt = pd.to_datetime(fecha, errors="coerce") if fecha else pd.NaT
-                        año = int(fecha_dt.year) if pd.notna(fecha_dt) else None
                         for it in (tender.get("items", []) or []):
                             codigo = (it.get("classification", {}) or {}).get("id") or it.get("id")
                             descripcion = it.get("description")
@@ -506,43 +2816,66 @@ def _cargar_datos_internamente(max_retries: int = 3, base_delay: float = 2.0):
                                 cantidad = 0.0
                             if codigo and descripcion:
                                 items_reg.append({
-                                    "año": año,
+                                    "fecha": fecha,
                                     "Código": str(codigo),
                                     "Descripción corta": str(descripcion)[:80],
                                     "Licitante": buyer,
                                     "Monto (Millones)": float(monto_millones_rel or 0.0),
-                                    "Cantidad": cantidad
+                                    "Cantidad": cantidad,
+                                    "release": n_rel
                                 })
                     except Exception:
                         # No abortar por un release malformado; continuar
                         continue
-            # Crear df_local y df_items
-            df_local = pd.DataFrame(registros)
-            if not df_local.empty:
-                df_local["fecha"] = pd.to_datetime(df_local["fecha"], errors="coerce")
-                df_local["año"] = df_local["fecha"].dt.year
-            df_items = pd.DataFrame(items_reg)
+                    if publicar:
+                        # Cambio de año en un archivo ordenado: el año previo quedó completo
+                        año_rel = _RE_AÑO_FECHA.search(str(fecha)) if fecha else None
+                        año_rel = año_rel.group(1) if año_rel else None
+                        año_completo = False
+                        if ordenado and año_rel and año_rel != año_previo:
+                            if año_previo is not None:
+                                años_cerrados.add(año_previo)
+                                if año_rel in años_cerrados:
+                                    ordenado = False  # años intercalados: solo cada N releases
+                                else:
+                                    año_completo = True
+                            año_previo = año_rel
+                        # Cada N releases con intervalo creciente (N, 2N, 4N...): el costo total
+                        # de armar instantáneas queda acotado a un múltiplo del de la carga
+                        if año_completo or n_rel + 1 - publicado_en >= max(PUBLICAR_CADA, publicado_en):
+                            # El release actual pertenece al año nuevo: queda para el próximo lote
+                            corte_c = marca_contratos if año_completo else len(registros)
+                            corte_i = marca_items if año_completo else len(items_reg)
+                            if corte_c:
+                                lotes_contratos.append(_normalizar_contratos(pd.DataFrame(registros[:corte_c])))
+                                lotes_items.append(_normalizar_items(pd.DataFrame(items_reg[:corte_i])))
+                                registros, items_reg = registros[corte_c:], items_reg[corte_i:]
+                                filas_previas += corte_c
+                                _publicar_parcial(lotes_contratos, lotes_items, last_n, inicio_carga, huella_parcial)
+                            publicado_en = n_rel + 1
+                progreso_carga.actualizar(releases=n_rel + 1, filas=filas_previas + len(registros))
+            # Crear df_local y df_items (las fechas se parsean una sola vez más abajo)
+            if not lotes_contratos:
+                df_local = pd.DataFrame(registros)
+                df_items_local = pd.DataFrame(items_reg)
     else:
         df_local = extraer_contratos(raw)
+    if raw is not None:
+        progreso_carga.actualizar(releases=len(raw.get("releases") or []), filas=len(df_local))
+    progreso_carga.cambiar_fase("normalizacion")
+    if lotes_contratos:
+        # Publicación parcial: los lotes ya vienen normalizados; unir con lo que resta
+        if registros:
+            lotes_contratos.append(_normalizar_contratos(pd.DataFrame(registros)))
+            lotes_items.append(_normalizar_items(pd.DataFrame(items_reg)))
+        df_local = _unir_lotes_contratos(lotes_contratos)
+        df_items_local = _unir_lotes_items(lotes_items)
+        lotes_contratos = lotes_items = registros = items_reg = None
+    elif not df_local.empty:
+        df_local = _normalizar_contratos(df_local)
     if not df_local.empty:
-        df_local["tipo_contratacion"] = df_local.apply(
-            lambda r: detectar_tipo(r.get("tender_id"), r.get("titulo"), r.get("contrato_desc"), r.get("submission_details")),
-            axis=1
-        )
-        # Numéricos
-        df_local["monto"] = pd.to_numeric(df_local["monto"], errors="coerce").fillna(0.0)
-        df_local["monto_millones"] = df_local["monto"] / 1_000_000.0
-
-        # Precálculos de fecha y tipos eficientes
-        df_local["fecha_dt"] = pd.to_datetime(df_local["fecha"], errors="coerce")
-        df_local["fecha"] = df_local["fecha_dt"]  # mantener dtype datetime64
-        df_local["año"] = df_local["fecha_dt"].dt.year.astype("Int16")
 
         # Limitar a últimos N años para reducir memoria (si se define)
-        try:
-            last_n = int(os.getenv("OCDS_LIMIT_LAST_YEARS", "0"))
-        except Exception:
-            last_n = 0
         if last_n and last_n > 0:
             max_year = int(df_local["año"].max()) if not df_local["año"].isna().all() else None
             if max_year is not None:
@@ -550,160 +2883,1299 @@ def _cargar_datos_internamente(max_retries: int = 3, base_delay: float = 2.0):
                 df_local = df_local[df_local["año"] >= min_year]
 
         # Construir df_items global para página Insumos SIN guardar 'items' en df_local
-        items_reg = []
-        for rel in raw.get("releases", []) or []:
+        # (en modo streaming ya se construyó durante el recorrido y raw es None)
+        if raw is not None:
+            df_items_local = extraer_items(raw)
+        df_items_local = _normalizar_items(df_items_local)
+    progreso_carga.cambiar_fase("indexacion")
+    items_final = df_items
+    if conn_sqlite is not None:
+        # Backend SQLite: las tablas quedan en disco y se liberan los DataFrames en memoria
+        if not df_local.empty:
+            indice.agregar(df_local, df_items_local)
+            items_final = catalogo.codificar(df_items_local)
+            _huella_tablas(huella, df_local, items_final)
+            _volcar_lote_sqlite(conn_sqlite, df_local, items_final)
+        _finalizar_sqlite(conn_sqlite, catalogo.finalizar(), last_n)
+        df_local, items_final, raw = _DF_VACIO, _DF_ITEMS_VACIO, None
+    elif not df_local.empty:
+        indice.agregar(df_local, df_items_local)
+        # El número de release solo se usa para indexar; no se conserva en memoria
+        df_local = df_local.drop(columns=["release"], errors="ignore")
+        items_final = catalogo.codificar(df_items_local).drop(columns=["release"], errors="ignore")
+        _huella_tablas(huella, df_local, items_final)
+    indice_final = indice.finalizar()
+    catalogo_final = catalogo.finalizar()
+    huella_final = _huella_tablas(huella, catalogo_final.etiquetas).hexdigest()
+    if PRECALENTAR:
+        # Con el dataset nuevo aún sin publicar: los usuarios siguen viendo el anterior
+        progreso_carga.cambiar_fase("precalentamiento")
+        precalentar_cache({
+            "df": df_local, "df_items": items_final, "catalogo": catalogo_final, "indice": indice_final,
+            "sqlite": _ruta_sqlite_temporal() if conn_sqlite is not None else SQLITE_PATH,
+            "generacion": _GENERACION_DATOS + 1,
+        })
+    if conn_sqlite is not None:
+        _publicar_sqlite()
+    df_items, indice_busqueda, catalogo_items = items_final, indice_final, catalogo_final
+    data = raw if raw is not None else {"releases": []}
+    df = df_local
+    _GENERACION_DATOS += 1
+    _HUELLA_DATOS = huella_final
+    cache_resultados.descartar_anteriores(_GENERACION_DATOS)
+    _DATOS_PARCIALES = False
+    _DATA_LOADED = True
+    _DATA_ERROR = None
+    TIEMPOS_CARGA["carga_completa_s"] = round(time.perf_counter() - inicio_carga, 3)
+    if TIEMPOS_CARGA["primera_vista_s"] is None:
+        TIEMPOS_CARGA["primera_vista_s"] = TIEMPOS_CARGA["carga_completa_s"]
+    # Sugerir GC explícito tras carga
+    try:
+        gc.collect()
+    except Exception:
+        pass
+    logging.info("Carga de datos completa. Filas=%d (backend=%s)", filas_cargadas(), OCDS_BACKEND)
+    progreso_carga.actualizar(filas=filas_cargadas())
+    progreso_carga.terminar()
+    logging.info("Tiempos de carga: primera vista %.1fs, carga completa %.1fs",
+                 TIEMPOS_CARGA["primera_vista_s"], TIEMPOS_CARGA["carga_completa_s"])
+    logging.info("Fases de carga: %s", ", ".join(
+        f"{fase} {seg:.1f}s" for fase, seg in progreso_carga.instantanea()["fases"].items()))
+
+def _normalizar_contratos(df_local):
+    """Agrega tipo de contratación, montos en millones y columnas de fecha; aplica downcast/categorías."""
+    df_local["tipo_contratacion"] = df_local.apply(
+        lambda r: detectar_tipo(r.get("tender_id"), r.get("titulo"), r.get("contrato_desc"), r.get("submission_details")),
+        axis=1
+    )
+    # Numéricos
+    df_local["monto"] = pd.to_numeric(df_local["monto"], errors="coerce").fillna(0.0)
+    df_local["monto_millones"] = df_local["monto"] / 1_000_000.0
+
+    # Precálculos de fecha: única columna datetime canónica + año/mes
+    agregar_columnas_fecha(df_local)
+
+    return _ajustar_tipos_contratos(df_local)
+
+def _ajustar_tipos_contratos(df_local):
+    """Downcast de montos y categorías de df principal (también tras unir lotes)."""
+    df_local["monto"] = pd.to_numeric(df_local["monto"], errors="coerce", downcast="float").fillna(0.0)
+    df_local["monto_millones"] = pd.to_numeric(df_local["monto_millones"], errors="coerce", downcast="float").fillna(0.0)
+    for col in ["licitante", "tipo_contratacion", "moneda"]:
+        if col in df_local.columns:
             try:
-                tender = rel.get("tender", {}) or {}
-                buyer = (rel.get("buyer", {}) or {}).get("name")
-                # Fecha/año similar a extraer_contratos
-                fecha = (
-                    tender.get("period", {}).get("startDate")
-                    or (rel.get("awards", [{}])[0].get("date") if rel.get("awards") else None)
-                    or (rel.get("contracts", [{}])[0].get("dateSigned") if rel.get("contracts") else None)
-                    or rel.get("date")
-                )
-                año = pd.to_datetime(fecha, errors="coerce").year if fecha else None
-                items_list = tender.get("items", []) or []
-                if not items_list:
-                    continue
-                # monto_millones: tomar por award (por compatibilidad con implementación previa)
-                monto_millones_rel = 0.0
-                awards = rel.get("awards", []) or []
-                for aw in awards:
-                    amt = aw.get("value", {}).get("amount")
-                    try:
-                        if amt is not None:
-                            monto_millones_rel += float(amt) / 1_000_000.0
-                    except Exception:
-                        pass
-                for it in items_list:
-                    codigo = (it.get("classification", {}) or {}).get("id") or it.get("id")
-                    descripcion = it.get("description")
-                    qty_raw = it.get("quantity")
-                    try:
-                        cantidad = float(qty_raw) if qty_raw is not None and str(qty_raw).strip() != "" else 0.0
-                    except Exception:
-                        cantidad = 0.0
-                    if codigo and descripcion:
-                        items_reg.append({
-                            "año": int(año) if año is not None else None,
-                            "Código": str(codigo),
-                            "Descripción corta": str(descripcion)[:80],
-                            "Licitante": buyer,
-                            "Monto (Millones)": float(monto_millones_rel or 0.0),
-                            "Cantidad": cantidad
-                        })
+                df_local[col] = df_local[col].astype("category")
             except Exception:
-                # Continuar si un release tiene formato inesperado
-                continue
-        df_items = pd.DataFrame(items_reg)
-        if not df_items.empty:
-            df_items["año"] = df_items["año"].astype("Int16")
-            df_items["Código"] = df_items["Código"].astype("string")
-            df_items["Descripción corta"] = df_items["Descripción corta"].astype("string")
+                pass
+    return df_local
+
+def _unir_lotes_contratos(lotes):
+    """Concatena lotes de contratos ya normalizados y restituye sus tipos."""
+    # infer_objects: un lote con una columna toda nula queda object y "contagia" al resto
+    return _ajustar_tipos_contratos(pd.concat(lotes, ignore_index=True).infer_objects())
+
+def _unir_lotes_items(lotes):
+    """Concatena lotes de ítems ya normalizados y restituye sus tipos."""
+    lotes = [l for l in lotes if not l.empty]
+    if not lotes:
+        return pd.DataFrame()
+    return _normalizar_items(pd.concat(lotes, ignore_index=True))
+
+def _publicar_parcial(lotes_contratos, lotes_items, last_n, inicio_carga, huella):
+    """Publica una instantánea parcial de la carga en streaming (tablas sin índice de búsqueda).
+
+    Las páginas ven una generación nueva y se redibujan con los años disponibles hasta el
+    momento. El índice de texto recién se construye al completar la carga. ``huella``
+    acumula los lotes ya publicados: solo se le agrega el último.
+    """
+    global df, df_items, catalogo_items, indice_busqueda, _GENERACION_DATOS, _DATOS_PARCIALES, _HUELLA_DATOS
+    parcial = _unir_lotes_contratos(lotes_contratos)
+    if last_n and last_n > 0 and parcial["año"].notna().any():
+        parcial = parcial[parcial["año"] >= int(parcial["año"].max()) - last_n + 1]
+    catalogo = CatalogoItems()
+    items_parciales = catalogo.codificar(_unir_lotes_items(lotes_items))
+    df = parcial.drop(columns=["release"], errors="ignore")
+    df_items = (items_parciales.drop(columns=["release"], errors="ignore")
+                if not items_parciales.empty else _DF_ITEMS_VACIO)
+    catalogo_items = catalogo.finalizar()
+    indice_busqueda = None
+    _DATOS_PARCIALES = True
+    _GENERACION_DATOS += 1
+    _HUELLA_DATOS = "parcial-" + _huella_tablas(huella, lotes_contratos[-1], lotes_items[-1]).hexdigest()
+    cache_resultados.descartar_anteriores(_GENERACION_DATOS)
+    if TIEMPOS_CARGA["primera_vista_s"] is None:
+        TIEMPOS_CARGA["primera_vista_s"] = round(time.perf_counter() - inicio_carga, 3)
+    logging.info("Publicación parcial: %d filas, años %s (%.1fs desde el inicio)", len(df),
+                 sorted(int(a) for a in df["año"].dropna().unique()), time.perf_counter() - inicio_carga)
+
+def _normalizar_items(df_items_local):
+    """Deriva ``año`` desde la fecha cruda de cada ítem y ajusta tipos de df_items."""
+    if df_items_local.empty:
+        return df_items_local
+    if "fecha" in df_items_local.columns:
+        df_items_local["año"] = parsear_fechas(df_items_local.pop("fecha")).dt.year
+    df_items_local["año"] = df_items_local["año"].astype("Int16")
+    df_items_local["Código"] = df_items_local["Código"].astype("string")
+    df_items_local["Descripción corta"] = df_items_local["Descripción corta"].astype("string")
+    try:
+        df_items_local["Licitante"] = df_items_local["Licitante"].astype("category")
+    except Exception:
+        pass
+    df_items_local["Monto (Millones)"] = pd.to_numeric(df_items_local["Monto (Millones)"], errors="coerce", downcast="float").fillna(0.0)
+    df_items_local["Cantidad"] = pd.to_numeric(df_items_local["Cantidad"], errors="coerce", downcast="float").fillna(0.0)
+    return df_items_local
+
+def _abrir_fuente_stream(ruta):
+    """Abre la fuente del JSON como flujo binario (HTTP con ``requests`` o archivo local)."""
+    import contextlib
+    ruta = ruta.strip().strip('"').strip("'")
+    if ruta.startswith("http"):
+        @contextlib.contextmanager
+        def _http():
+            headers = {"User-Agent": "OCDS-Mendoza-Dashboard/1.0"}
+            with requests.get(ruta, headers=headers, stream=True, timeout=60) as resp:
+                resp.raise_for_status()
+                resp.raw.decode_content = True
+                yield resp.raw
+        return _http()
+    return abrir_archivo_local(ruta)
+
+# ------------------------------------------------------
+# BACKEND DE ALMACENAMIENTO Y CONSULTAS (pandas / SQLite)
+# ------------------------------------------------------
+# Las páginas consultan los datos únicamente a través de las funciones ``consultar_*``.
+# Con OCDS_BACKEND=pandas operan sobre df/df_items en memoria; con OCDS_BACKEND=sqlite
+# empujan filtros, agrupaciones, top-N y paginación a SQL sobre el archivo SQLITE_PATH.
+# Ambos backends deben devolver los mismos resultados (ver scripts/paridad_backends.py).
+
+_SQL_ESQUEMA = (
+    """CREATE TABLE contratos (
+        fecha TEXT, "año" INTEGER, mes INTEGER, tender_id TEXT, titulo TEXT,
+        licitante TEXT, proveedor TEXT, monto REAL, monto_millones REAL, moneda TEXT,
+        tipo_contratacion TEXT, orden_compra TEXT, contrato_desc TEXT
+    )""",
+    """CREATE TABLE items (
+        "año" INTEGER, item_id INTEGER, "Licitante" TEXT, "Monto (Millones)" REAL, "Cantidad" REAL
+    )""",
+    """CREATE TABLE catalogo_items (
+        item_id INTEGER PRIMARY KEY, "Código" TEXT, "Descripción corta" TEXT, orden INTEGER
+    )""",
+)
+_SQL_INDICES = (
+    'CREATE INDEX ix_contratos_anio ON contratos ("año")',
+    "CREATE INDEX ix_contratos_licitante ON contratos (licitante)",
+    "CREATE INDEX ix_contratos_proveedor ON contratos (proveedor)",
+    "CREATE INDEX ix_contratos_tipo ON contratos (tipo_contratacion)",
+    'CREATE INDEX ix_items_anio ON items ("año")',
+)
+_COLUMNAS_SQLITE_CONTRATOS = [
+    "fecha", "año", "mes", "tender_id", "titulo", "licitante", "proveedor", "monto",
+    "monto_millones", "moneda", "tipo_contratacion", "orden_compra", "contrato_desc",
+]
+_COLUMNAS_SQLITE_ITEMS = ["año", "item_id", "Licitante", "Monto (Millones)", "Cantidad"]
+# Columnas visibles de Procesos -> columna interna (se ordena por el monto exacto, no el redondeado)
+_ORDEN_PROCESOS = {
+    "fecha": "fecha",
+    "Proceso": "tender_id",
+    "Título": "titulo",
+    "licitante": "licitante",
+    "proveedor": "proveedor",
+    "Orden de Compra": "orden_compra",
+    "Monto (Millones)": "monto_millones",
+}
+_METRICAS_INSUMOS = {"monto": "Monto (Millones)", "cantidad": "Cantidad"}
+_SQLITE_LOCAL = threading.local()
+
+def usar_sqlite():
+    """Indica si el backend configurado (``OCDS_BACKEND``) es SQLite."""
+    return OCDS_BACKEND == "sqlite"
+
+def _ruta_sqlite_temporal():
+    """Base en construcción de este proceso: cada worker de gunicorn carga por su cuenta y no
+    deben pisarse (ni publicar el archivo a medio escribir de otro)."""
+    return f"{SQLITE_PATH}.{os.getpid()}.tmp"
+
+def _abrir_sqlite_temporal():
+    """Crea una base SQLite temporal vacía junto a ``SQLITE_PATH`` para la carga en curso de este proceso."""
+    ruta_tmp = _ruta_sqlite_temporal()
+    if os.path.exists(ruta_tmp):
+        os.remove(ruta_tmp)
+    conn = sqlite3.connect(ruta_tmp, check_same_thread=False)
+    # Carga masiva: sin journal ni fsync (si falla, el archivo temporal se descarta)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    for ddl in _SQL_ESQUEMA:
+        conn.execute(ddl)
+    return conn
+
+def _volcar_lote_sqlite(conn, df_contratos, df_items_lote):
+    """Inserta un lote ya normalizado de contratos e ítems en la base temporal."""
+    if df_contratos is not None and not df_contratos.empty:
+        out = df_contratos.reindex(columns=_COLUMNAS_SQLITE_CONTRATOS)
+        # Mismo formato ISO que reconoce parsear_fechas (orden lexicográfico = cronológico)
+        out["fecha"] = out["fecha"].dt.strftime(_FORMATO_FECHA_ISO)
+        out.to_sql("contratos", conn, if_exists="append", index=False, chunksize=SQLITE_LOTE)
+    if df_items_lote is not None and not df_items_lote.empty:
+        out = df_items_lote.reindex(columns=_COLUMNAS_SQLITE_ITEMS)
+        out.to_sql("items", conn, if_exists="append", index=False, chunksize=SQLITE_LOTE)
+    conn.commit()
+
+def _finalizar_sqlite(conn, catalogo, last_n=0):
+    """Guarda el catálogo de insumos, aplica el recorte de años, crea índices y cierra la base temporal."""
+    try:
+        conn.executemany(
+            'INSERT INTO catalogo_items (item_id, "Código", "Descripción corta", orden) VALUES (?, ?, ?, ?)',
+            zip(range(len(catalogo)), catalogo.etiquetas["Código"].tolist(),
+                catalogo.etiquetas["Descripción corta"].tolist(), catalogo.orden.tolist()),
+        )
+        if last_n and last_n > 0:
+            max_year = conn.execute('SELECT MAX("año") FROM contratos').fetchone()[0]
+            if max_year is not None:
+                conn.execute('DELETE FROM contratos WHERE "año" IS NULL OR "año" < ?', (int(max_year) - last_n + 1,))
+        for ddl in _SQL_INDICES:
+            conn.execute(ddl)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+def _publicar_sqlite():
+    """Reemplaza la base publicada por la temporal recién finalizada."""
+    # Reemplazo atómico: las conexiones de lectura abiertas conservan la versión anterior
+    os.replace(_ruta_sqlite_temporal(), SQLITE_PATH)
+
+def _tablas():
+    """``(df, df_items, catalogo_items, indice_busqueda)`` que deben usar las consultas de este hilo.
+
+    Son los publicados, salvo en los hilos de precalentamiento (ver :func:`precalentar_cache`).
+    """
+    preparado = _preparado()
+    if preparado is not None:
+        return preparado["df"], preparado["df_items"], preparado["catalogo"], preparado["indice"]
+    return df, df_items, catalogo_items, indice_busqueda
+
+def _ruta_sqlite():
+    preparado = _preparado()
+    return preparado["sqlite"] if preparado else SQLITE_PATH
+
+def _conexion_sqlite():
+    """Conexión de solo lectura por hilo; se reabre cuando cambia la generación del dataset."""
+    conn = getattr(_SQLITE_LOCAL, "conn", None)
+    version = (generacion_vigente(), _ruta_sqlite())
+    if conn is None or getattr(_SQLITE_LOCAL, "generacion", None) != version:
+        if conn is not None:
             try:
-                df_items["Licitante"] = df_items["Licitante"].astype("category")
+                conn.close()
             except Exception:
                 pass
-            df_items["Monto (Millones)"] = pd.to_numeric(df_items["Monto (Millones)"], errors="coerce", downcast="float").fillna(0.0)
-            df_items["Cantidad"] = pd.to_numeric(df_items["Cantidad"], errors="coerce", downcast="float").fillna(0.0)
-
-        # Downcast/categorías en df principal
-        df_local["monto"] = pd.to_numeric(df_local["monto"], errors="coerce", downcast="float").fillna(0.0)
-        df_local["monto_millones"] = pd.to_numeric(df_local["monto_millones"], errors="coerce", downcast="float").fillna(0.0)
-        for col in ["licitante", "tipo_contratacion", "moneda"]:
-            if col in df_local.columns:
-                try:
-                    df_local[col] = df_local[col].astype("category")
-                except Exception:
-                    pass
+        uri = pathlib.Path(version[1]).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        _SQLITE_LOCAL.conn = conn
+        _SQLITE_LOCAL.generacion = version
+    return conn
+
+def _sql(consulta, params=()):
+    """Ejecuta una consulta de lectura y devuelve un DataFrame."""
+    return pd.read_sql_query(consulta, _conexion_sqlite(), params=list(params))
+
+def _sqlite_disponible():
+    return generacion_vigente() > 0 and os.path.exists(_ruta_sqlite())
+
+# (generación, filas de contratos): en SQLite el COUNT recorre toda la tabla y /health,
+# /ready y cada página preguntan por él, así que se cuenta una vez por generación
+_CONTEO_CONTRATOS = (None, 0)
+
+def filas_cargadas():
+    """Cantidad de filas de contratos del dataset vigente (según el backend activo)."""
+    global _CONTEO_CONTRATOS
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return 0
+        # Tupla reemplazada de una vez: el hilo que precalienta cuenta otra generación
+        generacion, filas = _CONTEO_CONTRATOS
+        if generacion != generacion_vigente():
+            generacion = generacion_vigente()
+            filas = int(_conexion_sqlite().execute("SELECT COUNT(*) FROM contratos").fetchone()[0])
+            _CONTEO_CONTRATOS = (generacion, filas)
+        return filas
+    return int(len(_tablas()[0]))
+
+def consultar_años():
+    """Años con datos, en orden ascendente.
+
+    Retorna
+    -------
+    list[int]
+        Lista de años (vacía si aún no hay datos).
+    """
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return []
+        res = _conexion_sqlite().execute('SELECT DISTINCT "año" FROM contratos WHERE "año" IS NOT NULL ORDER BY 1').fetchall()
+        return [int(r[0]) for r in res]
+    return [int(a) for a in sorted(_tablas()[0]["año"].dropna().unique())]
+
+def consultar_rango_fechas():
+    """Fechas mínima y máxima del dataset (``(NaT, NaT)`` si no hay datos)."""
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return pd.NaT, pd.NaT
+        fmin, fmax = _conexion_sqlite().execute("SELECT MIN(fecha), MAX(fecha) FROM contratos").fetchone()
+        rango = parsear_fechas(pd.Series([fmin, fmax]))
+        return rango.iloc[0], rango.iloc[1]
+    frame = _tablas()[0]
+    if frame.empty:
+        return pd.NaT, pd.NaT
+    return frame["fecha"].min(), frame["fecha"].max()
+
+def consultar_opciones_procesos():
+    """Listas ordenadas de compradores, proveedores y tipos para los filtros de Procesos.
+
+    Retorna
+    -------
+    tuple[list[str], list[str], list[str]]
+        ``(compradores, proveedores, tipos)``.
+    """
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return [], [], []
+        conn = _conexion_sqlite()
+        def _distintos(col):
+            return [r[0] for r in conn.execute(f"SELECT DISTINCT {col} FROM contratos WHERE {col} IS NOT NULL ORDER BY 1")]
+        return _distintos("licitante"), _distintos("proveedor"), _distintos("tipo_contratacion")
+    frame = _tablas()[0]
+    compradores = sorted([x for x in frame["licitante"].dropna().unique()])
+    proveedores = sorted([x for x in frame["proveedor"].dropna().unique()])
+    tipos = sorted([x for x in frame["tipo_contratacion"].dropna().unique()])
+    return compradores, proveedores, tipos
+
+def _top_por(frame, col, n):
+    """Suma ``monto_millones`` por ``col`` y devuelve los ``n`` mayores (empates por nombre)."""
+    top = frame.groupby(col, as_index=False, observed=True)["monto_millones"].sum()
+    top[col] = top[col].astype(object)
+    return top.sort_values(["monto_millones", col], ascending=[False, True], kind="stable").head(n).reset_index(drop=True)
+
+def consultar_home(año):
+    """Agregados que muestra la página Home para un año.
+
+    Parámetros
+    ----------
+    año : int
+        Año seleccionado.
+
+    Retorna
+    -------
+    dict[str, pandas.DataFrame]
+        ``totales`` (por tipo), ``mensual`` (por mes), ``top10`` (licitantes del año),
+        ``top20`` (licitantes de todos los años) y ``top30`` (montos más altos del año).
+    """
+    cols_top30 = ["fecha", "tender_id", "titulo", "licitante", "proveedor", "monto_millones"]
+    if usar_sqlite():
+        a = int(año)
+        top30 = _sql(
+            f"SELECT {', '.join(cols_top30)} FROM contratos WHERE \"año\" = ? ORDER BY monto DESC, rowid LIMIT 30", (a,)
+        )
+        top30["fecha"] = parsear_fechas(top30["fecha"])
+        return {
+            "totales": _sql(
+                'SELECT tipo_contratacion, SUM(monto_millones) AS monto_millones FROM contratos '
+                'WHERE "año" = ? GROUP BY tipo_contratacion ORDER BY tipo_contratacion', (a,)
+            ),
+            "mensual": _sql(
+                'SELECT mes, SUM(monto_millones) AS total_monto FROM contratos '
+                'WHERE "año" = ? AND mes IS NOT NULL GROUP BY mes ORDER BY mes', (a,)
+            ),
+            "top10": _sql(
+                'SELECT licitante, SUM(monto_millones) AS monto_millones FROM contratos '
+                'WHERE "año" = ? AND licitante IS NOT NULL GROUP BY licitante '
+                'ORDER BY monto_millones DESC, licitante LIMIT 10', (a,)
+            ),
+            "top20": _sql(
+                'SELECT licitante, SUM(monto_millones) AS monto_millones FROM contratos '
+                'WHERE licitante IS NOT NULL GROUP BY licitante '
+                'ORDER BY monto_millones DESC, licitante LIMIT 20'
+            ),
+            "top30": top30,
+        }
+    frame = _tablas()[0]
+    df_f = frame[frame["año"] == año]
+    totales = df_f.groupby("tipo_contratacion", as_index=False, observed=True)["monto_millones"].sum()
+    totales["tipo_contratacion"] = totales["tipo_contratacion"].astype(object)
+    return {
+        "totales": totales,
+        # 'mes' se precalcula en la carga (agregar_columnas_fecha)
+        "mensual": df_f.groupby("mes", as_index=False).agg(total_monto=("monto_millones", "sum")),
+        "top10": _top_por(df_f, "licitante", 10),
+        "top20": _top_por(frame, "licitante", 20),
+        "top30": df_f.sort_values("monto", ascending=False, kind="stable").head(30)[cols_top30].reset_index(drop=True),
+    }
+
+def consultar_insumos(año, medida="monto", vista="agregado"):
+    """Top 20 de insumos de un año según medida y vista.
+
+    Parámetros
+    ----------
+    año : int
+        Año seleccionado.
+    medida : str
+        ``"monto"`` o ``"cantidad"``.
+    vista : str
+        ``"agregado"`` (por ítem) o ``"detalle"`` (por ítem y licitante).
+
+    Retorna
+    -------
+    dict[str, pandas.DataFrame] | None
+        ``tabla`` (Top 20 según la vista, columna ``Valor``), ``items`` (Top 20 ítems por
+        total agregado) y, en vista detalle, ``detalle`` (esos ítems desagregados por
+        licitante). ``None`` si no hay ítems para el año.
+    """
+    metric_col = _METRICAS_INSUMOS.get(medida, "Monto (Millones)")
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return None
+        a = int(año)
+        if _conexion_sqlite().execute('SELECT 1 FROM items WHERE "año" = ? LIMIT 1', (a,)).fetchone() is None:
+            return None
+        m = f'"{metric_col}"'
+        # Agrupación por item_id entero; las etiquetas se unen al final desde catalogo_items
+        top_ids = (
+            f'SELECT t.item_id, t."Valor", c.orden FROM (SELECT item_id, SUM({m}) AS "Valor" FROM items '
+            'WHERE "año" = ? GROUP BY item_id) t JOIN catalogo_items c USING (item_id) '
+            'ORDER BY t."Valor" DESC, c.orden LIMIT 20'
+        )
+        res = {"items": _sql(
+            f'SELECT c."Código", c."Descripción corta", t."Valor" FROM ({top_ids}) t '
+            'JOIN catalogo_items c USING (item_id) ORDER BY t."Valor" DESC, t.orden', (a,)
+        )}
+        if vista == "detalle":
+            res["tabla"] = _sql(
+                'SELECT c."Código", c."Descripción corta", t."Licitante", t."Valor" FROM ('
+                f'SELECT item_id, "Licitante", SUM({m}) AS "Valor" FROM items WHERE "año" = ? AND "Licitante" IS NOT NULL '
+                'GROUP BY item_id, "Licitante") t JOIN catalogo_items c USING (item_id) '
+                'ORDER BY t."Valor" DESC, c.orden, t."Licitante" LIMIT 20', (a,)
+            )
+            res["detalle"] = _sql(
+                'SELECT c."Código", c."Descripción corta", i."Licitante", SUM(i.' + m + ') AS "Valor" '
+                f'FROM items i JOIN ({top_ids}) t USING (item_id) JOIN catalogo_items c USING (item_id) '
+                'WHERE i."año" = ? AND i."Licitante" IS NOT NULL GROUP BY i.item_id, i."Licitante" '
+                'ORDER BY c.orden, i."Licitante"', (a, a)
+            )
+        else:
+            res["tabla"] = res["items"]
+        return res
+    _, items, catalogo, _ = _tablas()
+    df_items_year = items[items["año"] == año]
+    if df_items_year.empty:
+        return None
+    ids = df_items_year["item_id"].to_numpy(dtype=np.int64)
+    # Si la columna de la métrica no existe (datasets previos), usar ceros
+    if metric_col in df_items_year.columns:
+        valores = df_items_year[metric_col].to_numpy(dtype=np.float64)
+    else:
+        valores = np.zeros(len(ids))
+    # Totales por insumo con bincount sobre ids densos (sin hashear texto)
+    totales = np.bincount(ids, weights=valores, minlength=len(catalogo))
+    presentes = np.flatnonzero(np.bincount(ids, minlength=len(catalogo)))
+    top = presentes[_top_n(totales[presentes], catalogo.orden[presentes])]
+    top_items = catalogo.etiquetar(top, {"Valor": totales[top]})
+    res = {"items": top_items, "tabla": top_items}
+    if vista == "detalle":
+        # Licitante como código de categoría; los nulos (-1) se descartan
+        licitantes = df_items_year["Licitante"].astype("category")
+        cod_lic = licitantes.cat.codes.to_numpy(dtype=np.int64)
+        nombres_lic = licitantes.cat.categories.astype(object).to_numpy()
+        rango_lic = np.empty(len(nombres_lic), dtype=np.int64)
+        rango_lic[np.argsort(nombres_lic.astype(str), kind="stable")] = np.arange(len(nombres_lic))
+        validos = cod_lic >= 0
+        # Reducción ordenada sobre la clave compuesta (orden del insumo, orden del licitante)
+        clave = catalogo.orden[ids[validos]].astype(np.int64) * max(len(nombres_lic), 1) + rango_lic[cod_lic[validos]]
+        unicas, inversa = np.unique(clave, return_inverse=True)
+        sumas = np.bincount(inversa, weights=valores[validos], minlength=len(unicas))
+        # Reconstruir item_id y licitante de cada grupo a partir de la clave
+        por_orden = np.empty(len(catalogo), dtype=np.int64)
+        por_orden[catalogo.orden] = np.arange(len(catalogo))
+        lic_por_rango = np.empty(len(nombres_lic), dtype=object)
+        lic_por_rango[rango_lic] = nombres_lic
+        grupo_item = por_orden[unicas // max(len(nombres_lic), 1)]
+        grupo_lic = unicas % max(len(nombres_lic), 1)
+        # Los grupos ya están en orden (insumo, licitante): el desempate es su posición
+        sel = _top_n(sumas, np.arange(len(sumas)))
+        res["tabla"] = catalogo.etiquetar(
+            grupo_item[sel], {"Licitante": lic_por_rango[grupo_lic[sel]], "Valor": sumas[sel]}
+        )
+        # Detalle por licitante solo para los Top 20 insumos, en orden (insumo, licitante)
+        en_top = np.isin(grupo_item, top)
+        res["detalle"] = catalogo.etiquetar(
+            grupo_item[en_top], {"Licitante": lic_por_rango[grupo_lic[en_top]], "Valor": sumas[en_top]}
+        )
+    return res
+
+def buscar_filas(consulta, prefijo=True):
+    """Filas de contratos que coinciden con una búsqueda de texto.
+
+    Parámetros
+    ----------
+    consulta : str | None
+        Palabras a buscar en títulos, descripciones de contrato e ítems.
+    prefijo : bool
+        Si cada término coincide también como prefijo.
+
+    Retorna
+    -------
+    numpy.ndarray | None
+        Posiciones de fila ordenadas, o ``None`` si no hay consulta (sin filtro).
+    """
+    if not consulta or not str(consulta).strip():
+        return None
+    indice = _tablas()[3]
+    if indice is None:
+        return np.empty(0, dtype=np.int32)
+    return indice.buscar(consulta, prefijo=prefijo)
+
+def _orden_procesos(sort_by):
+    """``sort_by`` del DataTable como lista de ``(columna interna, ascendente)``."""
+    orden = []
+    for s in (sort_by or []):
+        col = _ORDEN_PROCESOS.get(s.get("column_id"))
+        if col:
+            orden.append((col, s.get("direction", "asc") == "asc"))
+    return orden
+
+def _consulta_sql_procesos(año, comprador, proveedor, tipo, orden, filas):
+    """``(where, params, order by, select)`` de la consulta de procesos en SQLite."""
+    where, params = [], []
+    if año is not None:
+        where.append('"año" = ?')
+        params.append(int(año))
+    if filas is not None:
+        # Las posiciones del índice corresponden a rowid - 1
+        where.append("rowid IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps((filas.astype(np.int64) + 1).tolist()))
+    for col, valor in (("licitante", comprador), ("proveedor", proveedor), ("tipo_contratacion", tipo)):
+        if valor:
+            where.append(f"{col} = ?")
+            params.append(valor)
+    # Nulos al final en ambos sentidos (igual que pandas); rowid conserva el orden original en empates
+    order_sql = ", ".join(f"({c} IS NULL), {c} {'ASC' if asc else 'DESC'}" for c, asc in orden)
+    order_sql = (order_sql + ", rowid") if order_sql else "rowid"
+    select_sql = ", ".join(f'{interna} AS "{visible}"' for visible, interna in _ORDEN_PROCESOS.items())
+    return " AND ".join(where) or "1", params, order_sql, select_sql
+
+def _posiciones_procesos(frame, año, comprador, proveedor, tipo, orden, filas):
+    """Posiciones de ``frame`` que cumplen los filtros, en el orden pedido.
+
+    Solo se materializan las posiciones (y las columnas de orden, si hay orden), no las
+    filas: las páginas y la exportación toman después los tramos que necesitan.
+    """
+    if filas is not None:
+        mascara = np.zeros(len(frame), dtype=bool)
+        mascara[filas] = True
+    else:
+        mascara = np.ones(len(frame), dtype=bool)
+    for col, valor in (("año", año), ("licitante", comprador), ("proveedor", proveedor), ("tipo_contratacion", tipo)):
+        if valor is not None and (col == "año" or valor):
+            mascara &= (frame[col] == valor).to_numpy(dtype=bool, na_value=False)
+    posiciones = np.flatnonzero(mascara)
+    if orden and posiciones.size:
+        try:
+            claves = frame[[c for c, _ in orden]].iloc[posiciones].reset_index(drop=True)
+            # mergesort para estabilidad cuando hay empates
+            claves = claves.sort_values(by=[c for c, _ in orden], ascending=[a for _, a in orden], kind="mergesort")
+            posiciones = posiciones[claves.index.to_numpy()]
+        except Exception:
+            # Si algo falla, no interrumpimos la UI
+            pass
+    return posiciones
+
+def _filas_visibles(frame, posiciones):
+    """Filas ``posiciones`` de ``frame`` con las columnas visibles de Procesos."""
+    pagina = frame.iloc[posiciones].reindex(columns=list(_ORDEN_PROCESOS.values()))
+    pagina.columns = list(_ORDEN_PROCESOS)
+    return pagina.reset_index(drop=True)
+
+def consultar_procesos(año, comprador=None, proveedor=None, tipo=None, sort_by=None, page_current=0, page_size=20,
+                       busqueda=None, prefijo=True):
+    """Página de procesos filtrados y ordenados, más el total de coincidencias.
+
+    Parámetros
+    ----------
+    año : int | None
+        Año a filtrar (``None`` para todos los años).
+    comprador, proveedor, tipo : str | None
+        Filtros opcionales por igualdad.
+    busqueda : str | None
+        Texto libre a buscar con el índice invertido (ver :func:`buscar_filas`).
+    prefijo : bool
+        Coincidencia por prefijo de cada término de ``busqueda``.
+    sort_by : list[dict] | None
+        Orden del DataTable (``column_id``/``direction``); los nulos van al final.
+    page_current, page_size : int
+        Página (base 0) y tamaño de página a devolver.
+
+    Retorna
+    -------
+    tuple[pandas.DataFrame, int]
+        Filas de la página con las columnas visibles (``fecha`` como datetime y el
+        monto sin redondear) y la cantidad total de filas que cumplen los filtros.
+    """
+    inicio = max(0, int(page_current or 0)) * int(page_size)
+    orden = _orden_procesos(sort_by)
+    filas = buscar_filas(busqueda, prefijo)
+    if filas is not None and filas.size == 0:
+        return pd.DataFrame(columns=list(_ORDEN_PROCESOS)), 0
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return pd.DataFrame(columns=list(_ORDEN_PROCESOS)), 0
+        where_sql, params, order_sql, select_sql = _consulta_sql_procesos(año, comprador, proveedor, tipo, orden, filas)
+        total = int(_conexion_sqlite().execute(f"SELECT COUNT(*) FROM contratos WHERE {where_sql}", params).fetchone()[0])
+        pagina = _sql(
+            f"SELECT {select_sql} FROM contratos WHERE {where_sql} ORDER BY {order_sql} LIMIT ? OFFSET ?",
+            params + [int(page_size), inicio],
+        )
+        pagina["fecha"] = parsear_fechas(pagina["fecha"])
+        return pagina, total
+    frame = _tablas()[0]
+    posiciones = _posiciones_procesos(frame, año, comprador, proveedor, tipo, orden, filas)
+    return _filas_visibles(frame, posiciones[inicio:inicio + int(page_size)]), int(posiciones.size)
+
+def iterar_procesos(año=None, comprador=None, proveedor=None, tipo=None, sort_by=None, busqueda=None, prefijo=True,
+                    tamano_lote=None):
+    """Todos los procesos que cumplen los filtros, en lotes de filas y en el orden pedido.
+
+    Mismos filtros y orden que :func:`consultar_procesos`, sin paginar. Cada lote se arma
+    recién cuando se pide (pandas: tramo de posiciones; SQLite: ``fetchmany`` sobre un
+    cursor), así que la memoria no crece con el tamaño del resultado. El dataset se fija
+    al empezar: una recarga a mitad de camino no mezcla versiones.
+
+    Parámetros
+    ----------
+    tamano_lote : int | None
+        Filas por lote (por defecto ``OCDS_EXPORT_BATCH``).
+
+    Retorna
+    -------
+    Iterator[pandas.DataFrame]
+        Lotes con las columnas visibles de Procesos (``fecha`` datetime, monto exacto).
+    """
+    tamano_lote = max(1, int(tamano_lote or LOTE_EXPORTACION))
+    orden = _orden_procesos(sort_by)
+    filas = buscar_filas(busqueda, prefijo)
+    if filas is not None and filas.size == 0:
+        return
+    if usar_sqlite():
+        if not _sqlite_disponible():
+            return
+        where_sql, params, order_sql, select_sql = _consulta_sql_procesos(año, comprador, proveedor, tipo, orden, filas)
+        cursor = _conexion_sqlite().execute(
+            f"SELECT {select_sql} FROM contratos WHERE {where_sql} ORDER BY {order_sql}", params)
+        try:
+            while True:
+                registros = cursor.fetchmany(tamano_lote)
+                if not registros:
+                    break
+                lote = pd.DataFrame.from_records(registros, columns=list(_ORDEN_PROCESOS))
+                lote["fecha"] = parsear_fechas(lote["fecha"])
+                yield lote
+        finally:
+            cursor.close()
+        return
+    frame = _tablas()[0]
+    posiciones = _posiciones_procesos(frame, año, comprador, proveedor, tipo, orden, filas)
+    for inicio in range(0, posiciones.size, tamano_lote):
+        yield _filas_visibles(frame, posiciones[inicio:inicio + tamano_lote])
+
+def ensure_data_loaded(force: bool = False):
+    """Garantiza que los datos estén cargados (lazy si LAZY_LOAD=1)."""
+    global _DATA_LOADED, _DATA_ERROR
+    if SPHINX_BUILD:
+        return
+    if _DATA_LOADED and not force:
+        return
+    with _DATA_LOCK:
+        if _DATA_LOADED and not force:
+            return
+        antes = None
+        if _GENERACION_DATOS:
+            try:
+                antes = medir_antes_de_recarga()
+            except Exception:
+                logging.debug("No se pudo medir la memoria antes de la recarga", exc_info=True)
+        try:
+            _cargar_datos_internamente()
+            metricas.incrementar("ocds_loads_total", result="ok")
+            if antes is not None:
+                registrar_despues_de_recarga(antes)
+        except Exception as e:
+            _DATA_ERROR = str(e)
+            progreso_carga.terminar(error=_DATA_ERROR)
+            metricas.incrementar("ocds_loads_total", result="error")
+            logging.exception("Fallo al cargar datos OCDS (se usará DataFrame vacío)")
+
+# Cargas en segundo plano (arranque con BACKGROUND_LOAD=1 y botón de recarga): corren en
+# este proceso (actualizan los datos globales) en un único hilo dedicado, nunca en el hilo
+# de un request ni en un proceso hijo del gestor de trabajos.
+_EJECUTOR_CARGA = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocds-carga")
+_CARGA_EN_CURSO = None
+_CARGA_LOCK = threading.Lock()
+
+def iniciar_carga_en_segundo_plano(force=True):
+    """Encola una carga si no hay otra en curso y devuelve su ``Future``.
+
+    Parámetros
+    ----------
+    force : bool
+        Recargar aunque ya haya datos (``False`` en el arranque).
+    """
+    global _CARGA_EN_CURSO
+    with _CARGA_LOCK:
+        if _CARGA_EN_CURSO is None or _CARGA_EN_CURSO.done():
+            _CARGA_EN_CURSO = _EJECUTOR_CARGA.submit(ensure_data_loaded, force=force)
+        return _CARGA_EN_CURSO
+
+def carga_en_curso():
+    """Indica si hay una carga en segundo plano sin terminar."""
+    carga = _CARGA_EN_CURSO
+    return carga is not None and not carga.done()
+
+# ------------------------------------------------------
+# COORDINACIÓN DE RECARGAS (/reload-data y botón de recarga)
+# ------------------------------------------------------
+# Una recarga completa consume CPU y red durante minutos: las solicitudes se unen a la
+# recarga en curso, no se admite otra hasta pasado un enfriamiento desde la última carga
+# y cada cliente tiene un límite de solicitudes por minuto. OCDS_RELOAD_TOKEN (opcional)
+# protege el endpoint con un secreto compartido (cabecera X-Reload-Token); el botón de la
+# UI no lo requiere.
+try:
+    RECARGA_ENFRIAMIENTO = max(0.0, float(os.getenv("OCDS_RELOAD_COOLDOWN", "300")))  # segundos
+    RECARGA_POR_MINUTO = max(1, int(os.getenv("OCDS_RELOAD_RATE", "6")))  # solicitudes por cliente
+    PROXIES_CONFIABLES = max(0, int(os.getenv("OCDS_TRUSTED_PROXIES", "0")))  # Render: 1
+except Exception:
+    RECARGA_ENFRIAMIENTO, RECARGA_POR_MINUTO, PROXIES_CONFIABLES = 300.0, 6, 0
+RECARGA_TOKEN = (os.getenv("OCDS_RELOAD_TOKEN") or "").strip() or None
+_RECARGA_ESPERA_MAX = 120  # segundos que /reload-data?esperar=1 retiene el request
+
+def cliente_http():
+    """Identifica al cliente del request actual (IP; detrás de proxies confiables, la que informan)."""
+    ruta = flask.request.access_route if PROXIES_CONFIABLES else []
+    if len(ruta) >= PROXIES_CONFIABLES > 0:
+        return ruta[-PROXIES_CONFIABLES]
+    return flask.request.remote_addr or "desconocido"
+
+def _iso_epoch(instante):
+    return None if instante is None else time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(instante))
+
+class CoordinadorRecargas:
+    """Admite, deduplica y limita las recargas pedidas por HTTP o desde la UI.
+
+    Parámetros
+    ----------
+    enfriamiento : float
+        Segundos mínimos entre el fin de una carga exitosa y el inicio de la siguiente
+        (tras una carga fallida se puede reintentar enseguida).
+    por_minuto : int
+        Solicitudes admitidas por cliente en una ventana deslizante de 60 s.
+    """
+
+    _VENTANA = 60.0
+
+    def __init__(self, enfriamiento, por_minuto):
+        self.enfriamiento = enfriamiento
+        self.por_minuto = por_minuto
+        self._lock = threading.Lock()
+        self._solicitudes = {}  # cliente -> instantes (monotonic) de sus últimas solicitudes
+        self.ultimo_origen = None
+
+    def _limite_cliente(self, cliente, ahora):
+        """Registra la solicitud; retorna segundos de espera si el cliente superó su cupo."""
+        desde = ahora - self._VENTANA
+        if len(self._solicitudes) > 10000:
+            # Olvidar clientes sin solicitudes recientes (acota la memoria ante muchos orígenes)
+            self._solicitudes = {c: t for c, t in self._solicitudes.items() if t and t[-1] > desde}
+        instantes = [t for t in self._solicitudes.get(cliente, []) if t > desde]
+        if len(instantes) >= self.por_minuto:
+            self._solicitudes[cliente] = instantes
+            return instantes[0] + self._VENTANA - ahora
+        instantes.append(ahora)
+        self._solicitudes[cliente] = instantes
+        return None
+
+    def solicitar(self, cliente, origen):
+        """Pide una recarga en nombre de ``cliente``.
 
-        # Ya no guardamos columnas pesadas; mantener solo columnas necesarias
-    data = raw if raw is not None else {"releases": []}
-    df = df_local
-    _DATA_LOADED = True
-    _DATA_ERROR = None
-    # Sugerir GC explícito tras carga
-    try:
-        gc.collect()
-    except Exception:
-        pass
-    logging.info("Carga de datos completa. Filas=%d", len(df))
+        Retorna
+        -------
+        tuple[str, float | None]
+            ``(resultado, espera)`` con ``resultado`` en ``"iniciada"``, ``"en_curso"``
+            (se unió a la recarga que ya corría), ``"enfriamiento"`` o ``"limitada"``
+            (cupo del cliente agotado); ``espera`` son los segundos sugeridos para reintentar.
+        """
+        with self._lock:
+            espera = self._limite_cliente(cliente, time.monotonic())
+            if espera is not None:
+                return "limitada", round(espera, 1)
+            if carga_en_curso() or progreso_carga.estado == "en_curso":
+                return "en_curso", None
+            fin = progreso_carga.completada_en
+            resto = self.enfriamiento - (time.time() - fin) if fin else 0
+            if resto > 0:
+                return "enfriamiento", round(resto, 1)
+            iniciar_carga_en_segundo_plano(force=True)
+            self.ultimo_origen = origen
+            logging.info("Recarga iniciada (origen=%s, cliente=%s)", origen, cliente)
+            return "iniciada", None
 
-def ensure_data_loaded(force: bool = False):
-    """Garantiza que los datos estén cargados (lazy si LAZY_LOAD=1)."""
-    global _DATA_LOADED, _DATA_ERROR
-    if SPHINX_BUILD:
-        return
-    if _DATA_LOADED and not force:
-        return
-    with _DATA_LOCK:
-        if _DATA_LOADED and not force:
-            return
-        try:
-            _cargar_datos_internamente()
-        except Exception as e:
-            _DATA_ERROR = str(e)
-            logging.exception("Fallo al cargar datos OCDS (se usará DataFrame vacío)")
+    def estado(self):
+        """Estado de la recarga en curso o de la última: tiempos, filas, error y progreso."""
+        p = progreso_carga
+        exito = p.completada_en
+        return {
+            "estado": "en_curso" if carga_en_curso() else p.estado,  # encolada aún sin arrancar
+            "origen": self.ultimo_origen,
+            "iniciada": _iso_epoch(p.iniciada_en),
+            "finalizada": _iso_epoch(p.finalizada_en),
+            "proxima_posible_en_s": max(0.0, round(self.enfriamiento - (time.time() - exito), 1)) if exito else 0.0,
+            "rows": filas_cargadas(),
+            "generacion": _GENERACION_DATOS,
+            "error": _DATA_ERROR,
+            "progreso": p.instantanea(),
+        }
 
-# Carga inmediata salvo que estemos en build de docs o modo lazy
-if not SPHINX_BUILD and not LAZY_LOAD:
-    ensure_data_loaded()
+coordinador_recargas = CoordinadorRecargas(RECARGA_ENFRIAMIENTO, RECARGA_POR_MINUTO)
 
 # Endpoint opcional para forzar recarga manual (útil en PaaS si falló al inicio)
 @app.server.route('/reload-data')
 def reload_data_route():
-    if SPHINX_BUILD:
-        # Si el navegador pide HTML, devolvemos una pequeña página informativa
-        if 'text/html' in flask.request.headers.get('Accept', ''):
-            return (
-                """
-                <html><body style='font-family:system-ui'>
-                <h3>Recarga de datos</h3>
-                <p>Modo SPHINX_BUILD activo: no se carga dataset.</p>
-                <p><a href='/'>Volver al inicio</a></p>
-                </body></html>
-                """,
-                200,
-                {"Content-Type": "text/html"}
-            )
-        return flask.jsonify(message="Modo SPHINX_BUILD: no se carga dataset"), 200
-    ensure_data_loaded(force=True)
-    if _DATA_ERROR:
-        if 'text/html' in flask.request.headers.get('Accept', ''):
-            return (
-                f"""
-                <html><body style='font-family:system-ui'>
-                <h3>Recarga de datos</h3>
-                <p style='color:#b00020'>Error: {_DATA_ERROR}</p>
-                <p><a href='/'>Volver al inicio</a></p>
-                </body></html>
-                """,
-                500,
-                {"Content-Type": "text/html"}
-            )
-        return flask.jsonify(status="error", error=_DATA_ERROR), 500
-    # OK
-    if 'text/html' in flask.request.headers.get('Accept', ''):
+    """Pide una recarga del dataset sin bloquear (salvo ``?esperar=1``) y devuelve su estado.
+
+    Códigos: ``202`` recarga iniciada o en curso (la solicitud se une a ella), ``200``
+    recarga terminada (``esperar=1``) o en enfriamiento (``status="enfriamiento"``), ``403``
+    token inválido, ``429`` cupo del cliente agotado y ``500`` si la recarga esperada falló.
+    """
+    html_pedido = 'text/html' in flask.request.headers.get('Accept', '')
+
+    def responder(codigo, cabeceras=None, **cuerpo):
+        if not html_pedido:
+            return flask.jsonify(**cuerpo), codigo, cabeceras or {}
+        color = "#b00020" if codigo >= 400 else "inherit"
+        detalle = cuerpo.get("mensaje", "")
         return (
             f"""
             <html><body style='font-family:system-ui'>
             <h3>Recarga de datos</h3>
-            <p>Recarga completada. Filas: {len(df)}</p>
-            <p><a href='/'>Volver al inicio</a></p>
+            <p style='color:{color}'>{html_escape(detalle)}</p>
+            <p><a href='/progreso-carga'>Ver progreso</a> · <a href='/'>Volver al inicio</a></p>
             </body></html>
             """,
-            200,
-            {"Content-Type": "text/html"}
+            codigo,
+            dict(cabeceras or {}, **{"Content-Type": "text/html"}),
         )
-    return flask.jsonify(status="ok", rows=len(df)), 200
+
+    if SPHINX_BUILD:
+        return responder(200, status="sphinx", mensaje="Modo SPHINX_BUILD: no se carga dataset")
+    if RECARGA_TOKEN:
+        # Solo en cabecera: en la URL quedaría en logs de acceso, historial y Referer
+        enviado = flask.request.headers.get("X-Reload-Token") or ""
+        if not hmac.compare_digest(enviado.encode("utf-8"), RECARGA_TOKEN.encode("utf-8")):
+            return responder(403, status="error", error="Token de recarga inválido", mensaje="Token de recarga inválido")
+    resultado, espera = coordinador_recargas.solicitar(cliente_http(), "endpoint")
+    if resultado == "limitada":
+        return responder(429, {"Retry-After": str(int(espera) + 1)}, status="limitada", reintentar_en_s=espera,
+                         mensaje=f"Demasiadas solicitudes; reintentar en {espera:.0f}s")
+    if resultado == "enfriamiento":
+        return responder(200, {"Retry-After": str(int(espera) + 1)}, status="enfriamiento", reintentar_en_s=espera,
+                         recarga=coordinador_recargas.estado(),
+                         mensaje=f"Los datos se cargaron hace poco; próxima recarga posible en {espera:.0f}s. "
+                                 f"Filas: {filas_cargadas()}")
+    if flask.request.args.get("esperar") in ("1", "true", "True") and _CARGA_EN_CURSO is not None:
+        try:
+            _CARGA_EN_CURSO.result(timeout=_RECARGA_ESPERA_MAX)
+        except Exception:
+            pass  # timeout: se informa el estado en curso
+        if not carga_en_curso():
+            if _DATA_ERROR:
+                return responder(500, status="error", error=_DATA_ERROR, recarga=coordinador_recargas.estado(),
+                                 mensaje=f"Error: {_DATA_ERROR}")
+            return responder(200, status="ok", rows=filas_cargadas(), recarga=coordinador_recargas.estado(),
+                             mensaje=f"Recarga completada. Filas: {filas_cargadas()}")
+    return responder(202, status=resultado, recarga=coordinador_recargas.estado(),
+                     mensaje="Recarga iniciada." if resultado == "iniciada" else "Ya hay una recarga en curso.")
+
+# Búsqueda de texto para otras aplicaciones: /api/buscar?q=combustible&anio=2025&prefijo=1&limite=50&pagina=0
+@app.server.route('/api/buscar')
+def api_buscar():
+    """Busca procesos por palabras clave en títulos, descripciones de contrato e ítems.
+
+    Parámetros (query string): ``q`` (obligatorio), ``anio`` (opcional), ``prefijo``
+    (``1`` por defecto), ``limite`` (1-500, por defecto 50) y ``pagina`` (base 0).
+    Retorna un JSON con ``total`` de coincidencias y ``resultados`` de la página.
+    """
+    args = flask.request.args
+    consulta = (args.get("q") or "").strip()
+    if not consulta:
+        return flask.jsonify(status="error", error="Falta el parámetro 'q'"), 400
+    try:
+        año = int(args["anio"]) if args.get("anio") else None
+        limite = min(500, max(1, int(args.get("limite", 50))))
+        pagina = max(0, int(args.get("pagina", 0)))
+    except ValueError:
+        return flask.jsonify(status="error", error="Parámetros numéricos inválidos"), 400
+    prefijo = args.get("prefijo", "1") not in ("0", "false", "False")
+    filas, total = consultar_procesos(año, None, None, None, None, pagina, limite, consulta, prefijo)
+    if not filas.empty:
+        filas["fecha"] = filas["fecha"].dt.strftime("%Y-%m-%d")
+        filas["Monto (Millones)"] = filas["Monto (Millones)"].astype("float64")
+    filas = filas.astype(object).where(filas.notna(), None)
+    return flask.jsonify(
+        status="ok", consulta=consulta, prefijo=prefijo, total=total, pagina=pagina, limite=limite,
+        resultados=filas.to_dict("records"),
+    ), 200
+
+# ------------------------------------------------------
+# EXPORTACIÓN DE PROCESOS (CSV, CSV.GZ, PARQUET)
+# ------------------------------------------------------
+# El resultado completo de los filtros de Procesos se envía en streaming, lote a lote
+# (ver iterar_procesos): nunca se arma la lista de registros ni el archivo entero en memoria.
+try:
+    LOTE_EXPORTACION = max(1000, int(os.getenv("OCDS_EXPORT_BATCH", "50000")))
+except Exception:
+    LOTE_EXPORTACION = 50000
+# Cada exportación ocupa un hilo de gunicorn mientras dura: se limitan como los flujos SSE
+try:
+    _CUPOS_EXPORTACION = threading.BoundedSemaphore(max(1, int(os.getenv("OCDS_MAX_EXPORTS", "2"))))
+except Exception:
+    _CUPOS_EXPORTACION = threading.BoundedSemaphore(2)
+_FORMATOS_EXPORTACION = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def parquet_disponible():
+    """Indica si está instalado ``pyarrow`` (necesario solo para exportar en Parquet)."""
+    try:
+        import pyarrow.parquet  # noqa: F401  # import opcional
+    except ImportError:
+        return False
+    return True
+
+def _lotes_csv(lotes):
+    """Encabezado y luego cada lote como texto CSV (UTF-8, fechas ``AAAA-MM-DD``)."""
+    yield pd.DataFrame(columns=list(_ORDEN_PROCESOS)).to_csv(index=False).encode("utf-8")
+    for lote in lotes:
+        yield lote.to_csv(index=False, header=False, date_format="%Y-%m-%d").encode("utf-8")
+
+def _lotes_gzip(partes):
+    """Comprime en gzip un flujo de bytes sin juntarlo (un bloque comprimido por parte)."""
+    compresor = zlib.compressobj(COMPRESION_NIVEL_GZIP, zlib.DEFLATED, 31)
+    for parte in partes:
+        comprimido = compresor.compress(parte)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+class _SumideroBytes(io.RawIOBase):
+    """Archivo de solo escritura que acumula lo escrito hasta que se lo vacía."""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def vaciar(self):
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+def _lotes_parquet(lotes):
+    """Un *row group* de Parquet por lote; el pie del archivo se envía al final."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tipos = {"fecha": pa.timestamp("ms"), "Monto (Millones)": pa.float64()}
+    esquema = pa.schema([(c, tipos.get(c, pa.string())) for c in _ORDEN_PROCESOS])
+    sumidero = _SumideroBytes()
+    with pq.ParquetWriter(sumidero, esquema, compression="zstd") as escritor:
+        for lote in lotes:
+            for c in _ORDEN_PROCESOS:
+                if c not in tipos:
+                    lote[c] = lote[c].astype("string")
+            escritor.write_table(pa.Table.from_pandas(lote, schema=esquema, preserve_index=False, safe=False))
+            datos = sumidero.vaciar()
+            if datos:
+                yield datos
+    yield sumidero.vaciar()
+
+def _parsear_orden(texto):
+    """``orden=col[:asc|desc],...`` (columnas visibles de Procesos) al formato ``sort_by`` del DataTable."""
+    sort_by = []
+    for parte in (texto or "").split(","):
+        if not parte.strip():
+            continue
+        columna, _, sentido = parte.strip().rpartition(":")
+        if not columna or sentido not in ("asc", "desc"):
+            columna, sentido = parte.strip(), "asc"
+        if columna not in _ORDEN_PROCESOS:
+            raise ValueError(f"Columna de orden desconocida: {columna}")
+        sort_by.append({"column_id": columna, "direction": sentido})
+    return sort_by
+
+@app.server.route('/api/procesos/exportar')
+def exportar_procesos():
+    """Exporta todos los procesos que cumplen los filtros de la página Procesos.
+
+    Parámetros (query string): ``formato`` (``csv`` por defecto, ``csv.gz`` o ``parquet``),
+    ``anio``, ``comprador``, ``proveedor``, ``tipo``, ``q`` y ``prefijo`` (como en
+    ``/api/buscar``) y ``orden`` (``columna[:asc|desc]`` separadas por coma, p. ej.
+    ``Monto (Millones):desc,fecha``). Sin ``anio`` se exportan todos los años.
+
+    La respuesta se genera por lotes de ``OCDS_EXPORT_BATCH`` filas y su memoria no
+    depende del tamaño del resultado. Responde 503 si ya hay ``OCDS_MAX_EXPORTS``
+    exportaciones en curso y 501 si se pide Parquet sin ``pyarrow`` instalado.
+    """
+    args = flask.request.args
+    formato = args.get("formato", "csv")
+    if formato not in _FORMATOS_EXPORTACION:
+        return flask.jsonify(status="error", error=f"Formato no soportado: {formato}"), 400
+    if formato == "parquet" and not parquet_disponible():
+        return flask.jsonify(status="error", error="Exportar en Parquet requiere el paquete pyarrow"), 501
+    try:
+        año = int(args["anio"]) if args.get("anio") else None
+        sort_by = _parsear_orden(args.get("orden"))
+    except ValueError as e:
+        return flask.jsonify(status="error", error=str(e)), 400
+    prefijo = args.get("prefijo", "1") not in ("0", "false", "False")
+    if not _CUPOS_EXPORTACION.acquire(blocking=False):
+        return flask.jsonify(status="error", error="Demasiadas exportaciones en curso; reintentar en unos segundos"), \
+            503, {"Retry-After": "30"}
+    try:
+        lotes = iterar_procesos(año, args.get("comprador") or None, args.get("proveedor") or None,
+                                args.get("tipo") or None, sort_by, args.get("q"), prefijo)
+        if formato == "parquet":
+            cuerpo = _lotes_parquet(lotes)
+        else:
+            cuerpo = _lotes_csv(lotes)
+            if formato == "csv.gz":
+                cuerpo = _lotes_gzip(cuerpo)
+        tipo_mime, extension = _FORMATOS_EXPORTACION[formato]
+        nombre = f"procesos_{año if año is not None else 'todos'}.{extension}"
+        resp = flask.Response(cuerpo, content_type=tipo_mime, headers={
+            "Content-Disposition": f'attachment; filename="{nombre}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        })
+    except Exception:
+        _CUPOS_EXPORTACION.release()
+        raise
+    # El servidor cierra la respuesta al terminar o al desconectarse el cliente
+    resp.call_on_close(_CUPOS_EXPORTACION.release)
+    return resp
+
+# ------------------------------------------------------
+# API REST v1 (JSON con ETag por versión del dataset)
+# ------------------------------------------------------
+# Los mismos agregados que muestra el tablero, para consumo de otros sistemas sin raspar los
+# callbacks de Dash. Cada respuesta lleva un ETag derivado de la huella del dataset publicado:
+# mientras no haya una recarga con datos distintos, If-None-Match responde 304 sin calcular
+# nada, y los proxies pueden revalidar pasado OCDS_API_MAX_AGE.
+try:
+    API_MAX_AGE = max(0, int(os.getenv("OCDS_API_MAX_AGE", "60")))
+except Exception:
+    API_MAX_AGE = 60
+_COLUMNAS_API_PROCESOS = {
+    "fecha": "fecha", "Proceso": "proceso", "Título": "titulo", "licitante": "comprador",
+    "proveedor": "proveedor", "Orden de Compra": "orden_compra", "Monto (Millones)": "monto_millones",
+}
+
+def _registros_api(frame, columnas):
+    """Filas de ``frame`` como lista de dicts con las claves de la API.
+
+    Fechas como ``AAAA-MM-DD``, nulos como ``None`` y montos en millones con 6 decimales
+    (un peso), sin los restos de ``float32``.
+    """
+    frame = frame.reindex(columns=list(columnas)).rename(columns=columnas)
+    for col in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[col]):
+            frame[col] = frame[col].dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_float_dtype(frame[col]):
+            frame[col] = frame[col].astype("float64").round(6)
+    return json.loads(frame.to_json(orient="records", force_ascii=False))
+
+def huella_datos():
+    """Huella del contenido publicado (``_HUELLA_DATOS``), igual en todos los workers.
+
+    Es el SHA-256 de las tablas que se calcula al publicar cada generación o instantánea
+    parcial: cualquier cambio del dataset, aunque sea solo de textos, cambia el ETag.
+    """
+    return _HUELLA_DATOS or "vacio"
+
+def api_v1(fn):
+    """Decorador de los endpoints ``/api/v1``: 503 sin datos, ETag y 304, y 400 ante parámetros inválidos.
+
+    ``fn`` recibe los parámetros del query string y retorna un dict que se envía como JSON
+    junto con ``version_datos`` (la huella del ETag) y ``parcial``.
+    """
+    @functools.wraps(fn)
+    def envoltura(*args, **kwargs):
+        if generacion_vigente() == 0:
+            return flask.jsonify(status="error", error="Datos aún no disponibles"), 503, {"Retry-After": "10"}
+        huella = huella_datos()
+        etag = f"v1-{huella}"
+        # Datos parciales (carga en streaming): se revalida siempre
+        cache_control = "no-cache" if _DATOS_PARCIALES else f"public, max-age={API_MAX_AGE}"
+        if flask.request.if_none_match.contains_weak(etag):
+            resp = flask.Response(status=304)
+        else:
+            try:
+                cuerpo = fn(*args, **kwargs)
+            except ValueError as e:
+                return flask.jsonify(status="error", error=str(e)), 400
+            resp = flask.jsonify(status="ok", version_datos=huella, parcial=_DATOS_PARCIALES, **cuerpo)
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = cache_control
+        return resp
+
+    return envoltura
+
+def _año_api(obligatorio=False):
+    valor = flask.request.args.get("anio")
+    if not valor:
+        if obligatorio:
+            raise ValueError("Falta el parámetro 'anio'")
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValueError("El parámetro 'anio' debe ser un año") from None
+
+def _entero_api(nombre, defecto, minimo, maximo):
+    try:
+        return min(maximo, max(minimo, int(flask.request.args.get(nombre, defecto))))
+    except ValueError:
+        raise ValueError(f"El parámetro '{nombre}' debe ser un entero") from None
+
+def _planificar_api():
+    """Resúmenes anuales de la API a precalcular: el más reciente primero."""
+    return [(a,) for a in reversed(consultar_años())]
+
+@cache_por_generacion(_planificar_api)
+def resumen_anual_api(año):
+    """Totales por tipo, serie mensual y top de compradores de un año (los agregados de Home) como registros."""
+    datos = consultar_home(año)
+    return {
+        "totales": _registros_api(datos["totales"], {"tipo_contratacion": "tipo_contratacion", "monto_millones": "monto_millones"}),
+        "mensual": _registros_api(datos["mensual"], {"mes": "mes", "total_monto": "monto_millones"}),
+        "compradores": _registros_api(datos["top10"], {"licitante": "comprador", "monto_millones": "monto_millones"}),
+        "compradores_todos": _registros_api(datos["top20"], {"licitante": "comprador", "monto_millones": "monto_millones"}),
+    }
+
+@cache_por_generacion(lambda: [])
+def insumos_api(año, medida, vista):
+    """Top 20 de insumos (como en la página Insumos) como registros; lista vacía si el año no tiene ítems."""
+    datos = consultar_insumos(año, medida, vista)
+    if datos is None:
+        return []
+    columnas = {"Código": "codigo", "Descripción corta": "descripcion"}
+    if vista == "detalle":
+        columnas["Licitante"] = "comprador"
+    columnas["Valor"] = "valor"
+    return _registros_api(datos["tabla"], columnas)
+
+def _por_año(clave, año):
+    años = [año] if año is not None else consultar_años()
+    return [dict(anio=a, **fila) for a in años for fila in resumen_anual_api(a)[clave]]
+
+@app.server.route('/api/v1/')
+@api_v1
+def api_v1_indice():
+    """Años disponibles, cantidad de filas y endpoints de la API v1."""
+    return {
+        "anios": consultar_años(), "filas": filas_cargadas(),
+        "endpoints": ["/api/v1/totales", "/api/v1/mensual", "/api/v1/compradores/top",
+                      "/api/v1/insumos/top", "/api/v1/procesos"],
+    }
+
+@app.server.route('/api/v1/totales')
+@api_v1
+def api_v1_totales():
+    """Monto total (millones) por año y tipo de contratación; ``anio`` opcional."""
+    año = _año_api()
+    return {"anio": año, "resultados": _por_año("totales", año)}
+
+@app.server.route('/api/v1/mensual')
+@api_v1
+def api_v1_mensual():
+    """Serie mensual de montos (millones) por año; ``anio`` opcional."""
+    año = _año_api()
+    return {"anio": año, "resultados": _por_año("mensual", año)}
+
+@app.server.route('/api/v1/compradores/top')
+@api_v1
+def api_v1_compradores():
+    """Compradores con mayor monto: top 10 del ``anio`` o, sin él, top 20 de todos los años; ``limite`` opcional."""
+    año = _año_api()
+    if año is not None:
+        filas = resumen_anual_api(año)["compradores"] if año in consultar_años() else []
+    else:
+        años = consultar_años()
+        filas = resumen_anual_api(años[-1])["compradores_todos"] if años else []
+    limite = _entero_api("limite", len(filas), 1, max(1, len(filas)))
+    return {"anio": año, "resultados": filas[:limite]}
+
+@app.server.route('/api/v1/insumos/top')
+@api_v1
+def api_v1_insumos():
+    """Top 20 de insumos del ``anio`` por ``medida`` (``monto``/``cantidad``) y ``vista`` (``agregado``/``detalle``)."""
+    año = _año_api(obligatorio=True)
+    medida = flask.request.args.get("medida", "monto")
+    vista = flask.request.args.get("vista", "agregado")
+    if medida not in _METRICAS_INSUMOS:
+        raise ValueError("El parámetro 'medida' debe ser 'monto' o 'cantidad'")
+    if vista not in ("agregado", "detalle"):
+        raise ValueError("El parámetro 'vista' debe ser 'agregado' o 'detalle'")
+    return {"anio": año, "medida": medida, "vista": vista, "resultados": insumos_api(año, medida, vista)}
+
+@app.server.route('/api/v1/procesos')
+@api_v1
+def api_v1_procesos():
+    """Búsqueda paginada de procesos con los filtros y el orden de la página Procesos.
+
+    Parámetros: ``anio``, ``comprador``, ``proveedor``, ``tipo``, ``q``, ``prefijo`` y
+    ``orden`` (como en ``/api/procesos/exportar``), ``pagina`` (base 0) y ``limite`` (1-500,
+    por defecto 50).
+    """
+    args = flask.request.args
+    año = _año_api()
+    sort_by = _parsear_orden(args.get("orden"))
+    pagina = _entero_api("pagina", 0, 0, 10**9)
+    limite = _entero_api("limite", 50, 1, 500)
+    prefijo = args.get("prefijo", "1") not in ("0", "false", "False")
+    filas, total = consultar_procesos(año, args.get("comprador") or None, args.get("proveedor") or None,
+                                      args.get("tipo") or None, sort_by, pagina, limite, args.get("q"), prefijo)
+    return {
+        "total": total, "pagina": pagina, "limite": limite, "paginas": -(-total // limite),
+        "resultados": _registros_api(filas, _COLUMNAS_API_PROCESOS),
+    }
 
 # ------------------------------------------------------
 # ENCABEZADO CON ESCUDO
 # ------------------------------------------------------
-# Determinar logos: siempre usar URLs (no usar assets locales)
-LOGO_GOV_SRC = "https://mza-dicaws-portal-uploads-media-prod.s3.amazonaws.com/principal/uploads/2025/10/SITIO-AC_200x200-1-300x300-1.png"
-LOGO_OCDS_SRC = "https://ocp.imgix.net/wp-content/uploads/2020/01/OCDS-logo-grey.png?auto=format&w=1800"
+# Logos: copias locales en assets/ (con huella y caché inmutable) si el build las descargó
+# (scripts/preparar_assets.py); si no, las URLs originales
+LOGO_GOV_URL = "https://mza-dicaws-portal-uploads-media-prod.s3.amazonaws.com/principal/uploads/2025/10/SITIO-AC_200x200-1-300x300-1.png"
+LOGO_OCDS_URL = "https://ocp.imgix.net/wp-content/uploads/2020/01/OCDS-logo-grey.png?auto=format&w=1800"
+LOGO_GOV_SRC = url_asset("logo_gobierno.png", respaldo=LOGO_GOV_URL)
+LOGO_OCDS_SRC = url_asset("logo_ocds.png", respaldo=LOGO_OCDS_URL)
 
 header = dbc.Navbar(
     dbc.Container(
@@ -769,6 +4241,10 @@ app.layout = dbc.Container([
     ),
     dcc.Location(id="url"),
     dcc.Store(id="reload-done"),
+    # Sondeo de carga: cuando se publica un dataset nuevo la página se vuelve a dibujar sola
+    dcc.Interval(id="sondeo-carga", interval=2000, n_intervals=0),
+    dcc.Store(id="huella-pagina"),
+    dcc.Store(id="datos-actualizados"),
     html.Div(id="page-content"),
     html.P("Versión 0.1.10 – Dashboard OCDS Mendoza", className="text-muted small text-end")
 ], fluid=True)
@@ -777,6 +4253,14 @@ app.layout = dbc.Container([
 # Página HOME
 # ------------------------------------------------------
 # Restauramos la funcionalidad completa de layout_home con tablas y gráficos
+def _planificar_layout():
+    """Los layouts no reciben argumentos: una sola combinación por generación."""
+    return [()]
+
+# Los layouts con opciones que dependen de los datos (años, compradores, proveedores, tipos,
+# rango de fechas) se arman una vez por generación y se precalientan con cada carga: navegar
+# entre páginas no consulta el dataset.
+@cache_por_generacion(_planificar_layout)
 def layout_home():
     """Genera el layout de la página principal (Home).
 
@@ -788,16 +4272,12 @@ def layout_home():
     dash.html.Div
         Contenedor con los componentes Dash del layout Home.
     """
-    años = sorted(df["año"].dropna().unique())
+    años = consultar_años()
     año_sel = años[-1] if años else None
     # Rango seguro cuando no hay datos aún (LAZY_LOAD) o fechas NaT
     try:
-        if df.empty or df["fecha"].dropna().empty:
-            rango = "sin datos aún"
-        else:
-            fmin = pd.to_datetime(df["fecha"], errors="coerce").min()
-            fmax = pd.to_datetime(df["fecha"], errors="coerce").max()
-            rango = f"{fmin.date()} → {fmax.date()}" if pd.notna(fmin) and pd.notna(fmax) else "sin datos aún"
+        fmin, fmax = consultar_rango_fechas()
+        rango = f"{fmin.date()} → {fmax.date()}" if pd.notna(fmin) and pd.notna(fmax) else "sin datos aún"
     except Exception:
         rango = "sin datos aún"
     return html.Div([
@@ -823,7 +4303,13 @@ def layout_home():
     ])
 
 # Ajustamos los tooltips para eliminar los decimales en los montos
+def _planificar_home():
+    """Años a precalcular en Home, del más reciente (el que se abre por defecto) al más antiguo."""
+    return [(a,) for a in reversed(consultar_años())]
+
 @app.callback(Output("contenido-home", "children"), Input("año-selector-home", "value"))
+@cache_por_generacion(_planificar_home)
+@unico_en_vuelo
 def actualizar_home(año_sel):
     """Callback que actualiza el contenido de Home cuando cambia el año.
 
@@ -837,17 +4323,20 @@ def actualizar_home(año_sel):
     dash.html.Div
         Componentes con tabla de totales y gráficos correspondientes.
     """
-    if año_sel is None or df.empty:
+    if año_sel is None or filas_cargadas() == 0:
+        if carga_en_curso():
+            return barra_progreso_carga()  # el aviso de carga lo muestra mostrar_pagina
         return html.Div([
             html.P("No hay datos disponibles (dataset vacío o carga diferida)."),
             html.Button("Forzar recarga de datos", id="btn-reload-data", n_clicks=0, className="btn btn-primary"),
             dcc.Interval(id="reload-poller", interval=3000, n_intervals=0, disabled=True),
-            html.Div(id="reload-status", className="mt-2 text-muted")
+            html.Div(id="reload-status", className="mt-2 text-muted"),
+            barra_progreso_carga(),
         ])
-    df_f = df[df["año"] == año_sel].copy()
+    datos = consultar_home(año_sel)
 
     # --- Totales por tipo (numérico) y versión para mostrar formateada ---
-    totales = df_f.groupby("tipo_contratacion", as_index=False)["monto_millones"].sum()
+    totales = datos["totales"]
     # Mapear códigos a etiquetas descriptivas
     mapping_tipos = {
         "CDI": "Contratación Directa (CDI)",
@@ -868,17 +4357,14 @@ def actualizar_home(año_sel):
     )
 
     # --- Evolución mensual (gráfico) ---
-    df_mes = df_f.copy()
-    df_mes["mes"] = df_mes["fecha"].dt.month
-    df_mes = df_mes.groupby("mes", as_index=False).agg(total_monto=("monto_millones", "sum"))
+    df_mes = datos["mensual"]
 
     fig_mes = px.line(df_mes, x="mes", y="total_monto", title=capitalize_title(f"Evolución mensual ({año_sel})"),
                       labels={"mes": "Mes", "total_monto": "Monto (Millones)"})
     fig_mes.update_traces(hovertemplate="Mes=%{x}<br>Monto=%{y:.0f}M")
 
     # --- Monto por tipo de contratación (gráfico) ---
-    dist_tipo = df_f.groupby("tipo_contratacion", as_index=False)["monto_millones"].sum()
-    dist_tipo = dist_tipo[dist_tipo["monto_millones"] > 0]
+    dist_tipo = totales[totales["monto_millones"] > 0].copy()
     # Evitar conflictos con dtype 'category' convirtiendo a string antes de mapear
     _dtc_series = dist_tipo["tipo_contratacion"].astype("string")
     dist_tipo["tipo_contratacion_ext"] = _dtc_series.map(mapping_tipos).fillna(_dtc_series)
@@ -886,8 +4372,8 @@ def actualizar_home(año_sel):
     fig_pie.update_traces(hovertemplate="%{label}: %{value:.0f}M")
 
     # --- Top 10 licitantes (año) ---
-    top10 = df_f.groupby("licitante", as_index=False)["monto_millones"].sum().nlargest(10, "monto_millones")
-    order_top10 = top10.sort_values("monto_millones", ascending=False)["licitante"].tolist()
+    top10 = datos["top10"]
+    order_top10 = top10["licitante"].tolist()
     fig_top10 = px.bar(
         top10,
         x="monto_millones",
@@ -902,8 +4388,8 @@ def actualizar_home(año_sel):
     fig_top10.update_traces(texttemplate="%{x:.0f}M", textposition="outside", cliponaxis=False)
 
     # --- Top 20 licitantes (total) ---
-    top20 = df.groupby("licitante", as_index=False)["monto_millones"].sum().nlargest(20, "monto_millones")
-    order_top20 = top20.sort_values("monto_millones", ascending=False)["licitante"].tolist()
+    top20 = datos["top20"]
+    order_top20 = top20["licitante"].tolist()
     fig_top20 = px.bar(
         top20,
         x="monto_millones",
@@ -918,7 +4404,7 @@ def actualizar_home(año_sel):
     fig_top20.update_traces(texttemplate="%{x:.0f}M", textposition="outside", cliponaxis=False)
 
     # --- Top 30 montos (tabla) ---
-    top30 = df_f.sort_values("monto", ascending=False).head(30).copy()
+    top30 = datos["top30"]
     # Usar dato numérico y aplicar formato visual en DataTable (permite orden numérico correcto)
     top30["Monto (Millones)"] = top30["monto_millones"]
     top30["fecha"] = top30["fecha"].dt.strftime("%Y-%m-%d")
@@ -948,7 +4434,7 @@ def actualizar_home(año_sel):
     tabla_top30 = dash_table.DataTable(
         id="tabla-top30",
         columns=columns_out_top30,
-        data=top30[cols_top30].to_dict("records"),
+        data=aligerar_registros(top30[cols_top30]).to_dict("records"),
         style_table={"overflowX": "auto"},
         style_cell={"fontSize": "70%"},  # Reducir el tamaño de la fuente al 70%
         page_size=15,
@@ -958,17 +4444,65 @@ def actualizar_home(año_sel):
     return html.Div([
         html.H4(f"💰 Total Contratado Por Tipo De Contratación ({año_sel})"),
         tabla_totales,
-        dcc.Graph(figure=fig_mes),
-        dcc.Graph(figure=fig_pie),
-        dcc.Graph(figure=fig_top10),
-        dcc.Graph(figure=fig_top20),
+        dcc.Graph(figure=aligerar_figura(fig_mes)),
+        dcc.Graph(figure=aligerar_figura(fig_pie)),
+        dcc.Graph(figure=aligerar_figura(fig_top10)),
+        dcc.Graph(figure=aligerar_figura(fig_top20)),
         html.H4(f"🏆 Top 30 Montos Más Altos ({año_sel})"),
         tabla_top30
     ])
 
+_NOMBRES_FASES = {
+    "descarga": "Descargando el archivo",
+    "parseo": "Leyendo releases",
+    "normalizacion": "Normalizando tablas",
+    "indexacion": "Construyendo índices",
+    "precalentamiento": "Precalculando páginas",
+}
+
+def barra_progreso_carga():
+    """Barra con el progreso de la carga para el estado vacío de Home (oculta si no hay carga)."""
+    return html.Div([
+        dbc.Progress(id="progreso-carga-barra", value=0, striped=True, animated=True, style={"height": "1.5rem"}),
+        html.Small(id="progreso-carga-detalle", className="text-muted"),
+        dcc.Interval(id="progreso-carga-intervalo", interval=1000, n_intervals=0),
+    ], id="progreso-carga", className="my-3", style={"display": "none"})
+
+@app.callback(
+    Output("progreso-carga-barra", "value"),
+    Output("progreso-carga-barra", "label"),
+    Output("progreso-carga-detalle", "children"),
+    Output("progreso-carga", "style"),
+    Output("progreso-carga-intervalo", "disabled"),
+    Input("progreso-carga-intervalo", "n_intervals"),
+)
+def actualizar_progreso_carga(_n):
+    """Refleja en la barra la fase actual, su porcentaje (si se conoce) y los contadores.
+
+    Sin carga en curso el intervalo se desactiva (lo reactiva el botón de recarga).
+    """
+    p = progreso_carga.instantanea()
+    if p["estado"] != "en_curso":
+        return 0, "", "", {"display": "none"}, True
+    if p["fase"] is None:
+        return 0, "", "", {"display": "none"}, False
+    nombre = _NOMBRES_FASES.get(p["fase"], p["fase"])
+    if p["fase"] == "descarga":
+        detalle = f"{p['bytes_descargados'] / 1e6:.1f} MB" + (
+            f" de {p['bytes_totales'] / 1e6:.1f} MB" if p["bytes_totales"] else "")
+    else:
+        releases, filas = (f"{p[k]:,}".replace(",", ".") for k in ("releases", "filas"))
+        detalle = f"{releases} releases, {filas} filas"
+    tiempos = ", ".join(f"{fase} {seg:.1f}s" for fase, seg in p["fases"].items())
+    detalle = f"{detalle} · {tiempos}"
+    if p["porcentaje_fase"] is None:
+        return 100, nombre, detalle, {}, False  # sin total conocido: barra completa animada
+    return p["porcentaje_fase"], f"{nombre} ({p['porcentaje_fase']:.0f}%)", detalle, {}, False
+
 # ------------------------------------------------------
 # Página INSUMOS
 # ------------------------------------------------------
+@cache_por_generacion(_planificar_layout)
 def layout_insumos():
     """Genera el layout de la página de Insumos más contratados.
 
@@ -977,7 +4511,7 @@ def layout_insumos():
     dash.html.Div
         Contenedor con el selector de año y el espacio para resultados.
     """
-    años = sorted(df["año"].dropna().unique())
+    años = consultar_años()
     año_sel = años[-1] if años else None
     return html.Div([
         html.H4("🏷️ Top Insumos Más Contratados"),
@@ -1011,18 +4545,55 @@ def layout_insumos():
                 ), md="auto"
             ),
         ], className="my-2"),
-        html.Div(id="contenido-insumos"),
+        html.Div(
+            dbc.Progress(id="insumos-progreso", value=0, striped=True, animated=True, className="my-2"),
+            id="insumos-progreso-contenedor",
+            style={"display": "none"},
+        ),
+        dcc.Store(id="insumos-datos"),
+        dcc.Store(id="insumos-config", data=_config_insumos()),
+        # Estructura fija: el navegador completa tabla, gráfico y textos (assets/insumos.js)
+        html.Div(id="contenido-insumos", children=[
+            html.Div(id="insumos-aviso"),
+            html.Div(id="insumos-resultados", style={"display": "none"}, children=[
+                html.H5(id="insumos-titulo-tabla"),
+                dash_table.DataTable(
+                    id="tabla-insumos",
+                    columns=[],
+                    data=[],
+                    style_table={"overflowX": "auto"},
+                    page_size=15,
+                    sort_action="native"
+                ),
+                html.Small(id="insumos-explicacion-tabla", className="text-muted"),
+                dcc.Graph(id="grafico-insumos"),
+                html.Small(id="insumos-explicacion-grafico", className="text-muted"),
+                html.Div(html.Small(id="insumos-aviso-ceros", className="text-warning")),
+            ]),
+        ]),
         html.Hr()
     ])
 
+def _planificar_insumos():
+    """Años de Insumos a precalcular, del más reciente (el que se abre por defecto) al más antiguo."""
+    return [(a,) for a in reversed(consultar_años())]
+
+@responder_desde_cache
 @app.callback(
-    Output("contenido-insumos", "children"),
+    Output("insumos-datos", "data"),
     Input("año-selector-insumos", "value"),
-    Input("insumos-medida", "value"),
-    Input("insumos-vista", "value"),
+    **opciones_trabajo_pesado("insumos-progreso-contenedor"),
 )
-def actualizar_insumos(año_sel, medida, vista):
-    """Callback que arma el Top de insumos y su gráfico para el año dado.
+@trabajo_pesado
+@cache_por_generacion(_planificar_insumos)
+@unico_en_vuelo
+def actualizar_insumos(año_sel):
+    """Callback que calcula el Top 20 de insumos del año en las cuatro combinaciones de medida y vista.
+
+    Cambiar entre monto/cantidad y agregado/por licitante no vuelve al servidor: el
+    navegador arma tabla y gráfico a partir de este resumen (``assets/insumos.js``).
+    Las etiquetas de ítems y licitantes viajan una sola vez y las filas las referencian
+    por posición.
 
     Parámetros
     ----------
@@ -1031,223 +4602,86 @@ def actualizar_insumos(año_sel, medida, vista):
 
     Retorna
     -------
-    dash.html.Div
-        Tabla y gráfico de barras con los insumos más contratados.
+    dict | None
+        ``items`` (``[código, descripción]``), ``licitantes`` y, por medida (``monto`` y
+        ``cantidad``): ``items`` (``[i, valor]``, Top 20 por total), ``tabla``
+        (``[i, l, valor]``, Top 20 ítem–licitante) y ``detalle`` (``[i, l, valor]`` de los
+        Top 20 ítems). ``vacio`` indica que el año no tiene ítems.
     """
-    # Usar df_items global precomputado
-    df_items_year = df_items[df_items["año"] == año_sel].copy()
-    if df_items_year.empty:
-        return html.Div("⚠️ No se encontraron items para este año.")
-    # Evitar producto cartesiano por dtype 'category': convertir 'Licitante' a string y usar observed=True
-    try:
-        df_items_year["Licitante"] = df_items_year["Licitante"].astype("string")
-    except Exception:
-        pass
-    # Si el usuario selecciona 'cantidad' y la columna no existe, crearla con ceros
-    if medida == "cantidad" and "Cantidad" not in df_items_year.columns:
-        df_items_year["Cantidad"] = 0.0
-    # Configuración según medida y vista
-    medida = (medida or "monto").lower()
-    vista = (vista or "agregado").lower()
-    metric_col = "Monto (Millones)" if medida == "monto" else "Cantidad"
-
-    # 1) Tabla: Top 20 según vista
-    group_cols_detalle = ["Código", "Descripción corta", "Licitante"] if vista == "detalle" else ["Código", "Descripción corta"]
-    df_top_tabla = (
-        df_items_year
-        .groupby(group_cols_detalle, as_index=False, observed=True)[metric_col]
-        .sum()
-        .rename(columns={metric_col: "Valor"})
-        .sort_values("Valor", ascending=False)
-        .head(20)
-    )
-
-    # Definir columnas de la tabla dinámicamente
-    cols_base = [
-        {"name": "Código", "id": "Código"},
-        {"name": "Descripción corta", "id": "Descripción corta"},
-    ]
-    if vista == "detalle":
-        cols_base.append({"name": "Licitante", "id": "Licitante"})
+    if año_sel is None:
+        return None
+    etiquetas, licitantes, posiciones = [], [], {}
 
-    if medida == "monto":
-        valor_col = {
-            "name": "Monto (Millones)",
-            "id": "Valor",
-            "type": "numeric",
-            "format": Format(
-                scheme=Scheme.fixed,
-                precision=0,
-                group=Group.yes,
-                groups=3
-            ).group_delimiter('.')
-             .decimal_delimiter(',')
-             .symbol(Symbol.yes)
-             .symbol_suffix('M')
-        }
-    else:
-        valor_col = {
-            "name": "Cantidad",
-            "id": "Valor",
-            "type": "numeric",
-            "format": Format(
-                scheme=Scheme.fixed,
-                precision=0,
-                group=Group.yes,
-                groups=3
-            ).group_delimiter('.')
-             .decimal_delimiter(',')
-        }
-    columns_out_insumos = cols_base + [valor_col]
+    def posicion(lista, clave, valor):
+        if clave not in posiciones:
+            posiciones[clave] = len(lista)
+            lista.append(valor)
+        return posiciones[clave]
 
-    tabla = dash_table.DataTable(
-        id="tabla-insumos",
-        columns=columns_out_insumos,
-        data=df_top_tabla.to_dict("records"),
-        style_table={"overflowX": "auto"},
-        page_size=15,
-        sort_action="native"
-    )
+    def valor(v):
+        v = float(v)
+        return round(v, DECIMALES_RESPUESTA) if DECIMALES_RESPUESTA >= 0 else v
 
-    # 2) Gráfico: Top 20 según vista
-    if vista == "agregado":
-        df_top_graf = (
-            df_items_year
-            .groupby(["Código", "Descripción corta"], as_index=False, observed=True)[metric_col]
-            .sum()
-            .rename(columns={metric_col: "Valor"})
-            .sort_values("Valor", ascending=False)
-            .head(20)
-        )
-        order_y = df_top_graf.sort_values("Valor", ascending=False)["Descripción corta"].tolist()
-        fig = px.bar(
-            df_top_graf,
-            x="Valor",
-            y="Descripción corta",
-            orientation="h",
-            title=None,
-            labels={"Valor": ("Monto (Millones)" if medida == "monto" else "Cantidad"), "Descripción corta": "Insumo"},
-            category_orders={"Descripción corta": order_y}
-        )
-        # Asegurar visibilidad de todas las etiquetas del eje Y
-        fig.update_layout(height=max(520, 26 * len(order_y) + 100), margin=dict(l=220, r=20, t=60, b=40))
-        fig.update_yaxes(automargin=True, tickmode="array", tickvals=order_y, ticktext=order_y, tickfont=dict(size=11))
-    else:
-        # Obtener Top 20 insumos por total agregado para ordenar correctamente
-        df_agg_items = (
-            df_items_year
-            .groupby(["Código", "Descripción corta"], as_index=False, observed=True)[metric_col]
-            .sum()
-            .rename(columns={metric_col: "TotalItem"})
-            .sort_values("TotalItem", ascending=False)
-            .head(20)
-        )
-        top_keys = set(zip(df_agg_items["Código"], df_agg_items["Descripción corta"]))
-        # Detalle por licitante solo para esos Top 20 insumos
-        df_detail = (
-            df_items_year
-            .groupby(["Código", "Descripción corta", "Licitante"], as_index=False, observed=True)[metric_col]
-            .sum()
-            .rename(columns={metric_col: "Valor"})
-        )
-        df_detail = df_detail[df_detail.apply(lambda r: (r["Código"], r["Descripción corta"]) in top_keys, axis=1)]
-        order_y = df_agg_items["Descripción corta"].tolist()  # orden descendente por total
-        fig = px.bar(
-            df_detail,
-            x="Valor",
-            y="Descripción corta",
-            color="Licitante",
-            orientation="h",
-            title=None,
-            labels={"Valor": ("Monto (Millones)" if medida == "monto" else "Cantidad"), "Descripción corta": "Insumo", "Licitante": "Licitante"},
-            category_orders={"Descripción corta": order_y}
-        )
-        fig.update_layout(barmode='stack')
-        # Asegurar visibilidad de todas las etiquetas del eje Y
-        fig.update_layout(height=max(520, 26 * len(order_y) + 100), margin=dict(l=220, r=20, t=60, b=40))
-        fig.update_yaxes(automargin=True, tickmode="array", tickvals=order_y, ticktext=order_y, tickfont=dict(size=11))
-        # Evitar solapamiento: no mostrar etiquetas por segmento; solo mostrar etiqueta del total con una traza de texto
-        fig.update_traces(texttemplate=None, selector=dict(type='bar'))
-        # Totales por insumo para ubicar texto a la derecha
-        df_tot = df_detail.groupby("Descripción corta", as_index=False)["Valor"].sum()
-        totals_map = {k: v for k, v in zip(df_tot["Descripción corta"], df_tot["Valor"])}
-        x_totals = [float(totals_map.get(y, 0.0) or 0.0) for y in order_y]
-        # Formateo del texto de totales
-        if medida == "monto":
-            text_totals = [format_mill_int(v) for v in x_totals]
-        else:
-            text_totals = [f"{int(round(v)):,}".replace(",", ".") for v in x_totals]
-        # Margen extra en X para que entre el texto
-        max_total = max(x_totals) if x_totals else 0.0
-        if max_total > 0:
-            fig.update_xaxes(range=[0, max_total * 1.08])
-        # Agregar traza de texto superpuesta (scatter) con los totales
-        fig.add_trace(
-            go.Scatter(
-                x=x_totals,
-                y=order_y,
-                mode="text",
-                text=text_totals,
-                textposition="middle right",
-                showlegend=False,
-                hoverinfo="skip",
-            )
-        )
-        # Ocultar textos que no entren
-        fig.update_layout(uniformtext_minsize=8, uniformtext_mode="hide")
-
-    # Formato de hover/text según medida
-    # Formato de hover/text según medida (agregado: etiquetas por barra; detalle: solo hover por segmento)
-    if vista == "agregado":
-        if medida == "monto":
-            fig.update_traces(hovertemplate="Insumo=%{y}<br>Monto=%{x:.0f}M", texttemplate="%{x:.0f}M", textposition="outside", cliponaxis=False)
-        else:
-            fig.update_traces(hovertemplate="Insumo=%{y}<br>Cantidad=%{x:.0f}", texttemplate="%{x:.0f}", textposition="outside", cliponaxis=False)
-    else:
-        # detalle: mantener hover detallado por licitante y sin texto en segmentos (ya se agregó traza de totales)
-        if medida == "monto":
-            fig.update_traces(hovertemplate="Insumo=%{y}<br>Licitante=%{legendgroup}<br>Monto=%{x:.0f}M")
-        else:
-            fig.update_traces(hovertemplate="Insumo=%{y}<br>Licitante=%{legendgroup}<br>Cantidad=%{x:.0f}")
+    def filas(frame, con_licitante):
+        codigos = [None if pd.isna(c) else str(c) for c in frame["Código"]]
+        descripciones = [None if pd.isna(d) else str(d) for d in frame["Descripción corta"]]
+        items = [posicion(etiquetas, ("i", c, d), [c, d]) for c, d in zip(codigos, descripciones)]
+        if not con_licitante:
+            return [[i, valor(v)] for i, v in zip(items, frame["Valor"])]
+        lics = [posicion(licitantes, ("l", str(l)), str(l)) for l in frame["Licitante"]]
+        return [[i, l, valor(v)] for i, l, v in zip(items, lics, frame["Valor"])]
 
-    # Textos explicativos
-    if vista == "agregado":
-        explicacion_tabla = html.Small(
-            ("Esta tabla lista el Top 20 de ítems " + ("por monto (M)" if medida == "monto" else "por cantidad") + " agregados por ítem en el año seleccionado."),
-            className="text-muted"
-        )
-        explicacion_grafico = html.Small(
-            ("Este gráfico agrega por ítem (suma de todos los licitantes) y muestra los 20 ítems con mayor " + ("monto (M)" if medida == "monto" else "cantidad") + "."),
-            className="text-muted"
-        )
-        titulo_tabla = html.H5(f"Top 20 insumos por {'monto' if medida=='monto' else 'cantidad'} (agregado)")
-        titulo_grafico = None
-    else:
-        explicacion_tabla = html.Small(
-            ("Esta tabla lista el Top 20 de combinaciones Ítem–Licitante " + ("por monto (M)" if medida == "monto" else "por cantidad") + "."),
-            className="text-muted"
-        )
-        explicacion_grafico = html.Small(
-            ("Este gráfico muestra el Top 20 en detalle por licitante. El color identifica a cada licitante."),
-            className="text-muted"
-        )
-        titulo_tabla = html.H5(f"Top 20 insumos contratados por {'monto' if medida=='monto' else 'cantidad'} (detalle por licitante)")
-        titulo_grafico = None
+    resumen = {"año": año_sel, "vacio": False}
+    for paso, medida in enumerate(("monto", "cantidad")):
+        avisar_progreso("insumos-progreso", 20 + 40 * paso, f"Agregando ítems por {medida}…")
+        datos = consultar_insumos(año_sel, medida, "detalle")
+        if datos is None:
+            return {"año": año_sel, "vacio": True}
+        resumen[medida] = {
+            "items": filas(datos["items"], False),
+            "tabla": filas(datos["tabla"], True),
+            "detalle": filas(datos["detalle"], True),
+        }
+    resumen["items"] = etiquetas
+    resumen["licitantes"] = licitantes
+    return resumen
 
-    # Mensaje si la métrica es toda cero (p. ej. cantidades ausentes)
-    info_extra = None
-    if df_top_tabla["Valor"].sum() == 0:
-        info_extra = html.Div(html.Small("No hay cantidades/montos distintos de cero para este año en la selección actual.", className="text-warning"))
+def _config_insumos():
+    """Datos fijos para armar Insumos en el navegador: plantilla de gráficos y columna de valor por medida."""
+    def formato():
+        return Format(scheme=Scheme.fixed, precision=0, group=Group.yes, groups=3).group_delimiter('.').decimal_delimiter(',')
+    return {
+        "plantilla": pio.templates[pio.templates.default].to_plotly_json(),
+        "columnas": {
+            "monto": {"name": "Monto (Millones)", "id": "Valor", "type": "numeric",
+                      "format": formato().symbol(Symbol.yes).symbol_suffix('M').to_plotly_json()},
+            "cantidad": {"name": "Cantidad", "id": "Valor", "type": "numeric",
+                         "format": formato().to_plotly_json()},
+        },
+    }
 
-    # Armar bloques sin título duplicado para el gráfico
-    bloques = [titulo_tabla, tabla, explicacion_tabla, dcc.Graph(figure=fig), explicacion_grafico]
-    if info_extra:
-        bloques.append(info_extra)
-    return html.Div(bloques)
+# Medida y vista se resuelven en el navegador con el resumen del año (sin ida y vuelta al servidor)
+app.clientside_callback(
+    dash.ClientsideFunction(namespace="ocds", function_name="vistaInsumos"),
+    Output("insumos-aviso", "children"),
+    Output("insumos-resultados", "style"),
+    Output("insumos-titulo-tabla", "children"),
+    Output("tabla-insumos", "columns"),
+    Output("tabla-insumos", "data"),
+    Output("insumos-explicacion-tabla", "children"),
+    Output("grafico-insumos", "figure"),
+    Output("insumos-explicacion-grafico", "children"),
+    Output("insumos-aviso-ceros", "children"),
+    Input("insumos-datos", "data"),
+    Input("insumos-medida", "value"),
+    Input("insumos-vista", "value"),
+    dash.State("insumos-config", "data"),
+)
 
 # ------------------------------------------------------
 # Página PROCESOS FILTRADOS (filtros y tabla)
 # ------------------------------------------------------
+@cache_por_generacion(_planificar_layout)
 def layout_procesos():
     """Genera el layout de la página de "Procesos Filtrados" con filtros.
 
@@ -1256,10 +4690,8 @@ def layout_procesos():
     dash.html.Div
         Contenedor con filtros y la tabla de resultados.
     """
-    años = sorted(df["año"].dropna().unique())
-    compradores = sorted([x for x in df["licitante"].dropna().unique()])
-    proveedores = sorted([x for x in df["proveedor"].dropna().unique()])
-    tipos = sorted([x for x in df["tipo_contratacion"].dropna().unique()])
+    años = consultar_años()
+    compradores, proveedores, tipos = consultar_opciones_procesos()
     mapping_tipos = {
         "CDI": "Contratación Directa (CDI)",
         "LPU": "Licitación Pública (LPU)"
@@ -1304,6 +4736,38 @@ def layout_procesos():
                 md=3
             )
         ], className="mb-3"),
+        dbc.Row([
+            dbc.Col(
+                dcc.Input(
+                    id="filtro-texto",
+                    type="search",
+                    debounce=True,
+                    placeholder="Buscar en títulos, descripciones e ítems (p. ej. combustible, medicamentos)",
+                    className="form-control",
+                ),
+                md=9
+            ),
+            dbc.Col(
+                dcc.Checklist(
+                    id="filtro-prefijo",
+                    options=[{"label": " Coincidir por prefijo", "value": "prefijo"}],
+                    value=["prefijo"],
+                    inline=True,
+                ),
+                md=3, className="d-flex align-items-center"
+            ),
+        ], className="mb-3"),
+        html.Div([
+            html.Small("Descargar todos los resultados: ", className="text-muted"),
+            html.A("CSV", id="exportar-csv", href="/api/procesos/exportar?formato=csv", className="small"),
+            html.Small(" · ", className="text-muted"),
+            html.A("CSV comprimido", id="exportar-csv-gz", href="/api/procesos/exportar?formato=csv.gz", className="small"),
+            # Parquet solo si está pyarrow (el enlace existe igual para el callback de los enlaces)
+            html.Span([
+                html.Small(" · ", className="text-muted"),
+                html.A("Parquet", id="exportar-parquet", href="/api/procesos/exportar?formato=parquet", className="small"),
+            ], style=None if parquet_disponible() else {"display": "none"}),
+        ], className="mb-2"),
         dash_table.DataTable(
             id="tabla-procesos-filter",
             columns=columns_out,
@@ -1311,6 +4775,8 @@ def layout_procesos():
             style_table={"overflowX": "auto"},
             style_cell={"fontSize": "70%"},
             page_size=20,
+            page_current=0,
+            page_action="custom",
             sort_action="custom",
             sort_mode="multi",
             sort_by=[]
@@ -1320,15 +4786,25 @@ def layout_procesos():
 
 @app.callback(
     Output("tabla-procesos-filter", "data"),
+    Output("tabla-procesos-filter", "page_count"),
+    Output("tabla-procesos-filter", "page_current"),
     Input("filtro-año", "value"),
     Input("filtro-comprador", "value"),
     Input("filtro-proveedor", "value"),
     Input("filtro-tipo", "value"),
-    Input("tabla-procesos-filter", "sort_by")
+    Input("tabla-procesos-filter", "sort_by"),
+    Input("tabla-procesos-filter", "page_current"),
+    Input("tabla-procesos-filter", "page_size"),
+    Input("filtro-texto", "value"),
+    Input("filtro-prefijo", "value"),
 )
-def filtrar_procesos(año, comprador, proveedor, tipo, sort_by):
+@unico_en_vuelo
+def filtrar_procesos(año, comprador, proveedor, tipo, sort_by, page_current=0, page_size=20, texto=None, prefijo=("prefijo",)):
     """Callback que filtra procesos por año, comprador, proveedor y tipo.
 
+    El filtrado, el orden y la paginación se resuelven en el backend de datos
+    (:func:`consultar_procesos`); solo viaja al navegador la página visible.
+
     Parámetros
     ----------
     año : int
@@ -1339,82 +4815,66 @@ def filtrar_procesos(año, comprador, proveedor, tipo, sort_by):
         Nombre del proveedor (opcional).
     tipo : str | None
         Tipo de contratación, p. ej. ``"LPU"``, ``"CDI"`` (opcional).
+    sort_by : list[dict]
+        Orden solicitado desde los encabezados del DataTable.
+    page_current : int
+        Página actual (base 0).
+    page_size : int
+        Filas por página.
+    texto : str | None
+        Búsqueda de texto libre (títulos, descripciones e ítems).
+    prefijo : list[str] | None
+        Contiene ``"prefijo"`` si los términos deben coincidir por prefijo.
 
     Retorna
     -------
-    dash.dash_table.DataTable | dash.html.Div
-        Tabla con resultados o mensaje si no hay coincidencias.
+    tuple[list[dict], int, int]
+        Registros de la página, cantidad de páginas y página efectivamente mostrada.
     """
-    df_f = df[df["año"] == año].copy()
-    if comprador:
-        df_f = df_f[df_f["licitante"] == comprador]
-    if proveedor:
-        df_f = df_f[df_f["proveedor"] == proveedor]
-    if tipo:
-        df_f = df_f[df_f["tipo_contratacion"] == tipo]
-
-    if año is None or df_f.empty:
-        return []
-
-    # Ya tenemos 'fecha_dt' precalculada y 'orden_compra' en df
-    df_f["fecha"] = pd.to_datetime(df_f["fecha"], errors="coerce").dt.strftime("%Y-%m-%d")
-    if "orden_compra" in df_f.columns:
-        df_f["Orden de Compra"] = df_f["orden_compra"]
-    else:
-        df_f["Orden de Compra"] = None
+    page_size = int(page_size or 20)
+    # Si cambió un filtro o el orden (no la página), volver a la primera página
+    if not _disparado_solo_por("tabla-procesos-filter.page_current"):
+        page_current = 0
+    if año is None:
+        return [], 1, 0
+    por_prefijo = "prefijo" in (prefijo or [])
+    df_f, total = consultar_procesos(año, comprador, proveedor, tipo, sort_by, page_current, page_size, texto, por_prefijo)
+    page_count = max(1, -(-total // page_size))
+    if df_f.empty and total > 0:
+        # Página fuera de rango (p. ej. tras una recarga con menos filas): mostrar la última
+        page_current = page_count - 1
+        df_f, total = consultar_procesos(año, comprador, proveedor, tipo, sort_by, page_current, page_size, texto, por_prefijo)
+    if df_f.empty:
+        return [], 1, 0
 
-    # columna Proceso (tender_id), y formateamos monto para mostrar
-    df_f = df_f.rename(columns={"tender_id": "Proceso", "titulo": "Título"})
-    # Usamos valor numérico en millones para permitir ordenamiento nativo correcto (redondeado)
-    df_f["Monto (Millones)"] = df_f["monto_millones"].round(0)
-
-    cols = ["fecha", "Proceso", "Título", "licitante", "proveedor", "Orden de Compra", "Monto (Millones)"]
-    # títulos de columnas con capitalización y espacio
-    columns_out = [
-        {"name": "Fecha", "id": "fecha"},
-        {"name": "Proceso", "id": "Proceso"},
-        {"name": "Título", "id": "Título"},
-        {"name": "Licitante", "id": "licitante"},
-        {"name": "Proveedor", "id": "proveedor"},
-        {"name": "Orden de Compra", "id": "Orden de Compra"},
-        {
-            "name": "Monto (Millones)",
-            "id": "Monto (Millones)",
-            "type": "numeric",
-            "format": Format(
-                scheme=Scheme.fixed,
-                precision=0,
-                group=Group.yes,
-                groups=3
-            ).group_delimiter('.')
-             .decimal_delimiter(',')
-             .symbol(Symbol.yes)
-             .symbol_suffix('M')
-        }
-    ]
+    # 'fecha' llega como datetime64; se formatea solo para la página visible
+    df_f["fecha"] = df_f["fecha"].dt.strftime("%Y-%m-%d")
+    # Usamos valor numérico en millones para permitir ordenamiento correcto (redondeado)
+    df_f["Monto (Millones)"] = df_f["Monto (Millones)"].astype("float64").round(0)
+    return df_f.to_dict("records"), page_count, int(page_current or 0)
 
-    # Aplicar ordenamiento del lado del servidor si el usuario hizo click en encabezados
-    if sort_by and isinstance(sort_by, list) and len(sort_by) > 0:
-        # Mapear 'fecha' a la columna interna 'fecha_dt' para ordenar correctamente
-        by = []
-        ascending = []
-        for s in sort_by:
-            col = s.get("column_id")
-            direction = s.get("direction", "asc")
-            if col == "fecha":
-                by.append("fecha_dt")
-            else:
-                by.append(col)
-            ascending.append(direction == "asc")
-        try:
-            # mergesort para estabilidad cuando hay empates
-            df_f = df_f.sort_values(by=by, ascending=ascending, kind="mergesort")
-        except Exception:
-            # Si algo falla, no interrumpimos la UI
-            pass
+# Los enlaces de exportación siguen a los filtros y al orden en el navegador (assets/procesos.js)
+app.clientside_callback(
+    dash.ClientsideFunction(namespace="ocds", function_name="enlacesExportacion"),
+    Output("exportar-csv", "href"),
+    Output("exportar-csv-gz", "href"),
+    Output("exportar-parquet", "href"),
+    Input("filtro-año", "value"),
+    Input("filtro-comprador", "value"),
+    Input("filtro-proveedor", "value"),
+    Input("filtro-tipo", "value"),
+    Input("tabla-procesos-filter", "sort_by"),
+    Input("filtro-texto", "value"),
+    Input("filtro-prefijo", "value"),
+)
 
-    # Devolver solo los registros (data) en el orden aplicado
-    return df_f[cols].to_dict("records")
+def _disparado_solo_por(prop_id):
+    """Indica si el callback en curso fue disparado únicamente por ``prop_id``."""
+    try:
+        disparados = [t.get("prop_id") for t in dash.callback_context.triggered]
+    except Exception:
+        return False
+    return bool(disparados) and all(p == prop_id for p in disparados)
 
 # ------------------------------------------------------
 # Página ACERCA DEL PROYECTO
@@ -1447,7 +4907,7 @@ def layout_acerca():
             ]),
             html.Li([
                 html.Strong("Endpoints de servicio: "),
-                html.Code("/health"), html.Span(" y "), html.Code("/reload-data")
+                html.Code("/health"), html.Span(", "), html.Code("/reload-data"), html.Span(" y "), html.Code("/api/buscar?q=...")
             ]),
             html.Li([
                 html.Strong("Fuente de datos: "),
@@ -1464,18 +4924,105 @@ def layout_acerca():
 # ------------------------------------------------------
 # RUTAS
 # ------------------------------------------------------
-@app.callback(Output("page-content", "children"), Input("url", "pathname"))
-def mostrar_pagina(pathname):
+# Selecciones del usuario que se conservan cuando la misma página se redibuja porque se
+# publicó un dataset nuevo (p. ej. cada instantánea parcial durante la carga)
+_SELECCIONES_PAGINA = (
+    ("año-selector-home", "value"),
+    ("año-selector-insumos", "value"),
+    ("insumos-medida", "value"),
+    ("insumos-vista", "value"),
+    ("filtro-año", "value"),
+    ("filtro-comprador", "value"),
+    ("filtro-proveedor", "value"),
+    ("filtro-tipo", "value"),
+    ("filtro-texto", "value"),
+    ("filtro-prefijo", "value"),
+    ("tabla-procesos-filter", "sort_by"),
+)
+
+def _conservar_selecciones(pagina, selecciones):
+    """Copia de ``pagina`` con los valores que el usuario tenía elegidos en sus selectores.
+
+    Un valor que ya no figura entre las opciones nuevas (p. ej. un año que dejó de estar)
+    se descarta y queda el valor por defecto del layout. La copia evita modificar el
+    layout guardado en la caché.
+    """
+    valores = {(id_, prop): valor for (id_, prop), valor in zip(_SELECCIONES_PAGINA, selecciones)}
+    pagina = copy.deepcopy(pagina)
+    for componente in pagina._traverse():
+        for prop in ("value", "sort_by"):
+            clave = (getattr(componente, "id", None), prop)
+            if clave not in valores:
+                continue
+            valor = valores[clave]
+            if isinstance(componente, dcc.Dropdown):
+                opciones = [o.get("value") if isinstance(o, dict) else o for o in (componente.options or [])]
+                if valor not in opciones and not (valor is None and getattr(componente, "clearable", True) is not False):
+                    continue
+            setattr(componente, prop, valor)
+    return pagina
+
+@app.callback(
+    Output("page-content", "children"),
+    Output("huella-pagina", "data"),
+    Input("url", "pathname"),
+    Input("datos-actualizados", "data"),
+    *[dash.State(id_, prop, allow_optional=True) for id_, prop in _SELECCIONES_PAGINA],
+)
+def mostrar_pagina(pathname, _huella=None, *selecciones):
+    # La página guarda la huella del dataset con el que se dibujó (igual en todos los workers)
+    huella = _HUELLA_DATOS
     if pathname in ("/", None):
-        return layout_home()
+        pagina = layout_home()
     elif pathname and pathname.startswith("/insumos"):
-        return layout_insumos()
+        pagina = layout_insumos()
     elif pathname and pathname.startswith("/procesos"):
-        return layout_procesos()
+        pagina = layout_procesos()
     elif pathname and pathname.startswith("/acerca"):
-        return layout_acerca()
+        pagina = layout_acerca()
+    else:
+        return html.H4("Página no encontrada."), huella
+    if selecciones and _disparado_solo_por("datos-actualizados.data"):
+        # Misma ruta con datos nuevos: no perder el año ni los filtros elegidos
+        pagina = _conservar_selecciones(pagina, selecciones)
+    if carga_en_curso() and (filas_cargadas() == 0 or _DATOS_PARCIALES):
+        texto = (
+            "Datos parciales: la carga sigue en curso y la página se actualizará sola a medida que lleguen más años."
+            if _DATOS_PARCIALES else "Cargando datos OCDS… la página se actualizará sola al terminar."
+        )
+        aviso = dbc.Alert(
+            [dbc.Spinner(size="sm", spinner_class_name="me-2"), texto],
+            color="info", className="d-flex align-items-center",
+        )
+        pagina = html.Div([aviso, pagina])
+    return pagina, huella
+
+@app.callback(
+    Output("datos-actualizados", "data"),
+    Output("sondeo-carga", "disabled"),
+    Input("sondeo-carga", "n_intervals"),
+    dash.State("huella-pagina", "data"),
+)
+def sondear_carga(_n, huella_pagina):
+    """Avisa a la página cuando se publicó un dataset distinto del que usó para dibujarse.
+
+    Compara huellas de contenido y no el contador de generaciones: con varios workers
+    cada sondeo puede caer en un proceso distinto, con su propio contador.
+    """
+    huella = _HUELLA_DATOS
+    # Un worker que todavía no publicó nada no devuelve la página al estado vacío
+    nueva = huella_pagina is not None and bool(huella) and huella != huella_pagina
+    # Se deja de sondear cuando no hay carga en curso y la página ya muestra el último dataset
+    terminado = not carga_en_curso() and huella_pagina is not None and not nueva
+    return (huella if nueva else dash.no_update), terminado
+
+# Carga inmediata salvo que estemos en build de docs o modo lazy. Va después de registrar
+# los callbacks para que el precalentamiento de la primera carga los encuentre.
+if not SPHINX_BUILD and not LAZY_LOAD:
+    if BACKGROUND_LOAD:
+        iniciar_carga_en_segundo_plano(force=False)
     else:
-        return html.H4("Página no encontrada.")
+        ensure_data_loaded()
 
 # ------------------------------------------------------
 if __name__ == "__main__":
@@ -1493,17 +5040,40 @@ if __name__ == "__main__":
     Output("reload-poller", "disabled"),
     Output("reload-status", "children"),
     Output("reload-done", "data"),
+    Output("sondeo-carga", "disabled", allow_duplicate=True),
+    Output("progreso-carga-intervalo", "disabled", allow_duplicate=True),
     Input("btn-reload-data", "n_clicks"),
+    Input("reload-poller", "n_intervals"),
     prevent_initial_call=True
 )
-def trigger_reload(n):
-    if not n:
-        raise dash.exceptions.PreventUpdate
-    # Intento de recarga sin bloquear: usamos requests interno
+def trigger_reload(n, _sondeos=0):
+    if _disparado_solo_por("btn-reload-data.n_clicks"):
+        if not n:
+            raise dash.exceptions.PreventUpdate
+        # Misma admisión que /reload-data (sin token): se une a la recarga en curso o espera
+        resultado, espera = coordinador_recargas.solicitar(cliente_http(), "boton")
+        if resultado == "limitada":
+            return True, f"Demasiados intentos seguidos; probá de nuevo en {espera:.0f}s.", dash.no_update, dash.no_update, dash.no_update
+        if resultado == "enfriamiento":
+            return True, f"Los datos se cargaron hace poco; se podrá recargar en {espera:.0f}s.", dash.no_update, dash.no_update, dash.no_update
+        # Recarga sin bloquear el hilo del request: el poller consulta el resultado
+        recarga = _CARGA_EN_CURSO
+        # Reactivar el sondeo global (al publicarse el dataset la página se redibuja sola)
+        # y el intervalo de la barra de progreso, que se apagó al no haber carga
+        sondeo = False
+    else:
+        recarga = _CARGA_EN_CURSO
+        sondeo = dash.no_update
+        if recarga is None:
+            raise dash.exceptions.PreventUpdate
+    if not recarga.done():
+        return False, "Recarga en curso… el sitio sigue disponible mientras tanto.", dash.no_update, sondeo, sondeo
     try:
-        ensure_data_loaded(force=True)
-        if len(df) == 0:
-            return False, "Intentando recargar... aún sin filas.", None
-        return True, f"Recarga completada. Filas: {len(df)}. Refresca el año o la página.", {"rows": len(df)}
+        recarga.result()
+        filas = filas_cargadas()
+        if filas == 0:
+            detalle = f" Último error: {_DATA_ERROR}" if _DATA_ERROR else ""
+            return True, f"Recarga finalizada, pero el dataset sigue sin filas.{detalle}", None, sondeo, sondeo
+        return True, f"Recarga completada. Filas: {filas}.", {"rows": filas}, sondeo, sondeo
     except Exception as e:
-        return True, f"Error al recargar: {e}", None
+        return True, f"Error al recargar: {e}", None, sondeo, sondeo
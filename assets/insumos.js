@@ -0,0 +1,151 @@
+/*
+ * Insumos: cambio de medida (monto/cantidad) y vista (agregado/por licitante) en el navegador.
+ *
+ * El servidor manda una vez por año el resumen compacto de `actualizar_insumos`
+ * (Store "insumos-datos"); acá se arman tabla, gráfico y textos con el mismo aspecto
+ * que tenían cuando se generaban con plotly express en Python.
+ */
+window.dash_clientside = window.dash_clientside || {};
+window.dash_clientside.ocds = Object.assign(window.dash_clientside.ocds || {}, {
+    vistaInsumos: function (datos, medida, vista, config) {
+        var sinCambios = window.dash_clientside.no_update;
+        var oculto = {display: "none"};
+        if (!datos) {
+            // Todavía no llegó el resumen del año: se deja la página como está
+            return [sinCambios, sinCambios, sinCambios, sinCambios, sinCambios,
+                    sinCambios, sinCambios, sinCambios, sinCambios];
+        }
+        if (datos.vacio || !datos[medida]) {
+            return ["⚠️ No se encontraron items para este año.", oculto, null, [], [], null, {}, null, null];
+        }
+        config = config || {};
+        var porMonto = medida === "monto";
+        var detalle = vista === "detalle";
+        var resumen = datos[medida];
+        var items = datos.items || [];
+        var licitantes = datos.licitantes || [];
+        var plantilla = config.plantilla || {};
+        var colores = (plantilla.layout && plantilla.layout.colorway) ||
+            ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A",
+             "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"];
+
+        function miles(v) {
+            return String(Math.round(v)).replace(/\B(?=(\d{3})+(?!\d))/g, ".");
+        }
+        function total(v) {
+            return porMonto ? miles(v) + "M" : miles(v);
+        }
+
+        // 1) Tabla: Top 20 según vista
+        var columnas = [
+            {name: "Código", id: "Código"},
+            {name: "Descripción corta", id: "Descripción corta"}
+        ];
+        if (detalle) {
+            columnas.push({name: "Licitante", id: "Licitante"});
+        }
+        columnas.push((config.columnas || {})[medida] || {name: "Valor", id: "Valor", type: "numeric"});
+        var filasTabla = detalle ? resumen.tabla : resumen.items;
+        var suma = 0;
+        var registros = filasTabla.map(function (f) {
+            var r = {"Código": items[f[0]][0], "Descripción corta": items[f[0]][1]};
+            if (detalle) {
+                r["Licitante"] = licitantes[f[1]];
+            }
+            r["Valor"] = f[f.length - 1];
+            suma += r["Valor"];
+            return r;
+        });
+
+        // 2) Gráfico: Top 20 ítems ordenados por total agregado
+        var orden = resumen.items.map(function (f) { return items[f[0]][1]; });
+        var etiquetaValor = porMonto ? "Monto (Millones)" : "Cantidad";
+        var trazas = [];
+        var layout = {
+            template: plantilla,
+            height: Math.max(520, 26 * orden.length + 100),
+            margin: {l: 220, r: 20, t: 60, b: 40},
+            xaxis: {title: {text: etiquetaValor}},
+            yaxis: {
+                title: {text: "Insumo"}, categoryorder: "array", categoryarray: orden,
+                automargin: true, tickmode: "array", tickvals: orden, ticktext: orden,
+                tickfont: {size: 11}
+            },
+            legend: {tracegroupgap: 0},
+            barmode: "relative"
+        };
+        if (!detalle) {
+            trazas.push({
+                type: "bar", orientation: "h", showlegend: false,
+                x: resumen.items.map(function (f) { return f[1]; }),
+                y: orden,
+                marker: {color: colores[0]},
+                hovertemplate: "Insumo=%{y}<br>" + (porMonto ? "Monto=%{x:.0f}M" : "Cantidad=%{x:.0f}"),
+                texttemplate: porMonto ? "%{x:.0f}M" : "%{x:.0f}",
+                textposition: "outside", cliponaxis: false
+            });
+        } else {
+            // Una traza apilada por licitante, en orden de aparición (como px.bar con color=)
+            var porLicitante = {};
+            var ordenLicitantes = [];
+            resumen.detalle.forEach(function (f) {
+                if (!(f[1] in porLicitante)) {
+                    porLicitante[f[1]] = {x: [], y: []};
+                    ordenLicitantes.push(f[1]);
+                }
+                porLicitante[f[1]].x.push(f[2]);
+                porLicitante[f[1]].y.push(items[f[0]][1]);
+            });
+            ordenLicitantes.forEach(function (l, k) {
+                var nombre = licitantes[l];
+                trazas.push({
+                    type: "bar", orientation: "h", name: nombre, legendgroup: nombre,
+                    showlegend: true, x: porLicitante[l].x, y: porLicitante[l].y,
+                    marker: {color: colores[k % colores.length]}, textposition: "auto",
+                    hovertemplate: "Insumo=%{y}<br>Licitante=%{legendgroup}<br>" +
+                        (porMonto ? "Monto=%{x:.0f}M" : "Cantidad=%{x:.0f}")
+                });
+            });
+            // Totales por insumo: solo texto a la derecha de cada barra apilada
+            var totales = {};
+            resumen.detalle.forEach(function (f) {
+                var d = items[f[0]][1];
+                totales[d] = (totales[d] || 0) + f[2];
+            });
+            var xTotales = orden.map(function (d) { return totales[d] || 0; });
+            trazas.push({
+                type: "scatter", mode: "text", x: xTotales, y: orden,
+                text: xTotales.map(total), textposition: "middle right",
+                showlegend: false, hoverinfo: "skip"
+            });
+            var maximo = Math.max.apply(null, xTotales.concat([0]));
+            if (maximo > 0) {
+                layout.xaxis.range = [0, maximo * 1.08];
+            }
+            layout.barmode = "stack";
+            layout.legend.title = {text: "Licitante"};
+            layout.uniformtext = {minsize: 8, mode: "hide"};
+        }
+
+        // 3) Textos explicativos
+        var porQue = porMonto ? "por monto (M)" : "por cantidad";
+        var titulo, explicacionTabla, explicacionGrafico;
+        if (!detalle) {
+            titulo = "Top 20 insumos por " + medida + " (agregado)";
+            explicacionTabla = "Esta tabla lista el Top 20 de ítems " + porQue +
+                " agregados por ítem en el año seleccionado.";
+            explicacionGrafico = "Este gráfico agrega por ítem (suma de todos los licitantes) y muestra los 20 ítems con mayor " +
+                (porMonto ? "monto (M)" : "cantidad") + ".";
+        } else {
+            titulo = "Top 20 insumos contratados por " + medida + " (detalle por licitante)";
+            explicacionTabla = "Esta tabla lista el Top 20 de combinaciones Ítem–Licitante " + porQue + ".";
+            explicacionGrafico = "Este gráfico muestra el Top 20 en detalle por licitante. El color identifica a cada licitante.";
+        }
+        var avisoCeros = suma === 0
+            ? "No hay cantidades/montos distintos de cero para este año en la selección actual."
+            : null;
+
+        return [null, {}, titulo, columnas, registros, explicacionTabla,
+                {data: trazas, layout: layout}, explicacionGrafico, avisoCeros];
+    }
+});
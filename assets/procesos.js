@@ -0,0 +1,32 @@
+/*
+ * Procesos: enlaces de exportación con los mismos filtros y orden que la tabla.
+ *
+ * Arma la query string de /api/procesos/exportar sin pasar por el servidor; la
+ * exportación en sí se descarga en streaming (CSV, CSV comprimido o Parquet).
+ */
+window.dash_clientside = window.dash_clientside || {};
+window.dash_clientside.ocds = Object.assign(window.dash_clientside.ocds || {}, {
+    enlacesExportacion: function (año, comprador, proveedor, tipo, sortBy, texto, prefijo) {
+        var params = [];
+        function agregar(clave, valor) {
+            if (valor !== null && valor !== undefined && valor !== "") {
+                params.push(encodeURIComponent(clave) + "=" + encodeURIComponent(valor));
+            }
+        }
+        agregar("anio", año);
+        agregar("comprador", comprador);
+        agregar("proveedor", proveedor);
+        agregar("tipo", tipo);
+        agregar("q", texto && texto.trim());
+        if (texto && texto.trim() && (prefijo || []).indexOf("prefijo") < 0) {
+            agregar("prefijo", "0");
+        }
+        agregar("orden", (sortBy || []).map(function (s) {
+            return s.column_id + ":" + (s.direction === "desc" ? "desc" : "asc");
+        }).join(","));
+        var consulta = params.length ? "&" + params.join("&") : "";
+        return ["csv", "csv.gz", "parquet"].map(function (formato) {
+            return "/api/procesos/exportar?formato=" + formato + consulta;
+        });
+    }
+});
@@ -0,0 +1,362 @@
+"""Benchmarks de la carga y de cada callback del tablero sobre datasets sintéticos.
+
+Para cada tamaño genera (o reutiliza) un archivo con ``generar_ocds_sintetico.py`` y
+mide, cada grupo en un proceso aparte para que el pico de memoria de uno no contamine
+al siguiente:
+
+- ``ingesta``: ``cargar_ocds``, ``extraer_contratos`` y ``detectar_tipo`` sobre todas las filas.
+- ``carga``: ``_cargar_datos_internamente`` completo, en modo estándar y con ``STREAM_PARSE=1``.
+- ``callbacks``: cada callback registrado con entradas representativas (sin cachés
+  ni coalescencia: se mide el cálculo).
+
+Cada caso registra tiempo de pared (mínimo y mediana de las repeticiones), pico de RSS
+durante el caso y tamaño de la respuesta serializada como la envía Dash; en los callbacks
+también los bytes en la red, con la compresión que aplica la app. Los resultados
+se guardan en JSON y, con ``--comparar``, se contrastan con una línea base: termina con
+código 1 si algún caso empeora más que los umbrales.
+
+Uso::
+
+    python scripts/benchmark.py --tamaños 2000,20000 --salida benchmarks/linea_base.json
+    python scripts/benchmark.py --tamaños 2000,20000 --comparar benchmarks/linea_base.json
+    python scripts/benchmark.py --tamaños 100000 --grupos carga --backends pandas,sqlite
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+GRUPOS = ("ingesta", "carga", "callbacks")
+
+
+# ------------------------------------------------------
+# Medición (dentro del proceso de cada grupo)
+# ------------------------------------------------------
+class _MedidorRSS:
+    """Muestrea el RSS del proceso en un hilo mientras dura el bloque ``with``."""
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.inicio = self.pico = 0
+        try:
+            import psutil  # type: ignore  # dependencia de dash[diskcache]
+            self._proceso = psutil.Process()
+        except Exception:
+            self._proceso = None
+
+    def _rss(self):
+        return self._proceso.memory_info().rss if self._proceso is not None else 0
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, self._rss())
+
+    def __enter__(self):
+        self.inicio = self.pico = self._rss()
+        self._fin = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *_exc):
+        self._fin.set()
+        self._hilo.join()
+        self.pico = max(self.pico, self._rss())
+
+
+def _tamano_respuesta(resultado):
+    """Bytes de la respuesta tal como la serializa Dash y bytes en la red (con la compresión de la app)."""
+    from plotly.io.json import to_json_plotly
+    from app.app import comprimir_cuerpo
+
+    cuerpo = to_json_plotly(resultado).encode("utf-8")
+    return len(cuerpo), len(comprimir_cuerpo(cuerpo)[0])
+
+
+def _medir(resultados, clave, funcion, repeticiones, tamano=None):
+    """Ejecuta ``funcion`` ``repeticiones`` veces y guarda tiempos, memoria y tamaño en ``resultados``."""
+    import dash
+
+    tiempos, picos, deltas, resultado = [], [], [], None
+    for _ in range(repeticiones):
+        with _MedidorRSS() as rss:
+            t0 = time.perf_counter()
+            try:
+                resultado = funcion()
+            except dash.exceptions.PreventUpdate:
+                resultado = dash.no_update
+            tiempos.append(time.perf_counter() - t0)
+        picos.append(rss.pico)
+        deltas.append(rss.pico - rss.inicio)
+    en_red = None
+    if tamano is None:
+        tamano, en_red = (0, 0) if resultado is dash.no_update else _tamano_respuesta(resultado)
+    elif callable(tamano):
+        tamano = tamano(resultado)
+    resultados[clave] = {
+        "min_s": round(min(tiempos), 6),
+        "mediana_s": round(statistics.median(tiempos), 6),
+        "rss_pico_mb": round(max(picos) / 2**20, 1),
+        "rss_delta_mb": round(max(deltas) / 2**20, 1),
+        "bytes": int(tamano),
+    }
+    if en_red is not None:
+        resultados[clave]["bytes_red"] = int(en_red)
+    print(f"  {clave}: {resultados[clave]['mediana_s'] * 1000:.1f} ms, "
+          f"+{resultados[clave]['rss_delta_mb']} MB, {resultados[clave]['bytes']} B"
+          + (f" ({en_red} B en la red)" if en_red is not None else ""), file=sys.stderr)
+    return resultado
+
+
+def _importar_app():
+    sys.path.insert(0, RAIZ)
+    import app.app as m
+
+    return m
+
+
+def _grupo_ingesta(archivo, repeticiones):
+    m = _importar_app()
+    res = {}
+    raw = _medir(res, "cargar_ocds", lambda: m.cargar_ocds(archivo), repeticiones, tamano=os.path.getsize(archivo))
+    contratos = _medir(res, "extraer_contratos", lambda: m.extraer_contratos(raw), repeticiones, tamano=len)
+    _medir(res, "extraer_items", lambda: m.extraer_items(raw), repeticiones, tamano=len)
+    # Igual que la carga (_normalizar_contratos): una llamada por fila
+    _medir(res, "detectar_tipo", lambda: contratos.apply(
+        lambda r: m.detectar_tipo(r.get("tender_id"), r.get("titulo"), r.get("contrato_desc"), r.get("submission_details")),
+        axis=1,
+    ), repeticiones, tamano=len)
+    return res
+
+
+def _grupo_carga(archivo, repeticiones):
+    m = _importar_app()
+    res = {}
+    modo = "stream" if os.getenv("STREAM_PARSE") == "1" else "estandar"
+
+    def cargar():
+        m._cargar_datos_internamente()
+        return m.filas_cargadas()
+
+    _medir(res, f"cargar_datos_{modo}", cargar, repeticiones, tamano=lambda filas: filas)
+    return res
+
+
+def _casos_callbacks(m):
+    """Entradas representativas por callback (nombre de la función -> lista de (etiqueta, args))."""
+    años = sorted((a for a in m.consultar_años() if a is not None), reverse=True)
+    recientes = años[:3] or [None]
+    año = recientes[0]
+    compradores, proveedores, tipos = m.consultar_opciones_procesos()
+    monto_desc = [{"column_id": "Monto (Millones)", "direction": "desc"}]
+    # Procesos exige un año; fuera de un request la página vuelve siempre a 0
+    procesos = [("año", (año, None, None, None, None, 0, 20, None, ["prefijo"]))]
+    if compradores:
+        procesos.append(("comprador", (año, compradores[0], None, None, None, 0, 20, None, ["prefijo"])))
+    if proveedores:
+        procesos.append(("proveedor", (año, None, proveedores[0], None, None, 0, 20, None, ["prefijo"])))
+    if tipos:
+        procesos.append(("tipo+orden_monto", (año, None, None, tipos[0], monto_desc, 0, 20, None, ["prefijo"])))
+    procesos += [
+        ("texto", (año, None, None, None, None, 0, 20, "servicio", ["prefijo"])),
+        ("texto_prefijo_orden", (año, None, None, None, monto_desc, 0, 20, "medic", ["prefijo"])),
+    ]
+    return {
+        "actualizar_home": [(f"año={a}", (a,)) for a in recientes],
+        "actualizar_insumos": [(f"año={a}", (a,)) for a in recientes[:2]],
+        "filtrar_procesos": procesos,
+        "mostrar_pagina": [(ruta, (ruta, m._HUELLA_DATOS)) for ruta in ("/", "/insumos", "/procesos", "/acerca")],
+        "sondear_carga": [("sin_cambios", (1, m._HUELLA_DATOS))],
+        "actualizar_progreso_carga": [("inactiva", (1,))],
+        "trigger_reload": [("sondeo_terminada", (None, 1))],
+    }
+
+
+def _grupo_callbacks(archivo, repeticiones):
+    m = _importar_app()
+    m.ensure_data_loaded()
+    if m._DATA_ERROR:
+        raise RuntimeError(m._DATA_ERROR)
+    # Una carga "en segundo plano" ya terminada, para que trigger_reload tenga qué informar
+    m.iniciar_carga_en_segundo_plano(force=False).result()
+    funciones = {}
+    for entrada in m.app.callback_map.values():
+        fn = entrada.get("callback")
+        if fn is not None:
+            funciones.setdefault(fn.__name__, inspect.unwrap(fn))  # sin caché ni single-flight
+    res = {}
+    casos = _casos_callbacks(m)
+    for nombre in sorted(funciones):
+        if nombre not in casos:
+            print(f"  (sin entradas de ejemplo para {nombre})", file=sys.stderr)
+            continue
+        for etiqueta, args in casos[nombre]:
+            _medir(res, f"{nombre}[{etiqueta}]", lambda: funciones[nombre](*args), repeticiones)
+    return res
+
+
+def _ejecutar_grupo(grupo, archivo, repeticiones):
+    """Punto de entrada del proceso hijo: imprime los resultados del grupo como JSON."""
+    import resource
+
+    funcion = {"ingesta": _grupo_ingesta, "carga": _grupo_carga, "callbacks": _grupo_callbacks}[grupo]
+    res = funcion(archivo, repeticiones)
+    pico_proceso = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB en Linux
+    print(json.dumps({"resultados": res, "rss_max_proceso_mb": round(pico_proceso, 1)}))
+
+
+# ------------------------------------------------------
+# Orquestación, resultados y comparación
+# ------------------------------------------------------
+def _dataset(tamano, semilla, directorio):
+    sys.path.insert(0, os.path.dirname(__file__))
+    from generar_ocds_sintetico import generar_archivo
+
+    ruta = os.path.join(directorio, f"sintetico-{tamano}-{semilla}.json")
+    if not os.path.exists(ruta):
+        print(f"Generando {ruta} ...", file=sys.stderr)
+        generar_archivo(ruta + ".tmp", releases=tamano, semilla=semilla)
+        os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+def _lanzar(grupo, archivo, repeticiones, entorno_extra):
+    entorno = {k: v for k, v in os.environ.items() if k != "STREAM_PARSE"}
+    entorno.update(OCDS_JSON_URL=archivo, LAZY_LOAD="1", BACKGROUND_LOAD="0", OCDS_WARMUP="0",
+                   OCDS_BACKGROUND="0", OCDS_PUBLISH_EVERY="0", **entorno_extra)
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--interno", grupo, archivo, "--repeticiones", str(repeticiones)],
+        env=entorno, stdout=subprocess.PIPE, text=True,
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"el grupo {grupo} terminó con código {proceso.returncode}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def correr(tamaños, grupos, backends, repeticiones, semilla, directorio):
+    import pandas as pd
+
+    salida = {
+        "meta": {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": _commit_actual(),
+            "python": platform.python_version(), "pandas": pd.__version__, "plataforma": platform.platform(),
+            "cpus": os.cpu_count(), "tamaños": tamaños, "semilla": semilla, "repeticiones": repeticiones,
+        },
+        "resultados": {},
+        "rss_max_proceso_mb": {},
+    }
+    for tamano in tamaños:
+        archivo = _dataset(tamano, semilla, directorio)
+        ejecuciones = []
+        for backend in backends:
+            sqlite = {"OCDS_BACKEND": backend, "OCDS_SQLITE_PATH": os.path.join(directorio, f"bench-{tamano}.sqlite3")}
+            if "ingesta" in grupos and backend == backends[0]:
+                ejecuciones.append(("ingesta", "ingesta", sqlite))
+            if "carga" in grupos:
+                ejecuciones.append(("carga", f"carga/{backend}", sqlite))
+                ejecuciones.append(("carga", f"carga_stream/{backend}", dict(sqlite, STREAM_PARSE="1")))
+            if "callbacks" in grupos:
+                ejecuciones.append(("callbacks", f"callbacks/{backend}", sqlite))
+        for grupo, nombre, entorno in ejecuciones:
+            print(f"[{tamano}] {nombre}", file=sys.stderr)
+            res = _lanzar(grupo, archivo, repeticiones, entorno)
+            salida["rss_max_proceso_mb"][f"{tamano}/{nombre}"] = res["rss_max_proceso_mb"]
+            for caso, valores in res["resultados"].items():
+                salida["resultados"][f"{tamano}/{nombre}/{caso}"] = valores
+    return salida
+
+
+def comparar(actual, base, umbral=0.25, umbral_rss=0.25, umbral_bytes=0.05, minimo_ms=5.0, minimo_mb=5.0):
+    """Casos que empeoran respecto de ``base`` más allá de los umbrales relativos (y de un mínimo absoluto).
+
+    Retorna
+    -------
+    list[str]
+        Descripción de cada regresión (vacía si no hay).
+    """
+    regresiones = []
+    print(f"{'caso':70} {'base ms':>9} {'ms':>9} {'x':>6} {'Δ MB':>7} {'bytes':>10} {'en red':>9}")
+    for clave, r in sorted(actual["resultados"].items()):
+        b = base.get("resultados", {}).get(clave)
+        if b is None:
+            print(f"{clave:70} {'-':>9} {r['mediana_s'] * 1000:9.1f}   (nuevo)")
+            continue
+        razon = r["mediana_s"] / b["mediana_s"] if b["mediana_s"] else 1.0
+        marcas = []
+        if razon > 1 + umbral and (r["mediana_s"] - b["mediana_s"]) * 1000 > minimo_ms:
+            marcas.append(f"tiempo x{razon:.2f}")
+        if r["rss_delta_mb"] > b["rss_delta_mb"] * (1 + umbral_rss) and r["rss_delta_mb"] - b["rss_delta_mb"] > minimo_mb:
+            marcas.append(f"memoria +{r['rss_delta_mb'] - b['rss_delta_mb']:.1f} MB")
+        if r["bytes"] > b["bytes"] * (1 + umbral_bytes) and r["bytes"] - b["bytes"] > 1024:
+            marcas.append(f"respuesta {b['bytes']} -> {r['bytes']} B")
+        if "bytes_red" in r and "bytes_red" in b and r["bytes_red"] > b["bytes_red"] * (1 + umbral_bytes) \
+                and r["bytes_red"] - b["bytes_red"] > 1024:
+            marcas.append(f"en la red {b['bytes_red']} -> {r['bytes_red']} B")
+        print(f"{clave:70} {b['mediana_s'] * 1000:9.1f} {r['mediana_s'] * 1000:9.1f} {razon:6.2f} "
+              f"{r['rss_delta_mb'] - b['rss_delta_mb']:7.1f} {r['bytes']:10d} {r.get('bytes_red', '-'):>9}  "
+              f"{'; '.join(marcas)}")
+        regresiones += [f"{clave}: {m}" for m in marcas]
+    return regresiones
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--interno", nargs=2, metavar=("GRUPO", "ARCHIVO"), help=argparse.SUPPRESS)
+    parser.add_argument("--tamaños", default="2000,20000", help="releases por dataset, separados por coma")
+    parser.add_argument("--grupos", default=",".join(GRUPOS), help=f"subconjunto de {','.join(GRUPOS)}")
+    parser.add_argument("--backends", default="pandas", help="pandas, sqlite o ambos separados por coma")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--datos", default=os.path.join(tempfile.gettempdir(), "ocds-benchmark"),
+                        help="carpeta de los datasets generados (se reutilizan)")
+    parser.add_argument("--salida", default="resultados-benchmark.json")
+    parser.add_argument("--comparar", metavar="LINEA_BASE", help="JSON de una corrida anterior")
+    parser.add_argument("--umbral", type=float, default=0.25, help="empeoramiento relativo tolerado en tiempo")
+    parser.add_argument("--umbral-rss", type=float, default=0.25, help="empeoramiento relativo tolerado en memoria")
+    parser.add_argument("--umbral-bytes", type=float, default=0.05, help="crecimiento tolerado de las respuestas")
+    args = parser.parse_args(argv[1:])
+
+    if args.interno:
+        _ejecutar_grupo(args.interno[0], args.interno[1], max(1, args.repeticiones))
+        return 0
+
+    os.makedirs(args.datos, exist_ok=True)
+    tamaños = [int(t) for t in args.tamaños.split(",") if t.strip()]
+    grupos = [g for g in args.grupos.split(",") if g in GRUPOS]
+    backends = [b for b in args.backends.split(",") if b in ("pandas", "sqlite")] or ["pandas"]
+    salida = correr(tamaños, grupos, backends, max(1, args.repeticiones), args.semilla, args.datos)
+    if os.path.dirname(args.salida):
+        os.makedirs(os.path.dirname(args.salida), exist_ok=True)
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(salida, f, ensure_ascii=False, indent=2)
+    print(f"Resultados en {args.salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regresiones = comparar(salida, base, args.umbral, args.umbral_rss, args.umbral_bytes)
+        print(f"Regresiones: {len(regresiones)}")
+        for r in regresiones:
+            print(f"  REGRESIÓN: {r}")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,403 @@
+"""Prueba de carga con usuarios concurrentes contra los callbacks de Dash.
+
+Cada usuario virtual repite una sesión como la de un navegador: carga la página
+(``/``, ``/_dash-layout``, ``/_dash-dependencies``), cambia de año en Home y en
+Insumos (sondeando el resultado si corre en segundo plano) y combina
+filtros, órdenes, páginas y búsqueda de texto en Procesos. Los pedidos se arman a
+partir de ``/_dash-dependencies``, igual que el cliente de Dash, y se envían a
+``/_dash-update-component``.
+
+Informa, por callback, pedidos, errores, throughput y percentiles de latencia (para
+los callbacks en segundo plano, desde el pedido hasta recibir el resultado). Con
+``--configuraciones`` levanta gunicorn localmente con cada combinación de workers ×
+threads y, con varios valores en ``--usuarios``, muestra dónde se satura cada una.
+
+Uso::
+
+    # Contra un servidor ya levantado
+    python scripts/carga_usuarios.py --url http://127.0.0.1:8050 --usuarios 1,4,16 --duracion 30
+
+    # Levantando gunicorn con cada configuración sobre datos sintéticos
+    python scripts/carga_usuarios.py --configuraciones 1x4,2x2,2x4 --datos sintetico:20000 --usuarios 4,16,32
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+# Salida principal de cada callback -> nombre de la función (el mismo que usa /metrics)
+NOMBRES = {
+    "contenido-home.children": "actualizar_home",
+    "insumos-datos.data": "actualizar_insumos",
+    "tabla-procesos-filter.data": "filtrar_procesos",
+    "page-content.children": "mostrar_pagina",
+    "datos-actualizados.data": "sondear_carga",
+}
+_ORDENES = (
+    None,
+    [{"column_id": "Monto (Millones)", "direction": "desc"}],
+    [{"column_id": "fecha", "direction": "asc"}],
+    [{"column_id": "proveedor", "direction": "asc"}],
+)
+_TEXTOS = ("servicio", "medic", "combustible", "limpieza", "insumos hospitalarios")
+
+
+# ------------------------------------------------------
+# Cliente de Dash
+# ------------------------------------------------------
+class Registro:
+    """Latencias y errores por operación, compartidos entre usuarios."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.sesiones = 0
+
+    def anotar(self, nombre, segundos, error=False):
+        with self._lock:
+            if error:
+                self.errores[nombre] += 1
+            else:
+                self.latencias[nombre].append(segundos)
+
+
+class ClienteDash:
+    """Arma y envía pedidos a ``/_dash-update-component`` como el navegador."""
+
+    def __init__(self, url, dependencias, registro, sondeo=0.25, timeout=120):
+        self.url = url.rstrip("/")
+        self.http = requests.Session()
+        self.registro = registro
+        self.sondeo = sondeo
+        self.timeout = timeout
+        self._deps = {}
+        for dep in dependencias:
+            for salida in dep["output"].strip(".").split("..."):
+                self._deps.setdefault(salida.split("@")[0], dep)
+
+    def get(self, ruta):
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.get(self.url + ruta, timeout=self.timeout)
+            self.registro.anotar(f"GET {ruta}", time.perf_counter() - t0, resp.status_code >= 400)
+            return resp
+        except requests.RequestException:
+            self.registro.anotar(f"GET {ruta}", time.perf_counter() - t0, True)
+            return None
+
+    def _cuerpo(self, dep, valores, cambiados):
+        def especificacion(lista):
+            return [dict(e, value=valores.get(f"{e['id']}.{e['property']}")) for e in lista]
+
+        salidas = []
+        for salida in dep["output"].strip(".").split("..."):
+            id_, _, prop = salida.rpartition(".")
+            salidas.append({"id": id_, "property": prop.split("@")[0]})
+        return {
+            "output": dep["output"],
+            "outputs": salidas if dep["output"].startswith("..") else salidas[0],
+            "inputs": especificacion(dep["inputs"]),
+            "state": especificacion(dep["state"]),
+            "changedPropIds": list(cambiados),
+        }
+
+    def callback(self, salida, valores, cambiados):
+        """Dispara el callback de ``salida`` y devuelve su ``response`` (o ``None`` si falló)."""
+        dep = self._deps[salida]
+        nombre = NOMBRES.get(salida, salida)
+        cuerpo = self._cuerpo(dep, valores, cambiados)
+        t0 = time.perf_counter()
+        try:
+            resp = self.http.post(self.url + "/_dash-update-component", json=cuerpo, timeout=self.timeout)
+            datos = resp.json() if resp.status_code == 200 else {}
+            # Callback en segundo plano: sondear con cacheKey/job hasta que llegue el resultado
+            while resp.status_code == 200 and "cacheKey" in datos and "response" not in datos:
+                clave, trabajo = datos["cacheKey"], datos.get("job")
+                while True:
+                    time.sleep(self.sondeo)
+                    resp = self.http.post(self.url + "/_dash-update-component", json=cuerpo,
+                                          params={"cacheKey": clave, "job": trabajo}, timeout=self.timeout)
+                    if resp.status_code != 200:
+                        break
+                    datos = resp.json()
+                    if "response" in datos:
+                        break
+                    if time.perf_counter() - t0 > self.timeout:
+                        raise TimeoutError(nombre)
+                break
+        except (requests.RequestException, ValueError, TimeoutError):
+            self.registro.anotar(nombre, time.perf_counter() - t0, True)
+            return None
+        # 204: el callback no actualizó nada (PreventUpdate), cuenta como respuesta válida
+        error = resp.status_code not in (200, 204)
+        self.registro.anotar(nombre, time.perf_counter() - t0, error)
+        return None if error else datos.get("response", {})
+
+
+def _buscar_componente(nodo, id_buscado):
+    """Props del componente ``id_buscado`` dentro de un layout serializado."""
+    if isinstance(nodo, dict):
+        props = nodo.get("props")
+        if isinstance(props, dict) and props.get("id") == id_buscado:
+            return props
+        for valor in nodo.values():
+            encontrado = _buscar_componente(valor, id_buscado)
+            if encontrado is not None:
+                return encontrado
+    elif isinstance(nodo, list):
+        for valor in nodo:
+            encontrado = _buscar_componente(valor, id_buscado)
+            if encontrado is not None:
+                return encontrado
+    return None
+
+
+def _opciones(pagina, id_componente):
+    props = _buscar_componente(pagina, id_componente) or {}
+    valores = [o.get("value") if isinstance(o, dict) else o for o in props.get("options") or []]
+    return props.get("value"), [v for v in valores if v is not None]
+
+
+# ------------------------------------------------------
+# Sesión de un usuario
+# ------------------------------------------------------
+def sesion(cliente, rng, pausa):
+    """Una visita completa: Home, Insumos y Procesos con cambios de filtros."""
+    def esperar():
+        if pausa:
+            time.sleep(rng.uniform(0.5 * pausa, 1.5 * pausa))
+
+    def pagina(ruta):
+        resp = cliente.callback("page-content.children", {"url.pathname": ruta, "datos-actualizados.data": None},
+                                ["url.pathname"])
+        return (resp or {}).get("page-content", {}).get("children")
+
+    cliente.get("/")
+    cliente.get("/_dash-layout")
+    cliente.get("/_dash-dependencies")
+
+    # Home: año por defecto y dos cambios de año
+    home = pagina("/")
+    año, años = _opciones(home, "año-selector-home")
+    for a in [año] + rng.sample(años, min(2, len(años))):
+        cliente.callback("contenido-home.children", {"año-selector-home.value": a}, ["año-selector-home.value"])
+        esperar()
+
+    # Insumos: resumen del año por defecto y de otro año; medida y vista se cambian en el
+    # navegador (callback clientside), así que solo el cambio de año llega al servidor
+    insumos = pagina("/insumos")
+    año, años = _opciones(insumos, "año-selector-insumos")
+    for a in [año] + rng.sample(años, min(1, len(años))):
+        cliente.callback("insumos-datos.data", {"año-selector-insumos.value": a}, ["año-selector-insumos.value"])
+        esperar()
+
+    # Procesos: año, comprador, tipo, orden, páginas y búsqueda de texto
+    procesos = pagina("/procesos")
+    año, años = _opciones(procesos, "filtro-año")
+    _, compradores = _opciones(procesos, "filtro-comprador")
+    _, proveedores = _opciones(procesos, "filtro-proveedor")
+    _, tipos = _opciones(procesos, "filtro-tipo")
+    estado = {
+        "filtro-año.value": año, "filtro-comprador.value": None, "filtro-proveedor.value": None,
+        "filtro-tipo.value": None, "tabla-procesos-filter.sort_by": None, "tabla-procesos-filter.page_current": 0,
+        "tabla-procesos-filter.page_size": 20, "filtro-texto.value": None, "filtro-prefijo.value": ["prefijo"],
+    }
+    pasos = [("filtro-año.value", año)]
+    if años:
+        pasos.append(("filtro-año.value", rng.choice(años)))
+    if compradores:
+        pasos.append(("filtro-comprador.value", rng.choice(compradores[:50])))
+    pasos.append(("tabla-procesos-filter.sort_by", rng.choice(_ORDENES[1:])))
+    pasos += [("tabla-procesos-filter.page_current", p) for p in (1, 2)]
+    if tipos:
+        pasos.append(("filtro-tipo.value", rng.choice(tipos)))
+    if proveedores and rng.random() < 0.5:
+        pasos.append(("filtro-proveedor.value", rng.choice(proveedores[:100])))
+    pasos += [("filtro-comprador.value", None), ("filtro-texto.value", rng.choice(_TEXTOS))]
+    for prop, valor in pasos:
+        estado[prop] = valor
+        if prop != "tabla-procesos-filter.page_current":
+            estado["tabla-procesos-filter.page_current"] = 0
+        cliente.callback("tabla-procesos-filter.data", estado, [prop])
+        esperar()
+
+
+def _usuario(indice, url, dependencias, registro, fin, pausa, semilla):
+    rng = random.Random(semilla * 1000 + indice)
+    cliente = ClienteDash(url, dependencias, registro)
+    while time.perf_counter() < fin:
+        sesion(cliente, rng, pausa)
+        with registro._lock:
+            registro.sesiones += 1
+
+
+def correr_carga(url, usuarios, duracion, pausa=0.0, semilla=1):
+    """Corre ``usuarios`` sesiones concurrentes durante ``duracion`` segundos y devuelve el resumen."""
+    dependencias = requests.get(url.rstrip("/") + "/_dash-dependencies", timeout=30).json()
+    # Una sesión previa sin medir: primeras compilaciones, cachés de layout y conexiones
+    sesion(ClienteDash(url, dependencias, Registro()), random.Random(semilla), 0)
+    registro = Registro()
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+    hilos = [threading.Thread(target=_usuario, args=(i, url, dependencias, registro, fin, pausa, semilla), daemon=True)
+             for i in range(usuarios)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return resumir(registro, time.perf_counter() - inicio, usuarios)
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return None
+    k = (len(ordenados) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenados) - 1)
+    return ordenados[i] + (ordenados[j] - ordenados[i]) * (k - i)
+
+
+def resumir(registro, segundos, usuarios):
+    operaciones = {}
+    for nombre in sorted(set(registro.latencias) | set(registro.errores)):
+        lat = sorted(registro.latencias.get(nombre, []))
+        operaciones[nombre] = {
+            "pedidos": len(lat), "errores": registro.errores.get(nombre, 0),
+            "por_segundo": round(len(lat) / segundos, 2),
+            **{f"p{p}_ms": round(_percentil(lat, p) * 1000, 1) if lat else None for p in (50, 90, 95, 99)},
+            "max_ms": round(lat[-1] * 1000, 1) if lat else None,
+        }
+    total = sum(o["pedidos"] for o in operaciones.values())
+    return {
+        "usuarios": usuarios, "segundos": round(segundos, 1), "sesiones": registro.sesiones,
+        "pedidos": total, "errores": sum(o["errores"] for o in operaciones.values()),
+        "por_segundo": round(total / segundos, 2), "operaciones": operaciones,
+    }
+
+
+def imprimir(titulo, resumen):
+    print(f"\n== {titulo}: {resumen['usuarios']} usuarios, {resumen['segundos']} s, {resumen['sesiones']} sesiones, "
+          f"{resumen['por_segundo']} pedidos/s, {resumen['errores']} errores")
+    print(f"{'operación':28} {'pedidos':>8} {'err':>5} {'req/s':>7} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for nombre, o in resumen["operaciones"].items():
+        def ms(v):
+            return f"{v:8.1f}" if v is not None else f"{'-':>8}"
+        print(f"{nombre:28} {o['pedidos']:8d} {o['errores']:5d} {o['por_segundo']:7.2f} "
+              f"{ms(o['p50_ms'])} {ms(o['p90_ms'])} {ms(o['p95_ms'])} {ms(o['p99_ms'])} {ms(o['max_ms'])}")
+
+
+# ------------------------------------------------------
+# Servidor local (gunicorn) por configuración
+# ------------------------------------------------------
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _resolver_datos(datos):
+    if not datos.startswith("sintetico:"):
+        return os.path.abspath(datos) if os.path.exists(datos) else datos
+    sys.path.insert(0, os.path.dirname(__file__))
+    from generar_ocds_sintetico import generar_archivo
+
+    n = int(datos.split(":")[1])
+    ruta = os.path.join(tempfile.gettempdir(), "ocds-benchmark", f"sintetico-{n}-42.json")
+    if not os.path.exists(ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        generar_archivo(ruta + ".tmp", releases=n, semilla=42)
+        os.replace(ruta + ".tmp", ruta)
+    return ruta
+
+
+class ServidorLocal:
+    """gunicorn con ``workers`` × ``threads`` (gthread) sobre un puerto libre; espera a ``/ready``."""
+
+    def __init__(self, workers, threads, datos, entorno_extra=None, espera_max=600):
+        self.url = f"http://127.0.0.1:{_puerto_libre()}"
+        self.log = tempfile.NamedTemporaryFile(prefix=f"gunicorn-{workers}x{threads}-", suffix=".log", delete=False)
+        entorno = dict(os.environ, OCDS_JSON_URL=datos, **(entorno_extra or {}))
+        self.proceso = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app.app:server", "--chdir", RAIZ, "--bind", self.url[7:],
+             "--workers", str(workers), "--worker-class", "gthread", "--threads", str(threads), "--timeout", "150"],
+            env=entorno, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        limite = time.monotonic() + espera_max
+        while time.monotonic() < limite:
+            if self.proceso.poll() is not None:
+                raise RuntimeError(f"gunicorn terminó al iniciar (ver {self.log.name})")
+            try:
+                if requests.get(self.url + "/ready", timeout=2).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        self.cerrar()
+        raise RuntimeError(f"el servidor no quedó listo en {espera_max}s (ver {self.log.name})")
+
+    def cerrar(self):
+        if self.proceso.poll() is None:
+            self.proceso.send_signal(signal.SIGTERM)
+            try:
+                self.proceso.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proceso.kill()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8050", help="servidor ya levantado (sin --configuraciones)")
+    parser.add_argument("--configuraciones", help="workers x threads a levantar, p. ej. 1x4,2x2,2x4")
+    parser.add_argument("--datos", default=os.getenv("OCDS_JSON_URL", ""),
+                        help="archivo/URL para OCDS_JSON_URL del servidor, o sintetico:N")
+    parser.add_argument("--usuarios", default="4", help="usuarios concurrentes; varios valores separados por coma")
+    parser.add_argument("--duracion", type=float, default=30, help="segundos por corrida")
+    parser.add_argument("--pausa", type=float, default=0.0, help="pausa media entre acciones de un usuario (s)")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--salida", help="JSON con todos los resúmenes")
+    args = parser.parse_args(argv[1:])
+
+    niveles = [int(u) for u in args.usuarios.split(",") if u.strip()]
+    corridas = []
+    if args.configuraciones:
+        if not args.datos:
+            parser.error("--configuraciones requiere --datos (o OCDS_JSON_URL)")
+        datos = _resolver_datos(args.datos)
+        for conf in args.configuraciones.split(","):
+            workers, threads = (int(x) for x in conf.lower().split("x"))
+            print(f"Levantando gunicorn {workers} workers x {threads} threads ...", file=sys.stderr)
+            servidor = ServidorLocal(workers, threads, datos)
+            try:
+                for n in niveles:
+                    resumen = correr_carga(servidor.url, n, args.duracion, args.pausa, args.semilla)
+                    imprimir(f"{workers}x{threads}", resumen)
+                    corridas.append(dict(resumen, configuracion=f"{workers}x{threads}"))
+            finally:
+                servidor.cerrar()
+    else:
+        for n in niveles:
+            resumen = correr_carga(args.url, n, args.duracion, args.pausa, args.semilla)
+            imprimir(args.url, resumen)
+            corridas.append(dict(resumen, configuracion=args.url))
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"fecha": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "corridas": corridas}, f,
+                      ensure_ascii=False, indent=2)
+    return 1 if any(c["errores"] for c in corridas) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,278 @@
+"""Genera un paquete de releases OCDS sintético, determinista y con la forma de los datos de Mendoza.
+
+Sirve para probar el tablero a 10× o 100× el volumen del archivo real: la misma
+semilla y los mismos parámetros producen siempre los mismos bytes. Los releases
+imitan lo que consume la app: adjudicaciones con varios proveedores, contratos
+con ``awardID`` (órdenes de compra), ítems con clasificación y cantidad,
+identificadores con sufijo ``LPU``/``CDI`` y procesos sin ``tender.id`` cuyo
+número solo figura como ``Proceso Nº ...`` en la descripción del contrato.
+Compradores, proveedores e insumos siguen una distribución sesgada (Zipf): pocos
+concentran la mayor parte de los procesos, como en los datos reales.
+
+La salida se elige por extensión: ``.json`` (paquete de releases), ``.json.gz``
+(el mismo paquete comprimido, que la app lee directamente) o ``.jsonl`` /
+``.jsonl.gz`` (un release por línea). Se escribe en streaming, sin armar el
+paquete en memoria.
+
+Uso::
+
+    python scripts/generar_ocds_sintetico.py salida.json --releases 200000
+    python scripts/generar_ocds_sintetico.py salida.json.gz --releases 50000 --años 2015-2025 --semilla 7
+    python scripts/generar_ocds_sintetico.py salida.jsonl --compradores 300 --proveedores 20000 --insumos 40000
+"""
+import argparse
+import bisect
+import gzip
+import itertools
+import json
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Tipos de proceso (sufijo del identificador) con su peso y la forma del título
+_TIPOS = (
+    ("CDI", 0.62, "Contratación Directa"),
+    ("LPU", 0.23, "Licitación Pública"),
+    ("LPR", 0.10, "Licitación Privada"),
+    ("CME", 0.05, "Compra Menor"),
+)
+_RUBROS = (
+    "medicamentos", "insumos hospitalarios", "combustible", "artículos de librería", "servicio de limpieza",
+    "alimentos", "equipamiento informático", "materiales de construcción", "repuestos automotor",
+    "servicio de mantenimiento", "mobiliario", "productos químicos", "indumentaria", "servicio de vigilancia",
+)
+_ORGANISMOS = (
+    "Ministerio de Salud", "Ministerio de Seguridad", "Dirección General de Escuelas", "Hospital Central",
+    "Hospital Lagomaggiore", "Hospital Notti", "Dirección de Vialidad", "Ministerio de Hacienda",
+    "Irrigación", "Ministerio de Infraestructura", "Dirección de Compras", "Hospital Perrupato",
+)
+_FORMAS_SOCIETARIAS = ("S.A.", "S.R.L.", "S.A.S.", "", "Cooperativa")
+_UNIDADES = ("unidad", "caja", "litro", "kilogramo", "metro", "servicio", "frasco", "resma")
+
+
+def _pesos_zipf(n, s):
+    """Pesos acumulados de una distribución de Zipf con exponente ``s`` sobre ``n`` rangos."""
+    return list(itertools.accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+
+class _Elector:
+    """Elige índices en ``[0, n)`` con sesgo Zipf (``s=0`` es uniforme)."""
+
+    def __init__(self, rng, n, s):
+        self._rng = rng
+        self._acumulados = _pesos_zipf(n, s)
+        self._total = self._acumulados[-1]
+
+    def __call__(self):
+        return bisect.bisect_left(self._acumulados, self._rng.random() * self._total)
+
+
+def _rango_años(texto):
+    desde, _, hasta = str(texto).partition("-")
+    desde, hasta = int(desde), int(hasta or desde)
+    if hasta < desde:
+        raise argparse.ArgumentTypeError("el rango de años debe ser creciente, p. ej. 2019-2025")
+    return desde, hasta
+
+
+def _catalogos(rng, compradores, proveedores, insumos):
+    """Nombres de compradores, proveedores e insumos (clasificación, descripción, unidad, precio)."""
+    nombres_compradores = [
+        f"{_ORGANISMOS[i % len(_ORGANISMOS)]}" + (f" - Delegación {i // len(_ORGANISMOS)}" if i >= len(_ORGANISMOS) else "")
+        for i in range(compradores)
+    ]
+    nombres_proveedores = [
+        f"Proveedor {i:05d} {_FORMAS_SOCIETARIAS[rng.randrange(len(_FORMAS_SOCIETARIAS))]}".strip()
+        for i in range(proveedores)
+    ]
+    catalogo = []
+    for i in range(insumos):
+        rubro = _RUBROS[rng.randrange(len(_RUBROS))]
+        catalogo.append((
+            f"{rng.randrange(10, 99)}{i:06d}",
+            f"{rubro.capitalize()} - artículo {i}",
+            _UNIDADES[rng.randrange(len(_UNIDADES))],
+            round(rng.lognormvariate(7, 1.6), 2),
+        ))
+    return nombres_compradores, nombres_proveedores, catalogo
+
+
+def _fecha_texto(rng, fecha, irregulares):
+    """Fecha en el formato habitual (ISO con zona) o, en una fracción, en formatos alternativos."""
+    if irregulares and rng.random() < irregulares:
+        return fecha.strftime("%Y-%m-%d") if rng.random() < 0.5 else fecha.strftime("%d/%m/%Y")
+    return fecha.strftime("%Y-%m-%dT%H:%M:%S") + "-03:00"
+
+
+def generar_releases(releases=20000, años=(2019, 2025), compradores=60, proveedores=3000, insumos=8000,
+                     semilla=42, sesgo=1.1, multi_proveedor=0.25, sin_tender_id=0.2, fechas_irregulares=0.02,
+                     orden="asc"):
+    """Itera los releases sintéticos (diccionarios OCDS).
+
+    Parámetros
+    ----------
+    releases : int
+        Cantidad de releases.
+    años : tuple[int, int]
+        Rango de años (inclusivo) de las fechas.
+    compradores, proveedores, insumos : int
+        Cardinalidad de cada dimensión.
+    semilla : int
+        Semilla del generador pseudoaleatorio (misma semilla, mismos datos).
+    sesgo : float
+        Exponente de Zipf para compradores, proveedores e insumos (``0`` = uniforme).
+    multi_proveedor : float
+        Fracción de adjudicaciones con más de un proveedor.
+    sin_tender_id : float
+        Fracción de procesos sin ``tender.id`` (el número va en la descripción del contrato).
+    fechas_irregulares : float
+        Fracción de fechas en formatos no ISO (``AAAA-MM-DD`` o ``DD/MM/AAAA``).
+    orden : str
+        ``asc`` o ``desc`` por fecha, o ``aleatorio``.
+    """
+    rng = random.Random(semilla)
+    nombres_compradores, nombres_proveedores, catalogo = _catalogos(rng, compradores, proveedores, insumos)
+    elegir_comprador = _Elector(rng, compradores, sesgo)
+    elegir_proveedor = _Elector(rng, proveedores, sesgo)
+    elegir_insumo = _Elector(rng, insumos, sesgo)
+    pesos_tipos = list(itertools.accumulate(p for _, p, _ in _TIPOS))
+
+    # Fechas: repartidas en el rango y ordenadas según se pida (sin guardar los releases)
+    inicio = datetime(años[0], 1, 1)
+    segundos = int((datetime(años[1] + 1, 1, 1) - inicio).total_seconds())
+    rng_fechas = random.Random(semilla + 1)
+    desplazamientos = sorted(rng_fechas.randrange(segundos) for _ in range(releases))
+    if orden == "desc":
+        desplazamientos.reverse()
+    elif orden == "aleatorio":
+        rng_fechas.shuffle(desplazamientos)
+
+    for n, desplazamiento in enumerate(desplazamientos):
+        fecha = inicio + timedelta(seconds=desplazamiento)
+        fecha_txt = _fecha_texto(rng, fecha, fechas_irregulares)
+        año = fecha.year
+        tipo, _, forma = _TIPOS[bisect.bisect_left(pesos_tipos, rng.random() * pesos_tipos[-1])]
+        numero = f"{rng.randrange(1, 9999)}-{rng.randrange(1, 9999):04d}-{tipo}{año % 100:02d}"
+        id_comprador = elegir_comprador()
+        rubro = _RUBROS[rng.randrange(len(_RUBROS))]
+
+        items = []
+        for j in range(min(12, int(rng.expovariate(1 / 2.5)))):
+            codigo, descripcion, unidad, precio = catalogo[elegir_insumo()]
+            cantidad = max(1, int(rng.paretovariate(1.3)))
+            items.append({
+                "id": str(j + 1),
+                "description": descripcion,
+                "classification": {"scheme": "CUCOP", "id": codigo, "description": descripcion},
+                "quantity": cantidad,
+                "unit": {"name": unidad, "value": {"amount": precio, "currency": "ARS"}},
+            })
+
+        tender = {
+            "title": f"{forma} {numero.split('-')[0]} - adquisición de {rubro}",
+            "procurementMethodDetails": forma,
+            "items": items,
+        }
+        if rng.random() >= sin_tender_id:
+            tender["id"] = numero
+        if rng.random() < 0.7:
+            tender["period"] = {"startDate": fecha_txt}
+        if rng.random() < 0.3:
+            tender["submissionMethodDetails"] = forma
+
+        # Adjudicaciones (algunos procesos quedan sin adjudicar) y una orden de compra por adjudicación
+        awards, contracts = [], []
+        for a in range(rng.choice((0, 1, 1, 1, 1, 2, 2, 3))):
+            n_prov = 1 + (rng.randrange(1, 4) if rng.random() < multi_proveedor else 0)
+            proveedores_aw = sorted({elegir_proveedor() for _ in range(n_prov)})
+            award_id = f"{numero}-A{a + 1}"
+            awards.append({
+                "id": award_id,
+                "date": fecha_txt,
+                "status": "active",
+                "value": {"amount": round(rng.lognormvariate(13, 1.8), 2), "currency": "ARS"},
+                "suppliers": [{"id": f"AR-CUIT-30{p:09d}", "name": nombres_proveedores[p]} for p in proveedores_aw],
+            })
+            contracts.append({
+                "id": f"OC-{año}-{n + 1:07d}-{a + 1}",
+                "awardID": award_id,
+                "dateSigned": fecha_txt,
+                "description": f"Proceso Nº {numero} - Orden de compra {a + 1}",
+            })
+
+        release = {
+            "ocid": f"ocds-sintetico-{n + 1:08d}",
+            "id": f"{n + 1:08d}-{año}",
+            "date": fecha_txt,
+            "tag": ["contract"] if contracts else ["tender"],
+            "initiationType": "tender",
+            "buyer": {"id": f"MZA-{id_comprador:04d}", "name": nombres_compradores[id_comprador]},
+            "tender": tender,
+            "awards": awards,
+            "contracts": contracts,
+        }
+        yield release
+
+
+def escribir(ruta, releases, semilla=42):
+    """Escribe ``releases`` en ``ruta`` según su extensión (``.json``, ``.jsonl``, con o sin ``.gz``).
+
+    Retorna
+    -------
+    int
+        Cantidad de releases escritos.
+    """
+    comprimido = ruta.endswith(".gz")
+    lineas = ruta[:-3].endswith(".jsonl") if comprimido else ruta.endswith(".jsonl")
+    # mtime fijo: el gzip resultante también es idéntico entre corridas
+    salida = gzip.GzipFile(ruta, "wb", mtime=0) if comprimido else open(ruta, "wb")
+    total = 0
+    with salida:
+        if not lineas:
+            cabecera = {
+                "uri": f"https://example.org/ocds/sintetico-{semilla}.json",
+                "version": "1.1",
+                "publishedDate": "2025-01-01T00:00:00-03:00",
+                "publisher": {"name": "Generador sintético OCDS"},
+            }
+            salida.write(json.dumps(cabecera, ensure_ascii=False)[:-1].encode("utf-8") + b', "releases": [\n')
+        for release in releases:
+            texto = json.dumps(release, ensure_ascii=False).encode("utf-8")
+            if lineas:
+                salida.write(texto + b"\n")
+            else:
+                salida.write((b",\n" if total else b"") + texto)
+            total += 1
+        if not lineas:
+            salida.write(b"\n]}\n")
+    return total
+
+
+def generar_archivo(ruta, **opciones):
+    """Genera el archivo ``ruta`` con :func:`generar_releases` y devuelve la cantidad de releases."""
+    return escribir(ruta, generar_releases(**opciones), semilla=opciones.get("semilla", 42))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("salida", help="archivo de salida (.json, .json.gz, .jsonl o .jsonl.gz)")
+    parser.add_argument("--releases", type=int, default=20000)
+    parser.add_argument("--años", type=_rango_años, default=(2019, 2025), help="rango, p. ej. 2019-2025")
+    parser.add_argument("--compradores", type=int, default=60)
+    parser.add_argument("--proveedores", type=int, default=3000)
+    parser.add_argument("--insumos", type=int, default=8000)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--sesgo", type=float, default=1.1, help="exponente de Zipf (0 = uniforme)")
+    parser.add_argument("--multi-proveedor", type=float, default=0.25)
+    parser.add_argument("--sin-tender-id", type=float, default=0.2)
+    parser.add_argument("--fechas-irregulares", type=float, default=0.02)
+    parser.add_argument("--orden", choices=("asc", "desc", "aleatorio"), default="asc")
+    args = parser.parse_args(argv[1:])
+    opciones = {k: v for k, v in vars(args).items() if k != "salida"}
+    total = generar_archivo(args.salida, **opciones)
+    print(f"{total} releases escritos en {args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
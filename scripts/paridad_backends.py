@@ -0,0 +1,179 @@
+"""Verifica que los backends ``pandas`` y ``sqlite`` devuelvan los mismos resultados.
+
+Carga el dataset indicado dos veces (en memoria y volcado a SQLite) y compara,
+para cada año, las consultas de Home, Insumos (todas las medidas/vistas) y
+Procesos (filtros, órdenes, páginas, búsqueda de texto y exportación completa). Termina con código 1 si hay diferencias.
+
+Uso::
+
+    python scripts/paridad_backends.py ruta/o/url/release.json
+    python scripts/paridad_backends.py sintetico:50000   # datos de generar_ocds_sintetico.py
+"""
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _resolver_fuente(fuente):
+    """``sintetico:N[:semilla]`` genera N releases sintéticos en un archivo temporal."""
+    if not fuente.startswith("sintetico:"):
+        return fuente
+    from generar_ocds_sintetico import generar_archivo
+
+    partes = fuente.split(":")
+    semilla = int(partes[2]) if len(partes) > 2 else 42
+    ruta = os.path.join(tempfile.mkdtemp(prefix="ocds-sintetico-"), f"sintetico-{partes[1]}-{semilla}.json")
+    generar_archivo(ruta, releases=int(partes[1]), semilla=semilla)
+    return ruta
+
+
+def _preparar_entorno(fuente):
+    os.environ["OCDS_JSON_URL"] = fuente
+    os.environ["LAZY_LOAD"] = "1"
+    os.environ["OCDS_BACKEND"] = "pandas"
+    os.environ.setdefault("OCDS_SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="ocds-paridad-"), "paridad.sqlite3"))
+    sys.path.insert(0, RAIZ)
+
+
+def _normalizar(frame):
+    """Tipos comparables entre backends: texto como object, números como float64."""
+    out = frame.reset_index(drop=True).copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif pd.api.types.is_numeric_dtype(out[col]) and not pd.api.types.is_bool_dtype(out[col]):
+            out[col] = pd.to_numeric(out[col], errors="coerce").astype("float64")
+        else:
+            out[col] = out[col].astype(object).where(out[col].notna(), None)
+    return out
+
+
+def _iguales(a, b):
+    a, b = _normalizar(a), _normalizar(b)
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    for col in a.columns:
+        if "float64" in (a[col].dtype, b[col].dtype):
+            x = pd.to_numeric(a[col], errors="coerce").astype("float64").to_numpy()
+            y = pd.to_numeric(b[col], errors="coerce").astype("float64").to_numpy()
+            if not np.allclose(x, y, rtol=1e-6, atol=1e-6, equal_nan=True):
+                return False
+        elif a[col].tolist() != b[col].tolist():
+            return False
+    return True
+
+
+def main(argv):
+    fuente = argv[1] if len(argv) > 1 else os.getenv("OCDS_JSON_URL", "")
+    if not fuente:
+        print(__doc__)
+        return 2
+    _preparar_entorno(_resolver_fuente(fuente))
+    import app.app as m
+
+    m.ensure_data_loaded()
+    if m._DATA_ERROR:
+        print(f"Error al cargar con pandas: {m._DATA_ERROR}")
+        return 2
+    df_mem, items_mem = m.df, m.df_items
+
+    # Segunda carga con el backend SQLite (mismo camino que en producción)
+    m.OCDS_BACKEND = "sqlite"
+    m.ensure_data_loaded(force=True)
+    if m._DATA_ERROR:
+        print(f"Error al cargar con sqlite: {m._DATA_ERROR}")
+        return 2
+
+    def ambos(fn, *args):
+        m.OCDS_BACKEND, m.df, m.df_items = "pandas", df_mem, items_mem
+        r_pd = fn(*args)
+        m.OCDS_BACKEND = "sqlite"
+        r_sq = fn(*args)
+        return r_pd, r_sq
+
+    fallas = []
+    casos = 0
+
+    def comparar(nombre, a, b):
+        nonlocal casos
+        casos += 1
+        if isinstance(a, pd.DataFrame):
+            ok = _iguales(a, b)
+        elif isinstance(a, dict):
+            ok = a.keys() == b.keys() and all(_iguales(a[k], b[k]) for k in a)
+        else:
+            ok = a == b
+        if not ok:
+            fallas.append(nombre)
+
+    for nombre, fn in (("filas", m.filas_cargadas), ("años", m.consultar_años), ("opciones", m.consultar_opciones_procesos)):
+        comparar(nombre, *ambos(fn))
+    a_pd, a_sq = ambos(m.consultar_rango_fechas)
+    comparar("rango", [str(x) for x in a_pd], [str(x) for x in a_sq])
+
+    años = ambos(m.consultar_años)[0]
+    compradores, proveedores, tipos = ambos(m.consultar_opciones_procesos)[0]
+    órdenes = [
+        None,
+        [{"column_id": "fecha", "direction": "desc"}],
+        [{"column_id": "Monto (Millones)", "direction": "desc"}],
+        [{"column_id": "licitante", "direction": "asc"}, {"column_id": "Orden de Compra", "direction": "desc"}],
+        [{"column_id": "proveedor", "direction": "desc"}, {"column_id": "Título", "direction": "asc"}],
+    ]
+    for año in años:
+        comparar(f"home {año}", *ambos(m.consultar_home, año))
+        for medida in ("monto", "cantidad"):
+            for vista in ("agregado", "detalle"):
+                r_pd, r_sq = ambos(m.consultar_insumos, año, medida, vista)
+                if r_pd is None or r_sq is None:
+                    comparar(f"insumos {año} {medida} {vista}", r_pd is None, r_sq is None)
+                else:
+                    comparar(f"insumos {año} {medida} {vista}", r_pd, r_sq)
+        filtros = [(None, None, None)]
+        filtros += [(c, None, None) for c in compradores[:3]]
+        filtros += [(None, p, None) for p in proveedores[:3]]
+        filtros += [(None, None, t) for t in tipos]
+        for comprador, proveedor, tipo in filtros:
+            for orden in órdenes:
+                for pagina in (0, 1, 7):
+                    (p_pd, t_pd), (p_sq, t_sq) = ambos(m.consultar_procesos, año, comprador, proveedor, tipo, orden, pagina, 20)
+                    nombre = f"procesos {año} {comprador}/{proveedor}/{tipo} {orden} p{pagina}"
+                    comparar(nombre + " total", t_pd, t_sq)
+                    comparar(nombre, p_pd, p_sq)
+
+    # Búsqueda de texto: el índice es común, pero el filtrado y el orden no
+    consultas = ["servicio", "compra insumos", "medic", "mendoza combustible", "zzzz inexistente"]
+    for año in [None] + list(años[:2]):
+        for texto in consultas:
+            for prefijo in (False, True):
+                for orden in órdenes[:3]:
+                    (p_pd, t_pd), (p_sq, t_sq) = ambos(
+                        m.consultar_procesos, año, None, None, None, orden, 0, 20, texto, prefijo
+                    )
+                    nombre = f"busqueda {año} '{texto}' prefijo={prefijo} {orden}"
+                    comparar(nombre + " total", t_pd, t_sq)
+                    comparar(nombre, p_pd, p_sq)
+
+    # Exportación: resultado completo (todos los años y por año) armado lote a lote
+    def exportacion(*args):
+        lotes = list(m.iterar_procesos(*args, tamano_lote=997))
+        return pd.concat(lotes, ignore_index=True) if lotes else pd.DataFrame(columns=list(m._ORDEN_PROCESOS))
+
+    for año in [None] + list(años[-1:]):
+        for orden in órdenes:
+            comparar(f"exportar {año} {orden}", *ambos(exportacion, año, None, None, None, orden))
+        comparar(f"exportar {año} 'servicio'", *ambos(exportacion, año, None, None, None, órdenes[2], "servicio", True))
+
+    print(f"Casos comparados: {casos}. Diferencias: {len(fallas)}")
+    for nombre in fallas[:50]:
+        print(f"  DIFERENCIA: {nombre}")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,114 @@
+"""Prepara ``assets/`` para el deploy: copias locales de los logos y variantes precomprimidas.
+
+- Descarga los logos del encabezado (las mismas URLs que ``LOGO_GOV_URL`` y
+  ``LOGO_OCDS_URL`` en ``app/app.py``) a ``assets/logo_gobierno.png`` y
+  ``assets/logo_ocds.png``. Si la descarga falla se avisa y se sigue: la app usa las
+  URLs externas cuando no encuentra la copia local.
+- Genera ``<archivo>.gz`` (y ``<archivo>.br`` si el paquete ``brotli`` está instalado)
+  para los archivos de texto que superan ``--minimo`` bytes. Solo se regeneran si el
+  original es más nuevo y se descartan si no achican el archivo.
+
+La app calcula la huella de cada asset al servirlo: no hace falta un manifiesto.
+
+Uso::
+
+    python scripts/preparar_assets.py
+    python scripts/preparar_assets.py --sin-logos --minimo 512
+"""
+import argparse
+import gzip
+import os
+import sys
+
+import requests
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LOGOS = {
+    "logo_gobierno.png": "https://mza-dicaws-portal-uploads-media-prod.s3.amazonaws.com/principal/uploads/2025/10/SITIO-AC_200x200-1-300x300-1.png",
+    "logo_ocds.png": "https://ocp.imgix.net/wp-content/uploads/2020/01/OCDS-logo-grey.png?auto=format&w=1800",
+}
+COMPRIMIBLES = (".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".html", ".xml", ".ico")
+
+
+def descargar_logos(directorio, forzar=False, timeout=30):
+    """Descarga los logos que falten; devuelve cuántos quedaron en disco."""
+    presentes = 0
+    for nombre, url in LOGOS.items():
+        destino = os.path.join(directorio, nombre)
+        if os.path.exists(destino) and not forzar:
+            presentes += 1
+            continue
+        try:
+            resp = requests.get(url, timeout=timeout)
+            resp.raise_for_status()
+            if not resp.headers.get("Content-Type", "").startswith("image/"):
+                raise ValueError(f"tipo inesperado: {resp.headers.get('Content-Type')}")
+        except Exception as e:
+            print(f"AVISO: no se pudo descargar {nombre} ({e}); se usará la URL externa", file=sys.stderr)
+            continue
+        with open(destino + ".tmp", "wb") as f:
+            f.write(resp.content)
+        os.replace(destino + ".tmp", destino)
+        print(f"{nombre}: {len(resp.content)} B")
+        presentes += 1
+    return presentes
+
+
+def _escribir_variante(origen, sufijo, comprimir):
+    destino = origen + sufijo
+    if os.path.exists(destino) and os.stat(destino).st_mtime_ns >= os.stat(origen).st_mtime_ns:
+        return None
+    with open(origen, "rb") as f:
+        datos = f.read()
+    comprimido = comprimir(datos)
+    if len(comprimido) >= len(datos):
+        if os.path.exists(destino):
+            os.remove(destino)
+        return None
+    with open(destino + ".tmp", "wb") as f:
+        f.write(comprimido)
+    os.replace(destino + ".tmp", destino)
+    return len(datos), len(comprimido)
+
+
+def precomprimir(directorio, minimo=1024):
+    """Genera las variantes .gz/.br de los archivos de texto de ``directorio``."""
+    try:
+        import brotli  # type: ignore  # import opcional
+    except ImportError:
+        brotli = None
+    codificadores = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        codificadores.append((".br", lambda d: brotli.compress(d, quality=11)))
+    generadas = 0
+    for carpeta, _, archivos in os.walk(directorio):
+        for nombre in sorted(archivos):
+            ruta = os.path.join(carpeta, nombre)
+            if not nombre.lower().endswith(COMPRIMIBLES) or os.path.getsize(ruta) < minimo:
+                continue
+            for sufijo, comprimir in codificadores:
+                tamanos = _escribir_variante(ruta, sufijo, comprimir)
+                if tamanos:
+                    generadas += 1
+                    print(f"{os.path.relpath(ruta, directorio)}{sufijo}: {tamanos[0]} -> {tamanos[1]} B")
+    return generadas
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--directorio", default=os.getenv("OCDS_ASSETS_DIR") or os.path.join(RAIZ, "assets"))
+    parser.add_argument("--minimo", type=int, default=1024, help="bytes mínimos para precomprimir")
+    parser.add_argument("--sin-logos", action="store_true", help="no descargar los logos")
+    parser.add_argument("--forzar-logos", action="store_true", help="volver a descargar los logos existentes")
+    args = parser.parse_args(argv[1:])
+
+    os.makedirs(args.directorio, exist_ok=True)
+    if not args.sin_logos:
+        descargar_logos(args.directorio, forzar=args.forzar_logos)
+    generadas = precomprimir(args.directorio, args.minimo)
+    print(f"Variantes precomprimidas nuevas: {generadas}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
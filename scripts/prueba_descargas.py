@@ -0,0 +1,297 @@
+"""Prueba la descarga reanudable (``descargar_archivo``) contra un servidor HTTP local de reemplazo.
+
+El servidor (``ThreadingHTTPServer`` en un hilo) sirve un archivo en memoria con ETag,
+``Accept-Ranges`` y respuestas ``206`` a ``Range``/``If-Range``, y permite inyectar
+fallas: conexiones cortadas a mitad del cuerpo, servidor sin HEAD ni rangos, recurso
+que cambia entre reintentos y 404. Cada caso usa una carpeta de descargas nueva y
+verifica el contenido final y los pedidos que recibió el servidor:
+
+- tramos en paralelo con ``Range``/``206`` y reanudación de un tramo cortado desde lo
+  ya escrito (también entre dos llamadas, con los ``.partN`` de la anterior);
+- reutilización de la copia si el ETag no cambió (solo HEAD, sin cuerpo) y nueva
+  descarga si cambió; el servidor responde ``304`` a ``If-None-Match``;
+- transferencias truncadas: reintento desde cero sin rangos y error (sin dejar un
+  archivo final) si nunca llega completa;
+- SHA-256 distinto, recurso que cambia a mitad de camino (``If-Range``) y 404 sin reintentos.
+
+Termina con código 1 si algún caso falla.
+
+Uso::
+
+    python scripts/prueba_descargas.py
+    python scripts/prueba_descargas.py --casos reanudacion_206 truncado_persistente -v
+"""
+import argparse
+import hashlib
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+class ServidorPrueba(ThreadingHTTPServer):
+    """Servidor local con un único recurso en ``/release.json`` y fallas configurables."""
+
+    daemon_threads = True
+
+    def __init__(self, contenido):
+        super().__init__(("127.0.0.1", 0), _Manejador)
+        self.lock = threading.Lock()
+        self.publicar(contenido)
+        self.rangos = True      # anuncia y respeta Range
+        self.head = True        # responde HEAD
+        self.cortes = 0         # próximos GET con cuerpo que se cortan a la mitad
+        self.cambiar_al_cortar = None  # contenido nuevo a publicar tras el próximo corte
+        self.pedidos = []       # (método, Range, If-Range, código, bytes enviados)
+        self.hilo = threading.Thread(target=self.serve_forever, daemon=True)
+        self.hilo.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/release.json"
+
+    def publicar(self, contenido):
+        self.contenido = contenido
+        self.etag = '"' + hashlib.sha1(contenido).hexdigest()[:16] + '"'
+
+    def gets_con_cuerpo(self):
+        return [p for p in self.pedidos if p[0] == "GET" and p[4] > 0]
+
+    def handle_error(self, request, client_address):
+        # El cliente cierra la conexión ante un cuerpo truncado o un 200 inesperado: es parte de la prueba
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def cerrar(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _cabeceras(self, codigo, largo, extra=()):
+        self.send_response(codigo)
+        self.send_header("Content-Length", str(largo))
+        self.send_header("ETag", self.server.etag)
+        if self.server.rangos:
+            self.send_header("Accept-Ranges", "bytes")
+        for clave, valor in extra:
+            self.send_header(clave, valor)
+        self.end_headers()
+
+    def do_HEAD(self):
+        srv = self.server
+        if self.path != "/release.json":
+            self.send_error(404)
+            return
+        if not srv.head:
+            self.send_error(405)
+            return
+        self._cabeceras(200, len(srv.contenido))
+        srv.pedidos.append(("HEAD", None, None, 200, 0))
+
+    def do_GET(self):
+        srv = self.server
+        if self.path != "/release.json":
+            srv.pedidos.append(("GET", None, None, 404, 0))
+            self.send_error(404)
+            return
+        rango, si_rango = self.headers.get("Range"), self.headers.get("If-Range")
+        with srv.lock:
+            contenido, etag = srv.contenido, srv.etag
+            cortar = srv.cortes > 0
+        if self.headers.get("If-None-Match") == etag:
+            self._cabeceras(304, 0)
+            srv.pedidos.append(("GET", rango, si_rango, 304, 0))
+            return
+        codigo, inicio, fin, extra = 200, 0, len(contenido) - 1, []
+        if rango and srv.rangos and (not si_rango or si_rango == etag):
+            a, _, b = rango.split("=", 1)[1].partition("-")
+            inicio, fin = int(a), min(int(b) if b else len(contenido) - 1, len(contenido) - 1)
+            codigo = 206
+            extra.append(("Content-Range", f"bytes {inicio}-{fin}/{len(contenido)}"))
+        cuerpo = contenido[inicio:fin + 1]
+        if cortar and len(cuerpo) > 1:
+            with srv.lock:
+                srv.cortes -= 1
+                if srv.cambiar_al_cortar is not None:
+                    srv.publicar(srv.cambiar_al_cortar)
+                    srv.cambiar_al_cortar = None
+            # Anuncia el largo completo pero corta la conexión a la mitad del cuerpo
+            enviado = cuerpo[:len(cuerpo) // 2]
+            self._cabeceras(codigo, len(cuerpo), extra)
+            self.wfile.write(enviado)
+            self.wfile.flush()
+            self.close_connection = True
+        else:
+            enviado = cuerpo
+            self._cabeceras(codigo, len(cuerpo), extra)
+            self.wfile.write(enviado)
+        srv.pedidos.append(("GET", rango, si_rango, codigo, len(enviado)))
+
+
+def _contenido(tamano, semilla):
+    bloque = hashlib.sha256(str(semilla).encode()).digest()
+    return (bloque * (tamano // len(bloque) + 1))[:tamano]
+
+
+class Caso:
+    """Contexto de un caso: servidor nuevo, carpeta de descargas temporal y verificaciones."""
+
+    def __init__(self, m, tamano):
+        self.m = m
+        self.contenido = _contenido(tamano, 1)
+        self.srv = ServidorPrueba(self.contenido)
+        self.dir = tempfile.mkdtemp(prefix="ocds-prueba-descargas-")
+
+    def descargar(self, partes=4, intentos=3, sha256=None):
+        return self.m.descargar_archivo(self.srv.url, self.dir, partes=partes, intentos=intentos, sha256=sha256)
+
+    def verificar(self, condicion, mensaje):
+        if not condicion:
+            raise AssertionError(mensaje)
+
+    def verificar_archivo(self, ruta, contenido=None):
+        with open(ruta, "rb") as f:
+            self.verificar(f.read() == (contenido if contenido is not None else self.srv.contenido),
+                           "el archivo descargado no coincide con el servido")
+
+    def esperar_error(self, fn, tipo):
+        try:
+            fn()
+        except tipo as e:
+            return e
+        raise AssertionError(f"se esperaba {tipo.__name__}")
+
+    def cerrar(self):
+        self.srv.cerrar()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def caso_tramos_paralelos(c):
+    c.verificar_archivo(c.descargar(partes=4))
+    gets = c.srv.gets_con_cuerpo()
+    c.verificar(len(gets) == 4 and all(p[3] == 206 for p in gets), f"se esperaban 4 GET 206: {gets}")
+
+
+def caso_reanudacion_206(c):
+    c.srv.cortes = 2
+    c.verificar_archivo(c.descargar(partes=4, intentos=4))
+    tramo = len(c.contenido) // 4
+    inicios = [int(p[1].split("=")[1].split("-")[0]) for p in c.srv.gets_con_cuerpo() if p[1]]
+    # Tras un corte, el reintento pide desde lo ya escrito: no coincide con el inicio de un tramo
+    c.verificar(any(i % tramo for i in inicios), f"no hubo pedidos reanudados a mitad de tramo: {inicios}")
+
+
+def caso_reanudacion_entre_llamadas(c):
+    c.srv.cortes = 1
+    c.esperar_error(lambda: c.descargar(partes=1, intentos=1), Exception)
+    parciales = [n for n in os.listdir(c.dir) if ".part" in n]
+    c.verificar(parciales, "no quedó el tramo parcial de la primera llamada")
+    escrito = os.path.getsize(os.path.join(c.dir, parciales[0]))
+    c.verificar_archivo(c.descargar(partes=1, intentos=1))
+    ultimo = c.srv.gets_con_cuerpo()[-1]
+    c.verificar(ultimo[3] == 206 and ultimo[1] == f"bytes={escrito}-{len(c.contenido) - 1}",
+                f"la segunda llamada no retomó desde el byte {escrito}: {ultimo}")
+
+
+def caso_etag_sin_cambios(c):
+    c.verificar_archivo(c.descargar())
+    gets = len(c.srv.gets_con_cuerpo())
+    c.verificar_archivo(c.descargar())
+    c.verificar(len(c.srv.gets_con_cuerpo()) == gets, "con el mismo ETag se volvió a descargar el cuerpo")
+    # El servidor de reemplazo también valida con If-None-Match (304 sin cuerpo)
+    import requests
+    resp = requests.get(c.srv.url, headers={"If-None-Match": c.srv.etag}, timeout=10)
+    c.verificar(resp.status_code == 304 and not resp.content, "el servidor no respondió 304 a If-None-Match")
+
+
+def caso_etag_cambiado(c):
+    c.verificar_archivo(c.descargar())
+    nuevo = _contenido(len(c.contenido) + 123, 2)
+    c.srv.publicar(nuevo)
+    c.verificar_archivo(c.descargar(), nuevo)
+
+
+def caso_truncado_sin_rangos(c):
+    c.srv.rangos, c.srv.head, c.srv.cortes = False, False, 1
+    c.verificar_archivo(c.descargar(intentos=3))
+    gets = c.srv.gets_con_cuerpo()
+    c.verificar(all(p[3] == 200 for p in gets) and gets[-1][4] == len(c.contenido),
+                f"sin rangos el reintento debe pedir el archivo completo: {gets}")
+
+
+def caso_truncado_persistente(c):
+    c.srv.rangos, c.srv.cortes = False, 10 ** 6
+    c.esperar_error(lambda: c.descargar(intentos=2), Exception)
+    finales = [n for n in os.listdir(c.dir) if n.endswith("release.json")]
+    c.verificar(not finales, f"quedó un archivo final tras una transferencia truncada: {finales}")
+
+
+def caso_sha256_distinto(c):
+    error = c.esperar_error(lambda: c.descargar(sha256="0" * 64), ValueError)
+    c.verificar("SHA-256" in str(error), f"error inesperado: {error}")
+    c.verificar_archivo(c.descargar(sha256=hashlib.sha256(c.contenido).hexdigest()))
+
+
+def caso_recurso_cambia(c):
+    nuevo = _contenido(len(c.contenido), 3)
+    c.srv.cortes, c.srv.cambiar_al_cortar = 1, nuevo
+    c.verificar_archivo(c.descargar(partes=4, intentos=3), nuevo)
+    c.verificar(any(p[2] and p[3] == 200 for p in c.srv.pedidos),
+                "If-Range con el ETag viejo debía recibir el recurso completo (200)")
+
+
+def caso_404_sin_reintentos(c):
+    import requests
+    url = c.srv.url
+    error = c.esperar_error(
+        lambda: c.m.descargar_archivo(url.replace("release.json", "no-existe.json"), c.dir, intentos=4),
+        requests.HTTPError)
+    gets = [p for p in c.srv.pedidos if p[0] == "GET" and p[3] == 404]
+    c.verificar(len(gets) == 2, f"un 404 no se reintenta (sondeo + un GET): {gets} ({error})")
+
+
+CASOS = {nombre[len("caso_"):]: fn for nombre, fn in list(globals().items()) if nombre.startswith("caso_")}
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--casos", nargs="*", choices=sorted(CASOS), help="casos a correr (por defecto todos)")
+    parser.add_argument("--tamano", type=int, default=1024 * 1024, help="bytes del archivo servido")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostrar los logs de la descarga")
+    args = parser.parse_args(argv[1:])
+
+    os.environ.setdefault("OCDS_JSON_URL", "http://127.0.0.1:9/release.json")
+    os.environ["LAZY_LOAD"] = "1"
+    sys.path.insert(0, RAIZ)
+    import app.app as m
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.ERROR)
+    # Tramos chicos para que el archivo de prueba se reparta en varios pedidos con rango
+    m._TAMANO_MIN_TRAMO = max(1, args.tamano // 8)
+
+    fallas = 0
+    for nombre in args.casos or sorted(CASOS):
+        caso = Caso(m, args.tamano)
+        try:
+            CASOS[nombre](caso)
+            print(f"OK     {nombre}")
+        except Exception as e:
+            fallas += 1
+            print(f"FALLA  {nombre}: {type(e).__name__}: {e}")
+        finally:
+            caso.cerrar()
+    print(f"{len(args.casos or CASOS) - fallas}/{len(args.casos or CASOS)} casos correctos")
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))